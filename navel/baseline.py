@@ -0,0 +1,170 @@
+"""
+Module handling baselines of accepted violations, only violations missing in the baseline are reported
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+from typing import Any, Dict, Generator, Iterable, List, Tuple
+
+from navel.caching.result_cache import rules_fingerprint
+from navel.errors import BaselineError
+from navel.models import LintingViolation, Rule
+
+# Version of the baseline file format, baselines of other versions are refused
+BASELINE_VERSION = 1
+
+# Number of hex digits of fingerprints of violating lines
+FINGERPRINT_LENGTH = 16
+
+# Violation as stored in the baseline - name of the rule, path relative to the project and fingerprint of the line
+BaselineKey = Tuple[str, str, str]
+
+
+def line_fingerprint(line: str) -> str:
+    """
+    Get fingerprint of a violating line, changes of indentation and whitespace do not change the fingerprint
+    @param line: The violating line
+    @return: Hex digest of the normalized line
+    """
+    return hashlib.sha256(" ".join(line.split()).encode("utf-8")).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def content_hash(content: bytes) -> str:
+    """
+    Get hash of contents of a file
+    @param content: Contents of the file
+    @return: Hex digest of the contents
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+class Baseline:
+    """
+    Class keeping violations accepted in a baseline and hashes of the files they were found in
+
+    Violations are kept in a hashed index of their counts keyed by rules, paths and fingerprints of lines,
+    so violations shifted to other lines still match and every violation is filtered in constant time.
+    """
+
+    def __init__(self, project_directory: pathlib.Path, rules: Iterable[Rule]):
+        self._project_directory: pathlib.Path = project_directory
+        self._rules_fingerprint: str = rules_fingerprint(rules)
+        self._hashes: Dict[str, str] = {}
+        self._counts: Dict[BaselineKey, int] = {}
+        self._skip_unchanged: bool = True
+        self.skipped_files: int = 0
+        self.matched_violations: int = 0
+
+    def _relative_path(self, path: pathlib.Path) -> str:
+        return pathlib.Path(os.path.relpath(path, self._project_directory)).as_posix()
+
+    def _key(self, violation: LintingViolation) -> BaselineKey:
+        return violation.rule.name, self._relative_path(violation.path), line_fingerprint(violation.line)
+
+    @property
+    def violations_count(self) -> int:
+        """
+        Get number of violations in the baseline
+        @return: Number of violations
+        """
+        return sum(self._counts.values())
+
+    def record(self, path: pathlib.Path, content: bytes) -> None:
+        """
+        Record hash of a file linted for the baseline
+        @param path: Path of the file
+        @param content: Contents of the file
+        """
+        self._hashes[self._relative_path(path)] = content_hash(content)
+
+    def add(self, violation: LintingViolation) -> None:
+        """
+        Accept a violation into the baseline
+        @param violation: Violation to accept
+        """
+        key = self._key(violation)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def unchanged(self, path: pathlib.Path, content: bytes) -> bool:
+        """
+        Check whether a file is the same as when the baseline was written, such a file has no new violations
+        @param path: Path of the file
+        @param content: Contents of the file
+        @return: True when the file can be skipped, False when it has to be linted
+        """
+        if not self._skip_unchanged or self._hashes.get(self._relative_path(path)) != content_hash(content):
+            return False
+        self.skipped_files += 1
+        return True
+
+    def filter(self, violations: Iterable[LintingViolation]) -> Generator[LintingViolation, None, None]:
+        """
+        Yield violations not accepted in the baseline, every accepted violation matches one violation at most
+        @param violations: Violations to filter
+        @return: Generator of new violations
+        """
+        for violation in violations:
+            key = self._key(violation)
+            count = self._counts.get(key, 0)
+            if count > 0:
+                self._counts[key] = count - 1
+                self.matched_violations += 1
+                continue
+            yield violation
+
+    def dump(self, path: pathlib.Path) -> None:
+        """
+        Write the baseline to a file atomically
+        @param path: Path of the baseline file
+        """
+        files: Dict[str, Dict[str, Any]] = {
+            file_path: {"hash": file_hash, "violations": {}} for file_path, file_hash in self._hashes.items()
+        }
+        for (rule_name, file_path, fingerprint), count in self._counts.items():
+            file = files.setdefault(file_path, {"hash": None, "violations": {}})
+            file["violations"].setdefault(rule_name, {})[fingerprint] = count
+
+        baseline = {"version": BASELINE_VERSION, "rules": self._rules_fingerprint, "files": files}
+        file_descriptor, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as baseline_file:
+                json.dump(baseline, baseline_file, indent=1, sort_keys=True)
+                baseline_file.write("\n")
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def load(self, path: pathlib.Path) -> None:
+        """
+        Load accepted violations and hashes of files from a baseline file
+
+        Unchanged files are skipped only when the baseline was written with the same rules, otherwise
+        violations of new or changed rules in them would not be reported.
+        @raise BaselineError: When the file can not be read or is not a valid baseline
+        @param path: Path of the baseline file
+        """
+        try:
+            with path.open("r", encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file)
+        except (OSError, ValueError) as exc:
+            raise BaselineError(f"Can not read baseline `{path}`: {exc}") from exc
+
+        if not isinstance(baseline, dict) or baseline.get("version") != BASELINE_VERSION:
+            raise BaselineError(f"Baseline `{path}` is not a baseline of version {BASELINE_VERSION}")
+
+        try:
+            files: List[Tuple[str, Dict[str, Any]]] = list(baseline["files"].items())
+            for file_path, file in files:
+                if file["hash"] is not None:
+                    self._hashes[file_path] = str(file["hash"])
+                for rule_name, fingerprints in file["violations"].items():
+                    for fingerprint, count in fingerprints.items():
+                        self._counts[(rule_name, file_path, fingerprint)] = int(count)
+        except (KeyError, TypeError, AttributeError, ValueError) as exc:
+            raise BaselineError(f"Baseline `{path}` is not valid: {exc!r}") from exc
+
+        self._skip_unchanged = baseline.get("rules") == self._rules_fingerprint
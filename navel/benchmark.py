@@ -0,0 +1,345 @@
+"""
+Module for benchmarking Navel on synthetic Python corpora
+"""
+
+import dataclasses
+import functools
+import io
+import json
+import pathlib
+import platform
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from navel.caching.file_manager import File, FileManager
+from navel.caching.result_cache import navel_version
+from navel.discovery import FileDiscovery
+from navel.linter import Linter
+from navel.models import Rule
+from navel.parsing import load_config
+from navel.rule_set import rules_xml_omissions
+
+# Version of the format of benchmark results
+RESULTS_FORMAT = 1
+
+# Number of files in every package of a generated corpus
+FILES_PER_PACKAGE = 20
+
+# Number of rules of the rule set with many glob patterns, every rule applies to a single package
+GLOB_RULES = 40
+
+CONFIG_HEADER = """
+default_settings: !settings
+  included:
+    - "*.py"
+  excluded:
+    - "*/tests/*"
+  allow_ignore: yes
+
+rules:
+"""
+
+XPATH_RULES = {
+    "IllicitPrint": "//Call[func/Name[@id='print' or @id='pprint']]",
+    "IllicitEval": "//Call[func/Name[@id='eval' or @id='exec']]",
+    "GlobalStatement": "//Global | //Nonlocal",
+    "BareExcept": "//ExceptHandler[not(type)]",
+    "LambdaAssignment": "//Assign[value/Lambda]",
+    "MutableDefault": "//arguments/defaults/*[self::List or self::Dict or self::Set]",
+    "CompareToNone": "//Compare[comparators/Constant[@value='None']]",
+    "NestedFunction": "//FunctionDef//FunctionDef",
+    "StarImport": "//ImportFrom[names/alias[@name='*']]",
+    "EmptyClass": "//ClassDef[body/Pass and count(body/*) = 1]",
+}
+
+REGEX_RULES = {
+    "TodoComment": r"#\s*TODO",
+    "FixmeComment": r"#\s*FIXME",
+    "TrailingWhitespace": r"[ \t]+$",
+    "TabIndentation": r"^\t",
+    "PrintCall": r"\bprint\(",
+    "DebuggerCall": r"\b(?:pdb\.set_trace|breakpoint)\(",
+    "PercentFormat": r"['\"]\s*%\s*\(",
+    "HardcodedPassword": r"password\s*=\s*['\"]",
+    "LongNumber": r"\b\d{7,}\b",
+    "NoqaComment": r"#\s*noqa",
+}
+
+MODULE_HEADER = '''"""
+Generated module {index}
+"""
+
+import os
+from typing import Any, Dict, List
+'''
+
+SNIPPETS = (
+    '''
+
+def function_{index}(values: List[Any], default=[]) -> Dict[str, Any]:
+    """Collect values"""
+    result = {{}}
+    for value in values:
+        if value == None:
+            continue
+        result[str(value)] = value
+    print(result)  # TODO: remove
+    return result
+''',
+    """
+
+class Class{index}:
+    limit = 1234567890
+
+    def method(self, path):
+        try:
+            return os.path.join(path, "name")
+        except:
+            pass
+""",
+    """
+
+counter_{index} = 0
+handler_{index} = lambda value: value * 2
+
+
+def increment_{index}():
+    global counter_{index}
+    counter_{index} += 1
+    def inner():
+        return eval("counter_{index}")
+    return inner
+""",
+    """
+
+def format_{index}(name, password='secret'):
+    message = "%(name)s" % {{"name": name}}
+    return message.upper()  # noqa
+""",
+    """
+
+class Empty{index}:
+    pass
+""",
+)
+
+# Stage of a benchmark run with the function measured, called once per run
+Stage = Tuple[str, Callable[[], Any]]
+
+
+@dataclasses.dataclass
+class Corpus:
+    """
+    Generated corpus of Python files
+    """
+
+    directory: pathlib.Path
+    files: int
+    lines_per_file: int
+    seed: int
+
+
+def generate_corpus(directory: pathlib.Path, files: int, lines_per_file: int, seed: int = 0) -> Corpus:
+    """
+    Generate a corpus of Python files split into packages
+    @param directory: Directory to generate the corpus in
+    @param files: Number of files to generate
+    @param lines_per_file: Approximate number of lines of every file
+    @param seed: Seed of the random generator, the same seed generates the same corpus
+    @return: Description of the generated corpus
+    """
+    generator = random.Random(seed)
+    for index in range(files):
+        package = directory / f"package_{index // FILES_PER_PACKAGE}"
+        package.mkdir(parents=True, exist_ok=True)
+
+        parts = [MODULE_HEADER.format(index=index)]
+        lines = parts[0].count("\n")
+        while lines < lines_per_file:
+            snippet = generator.choice(SNIPPETS).format(index=len(parts))
+            parts.append(snippet)
+            lines += snippet.count("\n")
+        (package / f"module_{index % FILES_PER_PACKAGE}.py").write_text("".join(parts), encoding="utf-8")
+
+    return Corpus(directory=directory, files=files, lines_per_file=lines_per_file, seed=seed)
+
+
+def _glob_rules_config() -> str:
+    """
+    Generate rules each applying only to a single package of the corpus
+    @return: Rules in the YAML config format
+    """
+    return "".join(
+        f"""
+  Package{index}:
+    description: "Package {index}"
+    expr: //Global
+    settings: !settings
+      included:
+        - "*/package_{index}/*"
+      excluded:
+        - "*/package_{index}/module_1*.py"
+      allow_ignore: yes
+"""
+        for index in range(GLOB_RULES)
+    )
+
+
+def _rules_config(tag: str, expressions: Dict[str, str]) -> str:
+    """
+    Generate rules with default settings
+    @param tag: YAML tag of the expressions
+    @param expressions: Mapping of rule names to their expressions
+    @return: Rules in the YAML config format
+    """
+    # JSON strings are valid double-quoted YAML scalars
+    return "".join(
+        f'  {name}:\n    description: "{name}"\n    expr: {tag} {json.dumps(expr)}\n'
+        for name, expr in expressions.items()
+    )
+
+
+RULE_SETS: Dict[str, str] = {
+    "xpath": CONFIG_HEADER + _rules_config("!xpath", XPATH_RULES),
+    "regex": CONFIG_HEADER + _rules_config("!regex", REGEX_RULES),
+    "glob": CONFIG_HEADER + _glob_rules_config(),
+}
+
+
+def _measure(stages: Sequence[Stage], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Measure wall time of stages
+    @param stages: Stages to be measured in the order they are run
+    @param repeat: Number of runs of every stage
+    @return: Mapping of stage names to the best and the mean time of a run in seconds
+    """
+    times: Dict[str, List[float]] = {name: [] for name, _ in stages}
+    for _ in range(repeat):
+        for name, function in stages:
+            start = time.perf_counter()
+            function()
+            times[name].append(time.perf_counter() - start)
+    return {name: {"best": min(runs), "mean": statistics.mean(runs)} for name, runs in times.items()}
+
+
+def _parse(file: File) -> File:
+    """
+    Compute all lazily computed representations of a file
+    @param file: File to be parsed
+    @return: The same file
+    """
+    _ = file.ast, file.xml, file.tokens, file.lines, file.line_starts
+    return file
+
+
+def _evaluate(linter: Linter, paths: Sequence[pathlib.Path]) -> int:
+    """
+    Lint files without building their violations
+    @param linter: Linter with all files loaded
+    @param paths: Paths of the files
+    @return: Number of matched lines
+    """
+    return sum(len(list(linter.lint_file(path))) for path in paths)
+
+
+def _report(linter: Linter, paths: Sequence[pathlib.Path]) -> int:
+    """
+    Lint files and format their violations as the CLI does
+    @param linter: Linter with all files loaded
+    @param paths: Paths of the files
+    @return: Number of violations
+    """
+    report = [
+        f"{violation.path}:{violation.lineno}\t{violation.rule.name}: {violation.rule.description}"
+        for path in paths
+        for violation in linter.file_violations(path)
+    ]
+    return len(report)
+
+
+def benchmark_rule_set(corpus: Corpus, rule_set: str, repeat: int) -> Dict[str, Any]:
+    """
+    Benchmark all stages of linting a corpus by a rule set
+    @param corpus: Corpus to be linted
+    @param rule_set: Name of the rule set from RULE_SETS
+    @param repeat: Number of runs of every stage
+    @return: Results of the rule set
+    """
+    config = RULE_SETS[rule_set]
+    rules: List[Rule] = load_config(io.StringIO(config))
+    paths = list(FileDiscovery(rules).walk(corpus.directory))
+
+    # Files are kept parsed by the FileManager, so the evaluation and reporting stages measure no I/O and parsing
+    xml_omissions = rules_xml_omissions(rules)
+    file_manager = FileManager(None, xml_omissions=xml_omissions)
+    for path in paths:
+        _parse(file_manager.get(path))
+    linter = Linter(file_manager, rules)
+    expr_linters = {
+        expr_type: Linter(file_manager, [rule for rule in rules if type(rule.expr).__name__ == expr_type])
+        for expr_type in sorted({type(rule.expr).__name__ for rule in rules})
+    }
+
+    stages: List[Stage] = [
+        ("config_load", lambda: load_config(io.StringIO(config))),
+        ("discovery", lambda: list(FileDiscovery(rules).walk(corpus.directory))),
+        (
+            "file_construction",
+            lambda: [_parse(File(path.read_bytes(), path.name, xml_omissions=xml_omissions)) for path in paths],
+        ),
+    ]
+    stages.extend(
+        (f"evaluation.{expr_type}", functools.partial(_evaluate, expr_linter, paths))
+        for expr_type, expr_linter in expr_linters.items()
+    )
+    stages.append(("reporting", lambda: _report(linter, paths)))
+
+    return {
+        "rules": len(rules),
+        "files": len(paths),
+        "violations": _report(linter, paths),
+        "stages": _measure(stages, repeat),
+    }
+
+
+def run_benchmarks(corpus: Corpus, rule_sets: Sequence[str], repeat: int) -> Dict[str, Any]:
+    """
+    Benchmark linting a corpus by rule sets
+    @param corpus: Corpus to be linted
+    @param rule_sets: Names of rule sets from RULE_SETS
+    @param repeat: Number of runs of every stage
+    @return: JSON serializable results
+    """
+    return {
+        "format": RESULTS_FORMAT,
+        "navel": navel_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {"files": corpus.files, "lines_per_file": corpus.lines_per_file, "seed": corpus.seed},
+        "repeat": repeat,
+        "rule_sets": {rule_set: benchmark_rule_set(corpus, rule_set, repeat) for rule_set in rule_sets},
+    }
+
+
+def compare_results(baseline: Dict[str, Any], results: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Find stages which got slower than in a baseline run
+    @param baseline: Results of the baseline run
+    @param results: Results of the current run
+    @param tolerance: Allowed relative slowdown, e.g. 0.1 for 10 %
+    @return: Descriptions of the regressions, empty when there are none
+    """
+    regressions = []
+    for rule_set, rule_set_results in results["rule_sets"].items():
+        baseline_stages = baseline.get("rule_sets", {}).get(rule_set, {}).get("stages", {})
+        for stage, times in rule_set_results["stages"].items():
+            if stage not in baseline_stages:
+                continue
+            baseline_best = baseline_stages[stage]["best"]
+            if times["best"] > baseline_best * (1 + tolerance):
+                regressions.append(
+                    f"{rule_set}/{stage}: {times['best'] * 1000:.2f} ms, baseline {baseline_best * 1000:.2f} ms"
+                )
+    return regressions
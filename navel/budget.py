@@ -0,0 +1,98 @@
+"""
+Module limiting time spent by evaluating rules on files
+
+Regex matching checks for signals while it runs, so an evaluation on the main thread of a Unix process is interrupted
+once its budget runs out. XPath evaluation does not return control until it finishes, such evaluations and evaluations
+on other platforms and threads are found to be over budget only after they finish. Either way their results are dropped.
+"""
+
+import contextlib
+import dataclasses
+import pathlib
+import signal
+import threading
+import time
+from types import FrameType
+from typing import Iterator, Optional
+
+from navel.errors import EvaluationTimeoutError
+
+
+@dataclasses.dataclass(frozen=True)
+class TimeBudget:
+    """
+    Time budgets of evaluations of rules
+    """
+
+    # Seconds an evaluation of a rule on a file may take, None for no limit
+    rule_seconds: Optional[float] = None
+    # Seconds evaluations of all rules on a file may take together, None for no limit
+    file_seconds: Optional[float] = None
+    # Number of timeouts of a rule after which the rule is disabled for the rest of the run, None to never disable it
+    max_timeouts: Optional[int] = None
+
+    def file_deadline(self) -> Optional[float]:
+        """
+        Get deadline of evaluations of rules on a file whose linting starts now
+        @return: Time of `time.perf_counter` by which the file has to be linted, None for no limit
+        """
+        return None if self.file_seconds is None else time.perf_counter() + self.file_seconds
+
+    def seconds(self, file_deadline: Optional[float]) -> Optional[float]:
+        """
+        Get budget of the next evaluation of a rule on a file
+        @param file_deadline: Time of `time.perf_counter` by which the file has to be linted, None for no limit
+        @return: Seconds the evaluation may take, None for no limit
+        """
+        if file_deadline is None:
+            return self.rule_seconds
+        remaining = file_deadline - time.perf_counter()
+        return remaining if self.rule_seconds is None else min(self.rule_seconds, remaining)
+
+
+@dataclasses.dataclass(frozen=True)
+class Timeout:
+    """
+    Evaluation of a rule on a file which ran out of its time budget
+    """
+
+    path: pathlib.Path
+    rule: str
+    # Budget of the evaluation in seconds
+    seconds: float
+    # The budget of the whole file ran out, so rules after the rule have not been evaluated on the file
+    file_budget: bool = False
+    # The rule has timed out too many times and is disabled for the rest of the run
+    disabled: bool = False
+
+
+def _interrupt(_signum: int, _frame: Optional[FrameType]) -> None:
+    raise EvaluationTimeoutError()
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Limit time spent in a block, the block is interrupted when possible
+    @raise EvaluationTimeoutError: When the block takes longer than allowed
+    @param seconds: Seconds the block may take, None for no limit
+    """
+    if seconds is None:
+        yield
+        return
+    if seconds <= 0:
+        raise EvaluationTimeoutError()
+
+    interruptible = hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    start = time.perf_counter()
+    if interruptible:
+        previous = signal.signal(signal.SIGALRM, _interrupt)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        if interruptible:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    if time.perf_counter() - start > seconds:
+        raise EvaluationTimeoutError()
@@ -0,0 +1,206 @@
+"""
+Module converting ASTs to XML trees searched by XPath expressions
+
+The trees are the same as the trees of pyastgrep, so rules written for bellybutton and pyastgrep keep working.
+A tree is serialized to a string and parsed by lxml at once, which is much faster than creating its elements
+one by one. Lines are read from the `lineno` attributes of the elements, so no mapping of elements back to AST nodes
+is kept, and fields and attributes no rule refers to can be omitted.
+"""
+
+import ast
+import dataclasses
+import re
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Type
+
+import lxml.etree
+import pyastgrep.asts
+
+# Names of types of AST nodes which name their elements, abstract types such as `slice` are never instantiated
+# and their names are names of fields
+_NODE_TYPES = {
+    name: value for name, value in vars(ast).items() if isinstance(value, type) and issubclass(value, ast.AST)
+}
+_FIELD_NAMES = frozenset(
+    field for value in _NODE_TYPES.values() for field in value._fields  # pylint: disable=protected-access
+)
+NODE_TAGS = frozenset(
+    name for name, value in _NODE_TYPES.items() if name not in _FIELD_NAMES or not value.__subclasses__()
+)
+
+# Types of AST nodes with a `lineno` field which are not positioned, their elements are on the line of their parents
+UNPOSITIONED_NODE_TYPES = frozenset(("TypeIgnore",))
+
+# Name of elements of literal items of lists
+LITERAL_ITEM = "item"
+
+# Characters which have to be escaped in text and attributes, whitespace would be normalized by the parser otherwise
+TEXT_SPECIAL = re.compile(r"[&<>\r]")
+ATTRIBUTE_SPECIAL = re.compile(r'[&<>"\n\r\t]')
+
+TEXT_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ("\r", "&#13;"))
+ATTRIBUTE_ESCAPES = TEXT_ESCAPES + (('"', "&quot;"), ("\n", "&#10;"), ("\t", "&#9;"))
+
+# Parser of the serialized trees, trees deeper than the parser allows even so are created element by element
+PARSER = lxml.etree.XMLParser(huge_tree=True, resolve_entities=False)
+
+
+@dataclasses.dataclass(frozen=True)
+class XmlOmissions:
+    """
+    Parts of XML trees omitted as no rule refers to them
+    """
+
+    # Names of fields whose elements are omitted together with their subtrees
+    fields: FrozenSet[str] = frozenset()
+    # Names of attributes with positions omitted from elements of AST nodes, lines are read from `lineno` though
+    attributes: FrozenSet[str] = frozenset()
+
+
+def _encoded_literal(literal: Any) -> str:
+    """
+    Encode a literal value of an AST field as text of XML, the same way pyastgrep does
+    @param literal: Value of the field
+    @return: Encoded value without characters not allowed in XML
+    """
+    if isinstance(literal, (bool, int, float)):
+        return str(literal)
+    if literal is None:
+        return ""
+    if isinstance(literal, bytes):
+        literal = literal.decode("utf-8", errors="replace")
+    if isinstance(literal, str):
+        return pyastgrep.asts.illegal_xml_chars_re.sub("", literal).encode("utf-8", "replace").decode("utf-8")
+    return repr(literal)
+
+
+def _escape(value: str, special: "re.Pattern[str]", escapes: Tuple[Tuple[str, str], ...]) -> str:
+    """
+    Escape text or a value of an attribute of XML
+    @param value: Value to escape
+    @param special: Pattern of characters to be escaped
+    @param escapes: Characters and their escapes, `&` first
+    @return: Escaped value
+    """
+    if special.search(value) is None:
+        return value
+    for char, escape in escapes:
+        value = value.replace(char, escape)
+    return value
+
+
+class _Serializer:
+    """
+    Serializer of ASTs to strings of XML
+    """
+
+    def __init__(self, omissions: XmlOmissions):
+        self._omissions: XmlOmissions = omissions
+        self._position: Tuple[str, ...] = tuple(
+            attribute for attribute in ("lineno", "col_offset") if attribute not in omissions.attributes
+        )
+        self._fields: Dict[Type[ast.AST], Tuple[str, ...]] = {}
+        # Parsed empty elements have no text node, unlike the empty literal items of pyastgrep
+        self.empty_items: bool = False
+
+    def _node_fields(self, node_type: Type[ast.AST]) -> Tuple[str, ...]:
+        """
+        Get fields of a type of AST nodes which are not omitted
+        @param node_type: Type of AST nodes
+        @return: Names of the fields
+        """
+        try:
+            return self._fields[node_type]
+        except KeyError:
+            fields = tuple(
+                name
+                for name in node_type._fields  # pylint: disable=protected-access
+                if name not in self._omissions.fields
+            )
+            self._fields[node_type] = fields
+            return fields
+
+    def serialize(self, node: ast.AST, out: List[str]) -> None:
+        """
+        Serialize an AST node and its descendants
+        @param node: AST node to serialize
+        @param out: Parts of the serialized string
+        """
+        append = out.append
+        tag = type(node).__name__
+        # Attributes are set in the same order as by pyastgrep, the type of the last literal field is kept
+        attributes: Dict[str, str] = {}
+        for attribute in self._position:
+            value = getattr(node, attribute, None)
+            if value is not None:
+                attributes[attribute] = str(value)
+
+        fields = [(name, getattr(node, name, None)) for name in self._node_fields(type(node))]
+        for name, value in fields:
+            if value is not None and not isinstance(value, (ast.AST, list)):
+                attributes["type"] = type(value).__name__
+                attributes[name] = _escape(_encoded_literal(value), ATTRIBUTE_SPECIAL, ATTRIBUTE_ESCAPES)
+
+        append(f"<{tag}")
+        for name, value in attributes.items():
+            append(f' {name}="{value}"')
+        append(">")
+        for name, value in fields:
+            if isinstance(value, ast.AST):
+                append(f"<{name}>")
+                self.serialize(value, out)
+                append(f"</{name}>")
+            elif isinstance(value, list):
+                append(f"<{name}>")
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        self.serialize(item, out)
+                    else:
+                        literal = _escape(_encoded_literal(item), TEXT_SPECIAL, TEXT_ESCAPES)
+                        self.empty_items = self.empty_items or not literal
+                        append(f"<{LITERAL_ITEM}>{literal}</{LITERAL_ITEM}>")
+                append(f"</{name}>")
+        append(f"</{tag}>")
+
+
+def ast_to_xml(node: ast.AST, omissions: XmlOmissions = XmlOmissions()) -> lxml.etree._Element:
+    """
+    Convert an AST to an XML tree
+    @param node: Root of the AST
+    @param omissions: Fields and attributes to omit from the tree
+    @return: Root element of the tree
+    """
+    out: List[str] = []
+    serializer = _Serializer(omissions)
+    serializer.serialize(node, out)
+    try:
+        root: lxml.etree._Element = lxml.etree.fromstring("".join(out), PARSER)
+    except lxml.etree.XMLSyntaxError:
+        # The whole tree is a superset of the tree with omissions, so all expressions select the same elements
+        return pyastgrep.asts.ast_to_xml(node, {})
+
+    if serializer.empty_items:
+        for item in root.iter(LITERAL_ITEM):
+            if item.text is None:
+                item.text = ""
+    return root
+
+
+def element_line(element: lxml.etree._Element) -> Optional[int]:
+    """
+    Get line of an element of an AST node, nodes without a position are on the line of their closest positioned
+    ancestor, as with pyastgrep
+    @param element: Element of the tree
+    @return: Line number, None when the element is not an element of an AST node or has no positioned ancestor
+    """
+    if element.tag not in NODE_TAGS:
+        return None
+
+    # Elements of AST nodes and of their fields alternate in the tree
+    node: Optional[lxml.etree._Element] = element
+    while node is not None:
+        lineno = node.get("lineno")
+        if lineno is not None and node.tag not in UNPOSITIONED_NODE_TYPES:
+            return int(lineno)
+        field = node.getparent()
+        node = None if field is None else field.getparent()
+    return None
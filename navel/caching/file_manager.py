@@ -3,44 +3,349 @@ Module handling files and their caching
 """
 
 import ast
+import bisect
+import collections
 import dataclasses
+import functools
+import itertools
+import mmap
+import os
 import pathlib
+import re
 import tokenize
-from typing import Dict, List
+from typing import Callable, FrozenSet, List, Optional, Set, Union
 
 import lxml.etree
-import pyastgrep.asts
 import pyastgrep.files
 
+from navel.budget import Timeout
+from navel.caching.ast_xml import XmlOmissions, ast_to_xml
+from navel.constants import DEFAULT_MAX_ENTRIES
+from navel.profiling import STAGE_AST_TO_XML, STAGE_PARSE, STAGE_READ, STAGE_TOKENIZE, Profiler, measure_stage
+
+# Source of file contents - function reading contents of a file at a path
+FileSource = Callable[[pathlib.Path], bytes]
+
+# Contents of a file, either read into memory or memory-mapped
+FileContent = Union[bytes, mmap.mmap]
+
+# Tokens which are not code, lines with only these tokens are blank or hold only comments
+NON_CODE_TOKENS = frozenset(
+    (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER)
+)
+
+# Markers one of which is present in every ignore comment, files without them do not need to be tokenized
+IGNORE_COMMENT_MARKERS = (b"navel:", b"bb:")
+
+# Markers of generated files searched for in the first `GENERATED_HEADER_SIZE` bytes of files
+GENERATED_MARKERS = re.compile(rb"@generated\b|DO NOT EDIT|Generated by the protocol buffer compiler")
+GENERATED_HEADER_SIZE = 1024
+
+# Bytes which are not plain ASCII text, information separators are whitespace only in strings
+NON_ASCII = re.compile(rb"[\x1c-\x1f\x80-\xff]")
+# Lines with their line breaks, only line breaks counted by the tokenizer and the parser split lines, unlike in
+# `str.splitlines` which splits lines also on form feeds and other separators
+LINES_WITH_ENDS = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+\Z")
+ASCII_LINE_BREAKS = re.compile(rb"\r\n|\r|\n")
+
+# Number of bytes of memory-mapped files copied at once when counting their lines
+LINE_COUNT_CHUNK = 1024 * 1024
+
+
+def read_file(path: pathlib.Path, mmap_min_size: Optional[int] = None) -> FileContent:
+    """
+    Read contents of a file, large files are memory-mapped instead
+    @param path: Path to the file
+    @param mmap_min_size: Size in bytes from which files are memory-mapped, None to read all files into memory
+    @return: Contents of the file
+    """
+    with path.open("rb") as file:
+        if mmap_min_size is not None and os.fstat(file.fileno()).st_size >= mmap_min_size:
+            try:
+                return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass
+        return file.read()
+
 
 @dataclasses.dataclass
 class File:
     """
     Class caching opened and parsed file
+
+    The decoded contents, AST, XML tree and tokens are computed lazily on first access and memoized.
+    Memory-mapped contents are copied into `content_bytes` only when needed, regex rules scan them in place when they
+    are plain ASCII text, as the offsets of their bytes are the offsets of the decoded characters then.
+    The `ast` property is defined last as it shadows the `ast` module in annotations of the class body.
     """
 
-    def __init__(self, file_bin: bytes, file_name: str):
-        file_str, file_ast = pyastgrep.files.parse_python_file(file_bin, file_name, auto_dedent=False)
-        ast_xml_mapping: Dict[lxml.etree._Element, ast.AST] = {}
-        file_xml = pyastgrep.asts.ast_to_xml(file_ast, ast_xml_mapping)
-        lines = iter(file_str.splitlines(True))
-        file_tkn = list(tokenize.generate_tokens(lambda: next(lines)))
+    def __init__(
+        self,
+        file_bin: FileContent,
+        file_name: str,
+        profiler: Optional[Profiler] = None,
+        xml_omissions: XmlOmissions = XmlOmissions(),
+    ):
+        self.content_buffer: FileContent = file_bin
+        self.file_name: str = file_name
+        self._profiler: Optional[Profiler] = profiler
+        self._xml_omissions: XmlOmissions = xml_omissions
+        self._node_types: Optional[FrozenSet[str]] = None
+
+    @functools.cached_property
+    def content_bytes(self) -> bytes:
+        """
+        Get the file contents, memory-mapped contents are copied into memory
+        @return: File contents
+        """
+        buffer = self.content_buffer
+        return buffer if isinstance(buffer, bytes) else buffer[:]
+
+    @functools.cached_property
+    def ascii_mapping(self) -> Optional[mmap.mmap]:
+        """
+        Get memory-mapped file contents which can be scanned in place, that is plain ASCII text
+        @return: Memory-mapped contents, None when the contents are in memory or not plain ASCII text
+        """
+        buffer = self.content_buffer
+        if isinstance(buffer, bytes) or NON_ASCII.search(buffer) is not None:
+            return None
+        return buffer
+
+    @property
+    def size(self) -> int:
+        """
+        Get size of the file
+        @return: Size in bytes
+        """
+        return len(self.content_buffer)
+
+    @functools.cached_property
+    def line_count(self) -> int:
+        """
+        Get number of lines of the file, counted by line feeds without decoding the file
+        @return: Number of lines, a last line without a line feed is counted too
+        """
+        buffer = self.content_buffer
+        size = len(buffer)
+        line_feeds = sum(
+            buffer[start : start + LINE_COUNT_CHUNK].count(b"\n") for start in range(0, size, LINE_COUNT_CHUNK)
+        )
+        return line_feeds + int(size > 0 and buffer[size - 1 : size] != b"\n")
+
+    @functools.cached_property
+    def generated(self) -> bool:
+        """
+        Cheaply check whether the file is generated by looking for a marker in its header
+        @return: True when the header of the file marks it as generated
+        """
+        return GENERATED_MARKERS.search(self.content_buffer[:GENERATED_HEADER_SIZE]) is not None
+
+    @functools.cached_property
+    def content_str(self) -> str:
+        """
+        Get the file contents decoded using the encoding declared in the file
+        @return: Decoded file contents
+        """
+        with measure_stage(self._profiler, STAGE_READ):
+            return self.content_bytes.decode(pyastgrep.files.get_encoding(self.content_bytes))
+
+    @functools.cached_property
+    def _lines_with_ends(self) -> List[str]:
+        return LINES_WITH_ENDS.findall(self.content_str)
 
-        self.ast: ast.AST = file_ast
-        self.xml: lxml.etree._Element = file_xml
-        self.ast_xml_mapping: Dict[lxml.etree._Element, ast.AST] = ast_xml_mapping
-        self.content_bytes: bytes = file_bin
-        self.content_str: str = file_str
-        self.tokens: List[tokenize.TokenInfo] = file_tkn
+    @functools.cached_property
+    def lines(self) -> List[str]:
+        """
+        Get lines of the decoded file contents without line breaks
+        @return: List of lines
+        """
+        return [line.rstrip("\r\n") for line in self._lines_with_ends]
+
+    @functools.cached_property
+    def line_starts(self) -> List[int]:
+        """
+        Get offsets of the first characters of all lines in the decoded file contents
+        @return: List of offsets, the first line starts at the offset 0
+        """
+        mapping = self.ascii_mapping
+        if mapping is not None:
+            size = len(mapping)
+            return [0, *(end for end in (match.end() for match in ASCII_LINE_BREAKS.finditer(mapping)) if end < size)]
+        return [0, *itertools.accumulate(len(line) for line in self._lines_with_ends[:-1])]
+
+    def line(self, lineno: int) -> str:
+        """
+        Get a line of the decoded file contents
+        @param lineno: Line number, numbers past the end of the file get the last line
+        @return: The line without its line break, empty string for an empty file
+        """
+        mapping = self.ascii_mapping
+        if mapping is not None:
+            starts = self.line_starts
+            index = min(lineno, len(starts)) - 1
+            end = starts[index + 1] if index + 1 < len(starts) else len(mapping)
+            return mapping[starts[index] : end].decode("ascii").rstrip("\r\n")
+
+        lines = self.lines
+        return lines[min(lineno, len(lines)) - 1] if lines else ""
+
+    def line_number(self, offset: int) -> int:
+        """
+        Get number of the line containing a character of the decoded file contents
+        @param offset: Offset of the character
+        @return: Line number, the first line has the number 1
+        """
+        return bisect.bisect_right(self.line_starts, offset)
+
+    @functools.cached_property
+    def xml(self) -> lxml.etree._Element:
+        """
+        Get XML tree of the file AST, lines of elements are resolved by `element_line`
+        @return: Root element of the XML tree
+        """
+        file_ast = self.ast
+        with measure_stage(self._profiler, STAGE_AST_TO_XML):
+            return ast_to_xml(file_ast, self._xml_omissions)
+
+    @functools.cached_property
+    def tokens(self) -> List[tokenize.TokenInfo]:
+        """
+        Get tokens of the file
+        @return: List of tokens
+        """
+        lines = iter(self._lines_with_ends)
+        with measure_stage(self._profiler, STAGE_TOKENIZE):
+            return list(tokenize.generate_tokens(lambda: next(lines)))
+
+    @functools.cached_property
+    def code_lines(self) -> FrozenSet[int]:
+        """
+        Get numbers of lines holding code, that is lines with anything else than comments and whitespace
+        @return: Set of line numbers, all lines when the file can not be tokenized
+        """
+        try:
+            tokens = self.tokens
+        except (tokenize.TokenError, SyntaxError):
+            return frozenset(range(1, len(self.lines) + 1))
+
+        lines: Set[int] = set()
+        for token in tokens:
+            if token.type not in NON_CODE_TOKENS:
+                lines.update(range(token.start[0], token.end[0] + 1))
+        return frozenset(lines)
+
+    @functools.cached_property
+    def may_contain_ignore_comments(self) -> bool:
+        """
+        Cheaply check whether the file may contain an ignore comment
+        @return: False when the file certainly contains no ignore comments, True otherwise
+        """
+        return any(self.content_buffer.find(marker) != -1 for marker in IGNORE_COMMENT_MARKERS)
+
+    @property
+    def node_types(self) -> FrozenSet[str]:
+        """
+        Get names of types of all AST nodes in the file, collected when the AST is created
+        @raise SyntaxError: When the file is not a valid Python code
+        @return: Set of names of node types
+        """
+        if self._node_types is None:
+            _ = self.ast
+        return self._node_types or frozenset()
+
+    @functools.cached_property
+    def ast(self) -> ast.AST:
+        """
+        Get AST of the file
+        @raise SyntaxError: When the file is not a valid Python code
+        @return: AST of the file
+        """
+        with measure_stage(self._profiler, STAGE_PARSE):
+            file_ast = ast.parse(self.content_bytes, self.file_name)
+            self._node_types = frozenset(type(node).__name__ for node in ast.walk(file_ast))
+        return file_ast
+
+
+@dataclasses.dataclass
+class FileManagerStats:
+    """
+    Counters of FileManager cache operations and of rules skipped on files read by it
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    # Evaluations of XPath rules skipped as the files lacked the node types the rules require
+    skipped_rules: int = 0
+    # Files over the size limits or generated which were linted by regex rules only or not linted at all
+    regex_only_files: int = 0
+    skipped_files: int = 0
+    # Evaluations of rules which ran out of their time budgets
+    timeouts: List[Timeout] = dataclasses.field(default_factory=list)
+
+    def merge(self, other: "FileManagerStats") -> None:
+        """
+        Add counters of other stats to these
+        @param other: Stats to be added
+        """
+        self.hits += other.hits
+        self.misses += other.misses
+        self.evictions += other.evictions
+        self.skipped_rules += other.skipped_rules
+        self.regex_only_files += other.regex_only_files
+        self.skipped_files += other.skipped_files
+        self.timeouts.extend(other.timeouts)
 
 
 class FileManager:
     """
-    Class caching all files that have been read and parsed
+    Class caching files that have been read and parsed
+
+    At most `max_entries` files are kept, least recently used files are evicted first. Files of at least
+    `mmap_min_size` bytes are memory-mapped, which is left to short runs as a mapped file must not be truncated.
     """
 
-    def __init__(self) -> None:
-        self._files: Dict[pathlib.Path, File] = {}
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+        profiler: Optional[Profiler] = None,
+        source: Optional[FileSource] = None,
+        xml_omissions: XmlOmissions = XmlOmissions(),
+        mmap_min_size: Optional[int] = None,
+    ) -> None:
+        self._files: "collections.OrderedDict[pathlib.Path, File]" = collections.OrderedDict()
+        self._max_entries: Optional[int] = max_entries
+        self.stats: FileManagerStats = FileManagerStats()
+        self.profiler: Optional[Profiler] = profiler
+        self.source: Optional[FileSource] = source
+        self._xml_omissions: XmlOmissions = xml_omissions
+        self.mmap_min_size: Optional[int] = mmap_min_size
+
+    @property
+    def max_entries(self) -> Optional[int]:
+        """
+        Get maximal number of cached files
+        @return: Maximal number of cached files, None when unbounded
+        """
+        return self._max_entries
+
+    @property
+    def xml_omissions(self) -> XmlOmissions:
+        """
+        Get parts of XML trees omitted from the files
+        @return: Omitted fields and attributes
+        """
+        return self._xml_omissions
+
+    def set_xml_omissions(self, xml_omissions: XmlOmissions) -> None:
+        """
+        Set parts of XML trees omitted from the files, cached files are dropped when the omissions change
+        @param xml_omissions: Omitted fields and attributes
+        """
+        if xml_omissions != self._xml_omissions:
+            self._xml_omissions = xml_omissions
+            self._files.clear()
 
     def get(self, path: pathlib.Path) -> File:
         """
@@ -49,7 +354,35 @@ class FileManager:
         @return: Cached file object
         """
         try:
-            return self._files[path]
+            file = self._files[path]
         except KeyError:
-            self._files[path] = File(path.read_bytes(), path.name)
-            return self._files[path]
+            self.stats.misses += 1
+            with measure_stage(self.profiler, STAGE_READ):
+                file_bin = read_file(path, self.mmap_min_size) if self.source is None else self.source(path)
+            file = File(file_bin, path.name, self.profiler, self._xml_omissions)
+            self._files[path] = file
+            if self._max_entries is not None:
+                while len(self._files) > self._max_entries:
+                    self._files.popitem(last=False)
+                    self.stats.evictions += 1
+            return file
+
+        self.stats.hits += 1
+        self._files.move_to_end(path)
+        return file
+
+    def release(self, path: pathlib.Path) -> None:
+        """
+        Remove a file from the cache once it is not needed anymore
+        @param path: Path to the file
+        """
+        self._files.pop(path, None)
+
+    def reset_stats(self) -> FileManagerStats:
+        """
+        Reset the counters of cache operations
+        @return: Counters before the reset
+        """
+        stats = self.stats
+        self.stats = FileManagerStats()
+        return stats
@@ -0,0 +1,147 @@
+"""
+Module reading files in background threads ahead of the files being parsed and linted
+"""
+
+import collections
+import concurrent.futures
+import pathlib
+import threading
+from typing import Deque, Dict, Generator, Iterable, Iterator, Optional, Tuple
+
+# Number of threads reading files in advance
+PREFETCH_THREADS = 4
+
+# Maximal number of files read in advance regardless of their sizes
+PREFETCH_FILES = 64
+
+
+class Prefetcher:  # pylint: disable=too-many-instance-attributes
+    """
+    Iterable of paths whose files are read ahead by a pool of threads, and the source of their contents
+
+    Files are read while the files before them are parsed and linted, so the CPU does not idle waiting for slow
+    storage. Files reserve their sizes in the budget of `max_bytes` in the order they are consumed in, so contents read
+    in advance never take more than the budget and the next file to be consumed is never waiting for files after it.
+    Only a file larger than the whole budget is read once it is the next one to be consumed. Contents of a path which
+    have not been taken are dropped once the next path is requested. The paths can be iterated only once.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[pathlib.Path],
+        max_bytes: int,
+        threads: int = PREFETCH_THREADS,
+        max_files: int = PREFETCH_FILES,
+    ):
+        self._paths: Iterable[pathlib.Path] = paths
+        self._max_bytes: int = max_bytes
+        self._threads: int = threads
+        self._max_files: int = max_files
+        self._contents: Dict[pathlib.Path, bytes] = {}
+        self._condition: threading.Condition = threading.Condition()
+        self._buffered_bytes: int = 0
+        self._next_index: int = 0
+        self._reserving_index: int = 0
+        self._closed: bool = False
+        self.peak_bytes: int = 0
+
+    def _read(self, index: int, path: pathlib.Path) -> None:
+        """
+        Read a file once the files before it have reserved their sizes and its contents fit into the budget,
+        files which can not be read are left to the consumer
+        @param index: Position of the path among the iterated paths
+        @param path: Path to the file
+        """
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = 0
+
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._closed
+                or index == self._reserving_index
+                and (index == self._next_index or self._buffered_bytes + size <= self._max_bytes)
+            )
+            if self._closed:
+                return
+            self._reserving_index += 1
+            self._buffered_bytes += size
+            self.peak_bytes = max(self.peak_bytes, self._buffered_bytes)
+            self._condition.notify_all()
+
+        try:
+            content: Optional[bytes] = path.read_bytes()
+        except OSError:
+            content = None
+
+        with self._condition:
+            self._buffered_bytes -= size
+            if content is not None and not self._closed:
+                self._contents[path] = content
+                self._buffered_bytes += len(content)
+            self._condition.notify_all()
+
+    def _take(self, path: pathlib.Path) -> Optional[bytes]:
+        """
+        Take prefetched contents of a file and return their bytes to the budget
+        @param path: Path to the file
+        @return: Contents of the file, None when the file has not been prefetched
+        """
+        with self._condition:
+            content = self._contents.pop(path, None)
+            if content is not None:
+                self._buffered_bytes -= len(content)
+                self._condition.notify_all()
+        return content
+
+    def _consume(
+        self, index: int, path: pathlib.Path, future: "concurrent.futures.Future[None]"
+    ) -> Generator[pathlib.Path, None, None]:
+        """
+        Wait for a file to be read and yield its path, its contents are dropped when the consumer asks for the next one
+        @param index: Position of the path among the iterated paths
+        @param path: Path to the file
+        @param future: Future of reading the file
+        @return: Generator of the path
+        """
+        with self._condition:
+            self._next_index = index
+            self._condition.notify_all()
+        future.result()
+        yield path
+        self._take(path)
+
+    def __iter__(self) -> Iterator[pathlib.Path]:
+        pending: Deque[Tuple[int, pathlib.Path, "concurrent.futures.Future[None]"]] = collections.deque()
+        executor = concurrent.futures.ThreadPoolExecutor(self._threads, thread_name_prefix="navel-prefetch")
+        try:
+            for index, path in enumerate(self._paths):
+                pending.append((index, path, executor.submit(self._read, index, path)))
+                if len(pending) >= self._max_files:
+                    yield from self._consume(*pending.popleft())
+            while pending:
+                yield from self._consume(*pending.popleft())
+        finally:
+            self.close()
+            for _, _, future in pending:
+                future.cancel()
+            executor.shutdown()
+
+    def close(self) -> None:
+        """
+        Stop reading files ahead and drop contents which have been read in advance
+        """
+        with self._condition:
+            self._closed = True
+            self._contents.clear()
+            self._condition.notify_all()
+
+    def __call__(self, path: pathlib.Path) -> bytes:
+        """
+        Get contents of a file, files which have not been prefetched are read directly
+        @param path: Path to the file
+        @return: Contents of the file
+        """
+        content = self._take(path)
+        return path.read_bytes() if content is None else content
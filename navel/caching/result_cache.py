@@ -0,0 +1,186 @@
+"""
+Module handling the persistent on-disk cache of linting results
+"""
+
+import hashlib
+import importlib.metadata
+import json
+import mmap
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+from typing import Iterable, List, Optional, Tuple, Union
+
+from navel.models import Rule
+
+RESULTS_DIRECTORY = "results"
+
+# Maximal size of all cached results in bytes, least recently used results are evicted first
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Eviction removes entries until the cache fits into this fraction of the maximal size
+PRUNE_RATIO = 0.8
+
+# Minimal number of seconds between two checks of the size of the cache, a check takes a stat of every entry
+PRUNE_INTERVAL = 60 * 60
+# File in the cache directory whose modification time is the time of the last check
+PRUNE_MARKER = "results.pruned"
+
+# Violations as stored in the cache - name of the rule, line number and the line itself
+CachedViolation = Tuple[str, int, str]
+
+
+def navel_version() -> str:
+    """
+    Get version of the installed Navel package
+    @return: Version of Navel
+    """
+    try:
+        return importlib.metadata.version("navel")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def rules_fingerprint(rules: Iterable[Rule]) -> str:
+    """
+    Get fingerprint of a rule set, any change to rule names, expressions or settings changes the fingerprint
+    @param rules: Rules to fingerprint
+    @return: Hex digest identifying the rule set
+    """
+    digest = hashlib.sha256(navel_version().encode("utf-8"))
+    for rule in sorted(rules, key=lambda x: x.name):
+        digest.update(f"\0{rule.name}\0{rule.expr!r}\0{rule.settings!r}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def clear_cache(directory: pathlib.Path) -> None:
+    """
+    Remove all cached results
+    @param directory: Cache directory
+    """
+    shutil.rmtree(directory / RESULTS_DIRECTORY, ignore_errors=True)
+    try:
+        (directory / PRUNE_MARKER).unlink()
+    except OSError:
+        pass
+
+
+class ResultCache:
+    """
+    Class caching violations of files keyed by the file contents and the rules applied to it
+
+    Every entry is a separate file written atomically, so the cache can be shared by concurrently running processes.
+    """
+
+    def __init__(self, directory: pathlib.Path, rules: Iterable[Rule], max_size: int = DEFAULT_MAX_SIZE):
+        self._directory: pathlib.Path = directory
+        self._results_directory: pathlib.Path = directory / RESULTS_DIRECTORY
+        self._namespace: pathlib.Path = self._results_directory / rules_fingerprint(rules)[:32]
+        self._max_size: int = max_size
+
+    @staticmethod
+    def key(content: Union[bytes, mmap.mmap], rules: Iterable[Rule]) -> str:
+        """
+        Get cache key of a file
+        @param content: Contents of the file
+        @param rules: Rules applied to the file
+        @return: Cache key
+        """
+        digest = hashlib.sha256(content)
+        for rule in rules:
+            digest.update(f"\0{rule.name}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        return self._namespace / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[CachedViolation]]:
+        """
+        Get cached violations
+        @param key: Cache key of the file
+        @return: List of cached violations or None when not cached
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with entry_path.open("r", encoding="utf-8") as entry:
+                violations = json.load(entry)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+        return [(str(rule_name), int(lineno), str(line)) for rule_name, lineno, line in violations]
+
+    def put(self, key: str, violations: List[CachedViolation]) -> None:
+        """
+        Store violations in the cache, failures to write are ignored
+        @param key: Cache key of the file
+        @param violations: List of violations to be cached
+        """
+        entry_path = self._entry_path(key)
+        try:
+            self._ensure_directory()
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=entry_path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(file_descriptor, "w", encoding="utf-8") as entry:
+                    json.dump(violations, entry)
+                os.replace(temp_path, entry_path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError:
+            return
+
+    def _ensure_directory(self) -> None:
+        """
+        Create the cache directory and keep it out of version control
+        """
+        if self._directory.exists():
+            return
+        self._directory.mkdir(parents=True, exist_ok=True)
+        (self._directory / ".gitignore").write_text("# Created by Navel automatically\n*\n")
+
+    def prune(self, interval: float = PRUNE_INTERVAL) -> None:
+        """
+        Evict least recently used entries when the cache exceeds its maximal size, checked once per interval at most
+        @param interval: Minimal number of seconds since the last check, 0 to check the size now
+        """
+        if not self._results_directory.exists():
+            return
+        marker = self._directory / PRUNE_MARKER
+        try:
+            if time.time() - marker.stat().st_mtime < interval:
+                return
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return
+        # The marker is touched first, so concurrently finishing runs do not all walk the cache
+        try:
+            marker.touch()
+        except OSError:
+            return
+
+        entries: List[Tuple[float, int, str]] = []
+        for root, _, file_names in os.walk(self._results_directory):
+            for file_name in file_names:
+                entry_path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self._max_size:
+            return
+
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self._max_size * PRUNE_RATIO:
+                break
+            try:
+                os.unlink(entry_path)
+            except OSError:
+                continue
+            total_size -= size
@@ -0,0 +1,177 @@
+"""
+Module handling the persistent on-disk cache of compiled rule sets
+"""
+
+import hashlib
+import hmac
+import os
+import pathlib
+import pickle
+import platform
+import shutil
+import tempfile
+from typing import List, Optional
+
+from navel.caching.result_cache import navel_version
+from navel.models import Rule
+
+RULES_DIRECTORY = "rules"
+
+# Maximal number of cached rule sets, the least recently used ones are evicted first
+DEFAULT_MAX_RULE_SETS = 8
+
+# File with the secret key of the user cache entries are signed with, kept in the cache directory of the user
+SECRET_KEY_FILE = "rule_cache.key"
+SECRET_KEY_SIZE = 32
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+
+def user_cache_directory() -> pathlib.Path:
+    """
+    Get cache directory of Navel shared by all projects of the user
+    @return: Path of the directory
+    """
+    return pathlib.Path(os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache", "navel")
+
+
+def user_secret_key() -> Optional[bytes]:
+    """
+    Get secret key of the user, a new key is created when there is none
+    @return: Secret key, None when it can be neither read nor created
+    """
+    path = user_cache_directory() / SECRET_KEY_FILE
+    try:
+        key = path.read_bytes()
+        if len(key) == SECRET_KEY_SIZE:
+            return key
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return None
+
+    # Keys of processes creating them concurrently replace each other, entries signed by a replaced key are just missed
+    key = os.urandom(SECRET_KEY_SIZE)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as key_file:
+                key_file.write(key)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        return None
+    return key
+
+
+def config_key(content: bytes, path: pathlib.Path) -> str:
+    """
+    Get cache key of a config
+    @param content: Contents of the config file
+    @param path: Path of the config file as it is loaded, globs of the rules are relative to it
+    @return: Cache key
+    """
+    digest = hashlib.sha256(f"{navel_version()}\0{platform.python_version()}\0{path}\0".encode("utf-8"))
+    digest.update(content)
+    return digest.hexdigest()
+
+
+class RuleCache:
+    """
+    Class caching rule sets loaded from configs, so unchanged configs are neither parsed nor validated again
+
+    Rule sets are stored pickled, every entry is a separate file written atomically. The cache directory belongs to
+    the project, so entries are signed by the secret key of the user and only entries with a valid signature are
+    unpickled, anyone able to write to the project can not plant an entry running code when it is loaded.
+    """
+
+    def __init__(
+        self, directory: pathlib.Path, max_rule_sets: int = DEFAULT_MAX_RULE_SETS, secret_key: Optional[bytes] = None
+    ):
+        self._directory: pathlib.Path = directory
+        self._rules_directory: pathlib.Path = directory / RULES_DIRECTORY
+        self._max_rule_sets: int = max_rule_sets
+        self._secret_key: Optional[bytes] = user_secret_key() if secret_key is None else secret_key
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        return self._rules_directory / f"{key}.pickle"
+
+    def _signature(self, key: str, data: bytes) -> bytes:
+        if self._secret_key is None:
+            raise ValueError("Rule cache has no secret key")
+        return hmac.new(self._secret_key, key.encode("utf-8") + b"\0" + data, hashlib.sha256).digest()
+
+    def get(self, key: str) -> Optional[List[Rule]]:
+        """
+        Get a cached rule set
+        @param key: Cache key of the config
+        @return: List of rules or None when not cached
+        """
+        if self._secret_key is None:
+            return None
+        entry_path = self._entry_path(key)
+        try:
+            content = entry_path.read_bytes()
+        except OSError:
+            return None
+        signature, data = content[:SIGNATURE_SIZE], content[SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, self._signature(key, data)):
+            return None
+
+        try:
+            rules = pickle.loads(data)
+            os.utime(entry_path)
+        except (OSError, EOFError, AttributeError, ImportError, IndexError, TypeError, ValueError, pickle.PickleError):
+            return None
+        if not isinstance(rules, list) or not all(isinstance(rule, Rule) for rule in rules):
+            return None
+        return rules
+
+    def put(self, key: str, rules: List[Rule]) -> None:
+        """
+        Store a rule set in the cache, failures to write are ignored
+        @param key: Cache key of the config
+        @param rules: Rules loaded from the config
+        """
+        if self._secret_key is None:
+            return
+        entry_path = self._entry_path(key)
+        try:
+            data = pickle.dumps(rules, protocol=pickle.HIGHEST_PROTOCOL)
+            if not self._directory.exists():
+                self._directory.mkdir(parents=True, exist_ok=True)
+                (self._directory / ".gitignore").write_text("# Created by Navel automatically\n*\n")
+            self._rules_directory.mkdir(exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=self._rules_directory, suffix=".tmp")
+            try:
+                with os.fdopen(file_descriptor, "wb") as entry:
+                    entry.write(self._signature(key, data))
+                    entry.write(data)
+                os.replace(temp_path, entry_path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except (OSError, pickle.PickleError):
+            return
+        self.prune()
+
+    def prune(self) -> None:
+        """
+        Evict least recently used rule sets when the cache holds more than the maximal number of them
+        """
+        try:
+            entries = sorted(self._rules_directory.glob("*.pickle"), key=lambda x: x.stat().st_mtime, reverse=True)
+        except OSError:
+            return
+        for entry_path in entries[self._max_rule_sets :]:
+            entry_path.unlink(missing_ok=True)
+
+
+def clear_rule_cache(directory: pathlib.Path) -> None:
+    """
+    Remove all cached rule sets
+    @param directory: Cache directory
+    """
+    shutil.rmtree(directory / RULES_DIRECTORY, ignore_errors=True)
@@ -1,22 +1,59 @@
 """
 CLI module
+
+Modules linting is done by import heavy dependencies, so they are imported only by the commands using them.
 """
+# pylint: disable=import-outside-toplevel,too-many-lines
 
+import itertools
+import json
 import os
 import pathlib
 import subprocess
 import sys
-import textwrap
-from typing import Generator, Iterable, List, Tuple
+import tempfile
+import time
+from typing import TYPE_CHECKING, Callable, Generator, Iterable, List, Optional, TextIO, Tuple, cast
 
 import click
 
-from navel.caching.file_manager import FileManager
+from navel.budget import TimeBudget
+from navel.constants import (
+    BENCHMARK_RULE_SETS,
+    CACHE_DIRECTORY,
+    CONFIG_FILE_BELLYBUTTON,
+    CONFIG_FILE_NAVEL,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_MAX_ENTRIES,
+    JOBS_AUTO,
+    MIB,
+    MMAP_MIN_SIZE,
+    OUTPUT_FORMAT_TEXT,
+    OUTPUT_FORMATS,
+    POLL_INTERVAL,
+)
+from navel.daemon_client import COMMAND_STATUS, COMMAND_STOP, request_lint, send_request, socket_path
 from navel.errors import NavelError
+from navel.formatters import FORMATTERS, Formatter, ReportedViolation, format_text
 from navel.initialization import generate_config
-from navel.linter import Linter
-from navel.models import LintingViolation, Rule
-from navel.parsing import load_config_file
+from navel.profiling import DEFAULT_TOP, Profiler
+
+if TYPE_CHECKING:
+    from navel.baseline import Baseline
+    from navel.budget import Timeout
+    from navel.caching.file_manager import FileManager, FileManagerStats
+    from navel.caching.prefetch import Prefetcher
+    from navel.caching.result_cache import ResultCache
+    from navel.git import ChangedLines, RevisionSource
+    from navel.models import LintingViolation, Rule
+    from navel.revisions import LintFunction
+    from navel.watch import WatchDelta, WatchSession
+
+PROFILE_FORMAT_JSON = "json"
+PROFILE_FORMAT_CHROME_TRACE = "chrome-trace"
+
+# Maximal time in seconds to wait for a detached daemon to start accepting connections
+DAEMON_START_TIMEOUT = 10.0
 
 
 @click.group()
@@ -26,20 +63,6 @@ def cli() -> None:
     """
 
 
-def walk_python_files(root_dir: pathlib.Path) -> Iterable[pathlib.Path]:
-    """
-    Get all Python files in a directory and it's subdirectories
-    @param root_dir:
-    @return:
-    """
-    return (
-        pathlib.Path(os.path.join(root, file_name))
-        for root, _, file_names in os.walk(root_dir)
-        for file_name in file_names
-        if os.path.splitext(file_name)[-1] == ".py"
-    )
-
-
 def get_git_modified(project_directory: pathlib.Path) -> Iterable[pathlib.Path]:
     """
     Get list of modified files in a directory based on GIT
@@ -72,33 +95,48 @@ def get_git_modified(project_directory: pathlib.Path) -> Iterable[pathlib.Path]:
     )
 
 
-def rules_violations(filepaths: List[pathlib.Path], rules: List[Rule]) -> Generator[LintingViolation, None, None]:
+def rules_violations(  # pylint: disable=too-many-arguments
+    filepaths: Iterable[pathlib.Path],
+    rules: List["Rule"],
+    jobs: int = 1,
+    result_cache: Optional["ResultCache"] = None,
+    file_manager: Optional["FileManager"] = None,
+    budget: Optional["TimeBudget"] = None,
+) -> Generator["LintingViolation", None, None]:
     """
     Yield all violations of rules provided
-    @param filepaths: List of files to lint
+    @param filepaths: Files to lint, consumed lazily
     @param rules: List of rules to lint by
+    @param jobs: Maximal number of worker processes to lint with
+    @param result_cache: Cache of linting results, None to disable caching
+    @param file_manager: FileManager to read files with, a new one is created when not provided
+    @param budget: Time budgets of evaluations of rules, None for no limits
     @return: Generator with all violations of provided rules
     """
-    failures = 0
+    from navel.caching.file_manager import FileManager
+    from navel.linter import Linter
+    from navel.parallel import MIN_FILES_PER_JOB, effective_jobs, parallel_rules_violations
 
-    file_manager = FileManager()
-    linter = Linter(file_manager, rules)
+    if file_manager is None:
+        file_manager = FileManager()
 
-    for filepath in filepaths:
-        linting_results = list(linter.lint_file(filepath))
-        if len(linting_results) == 0:
-            continue
+    # Only a limited amount of files is taken in advance to decide whether parallel linting is worth it
+    paths = iter(filepaths)
+    first_paths = list(itertools.islice(paths, jobs * MIN_FILES_PER_JOB))
+    filepaths = itertools.chain(first_paths, paths)
 
-        file_contents = file_manager.get(filepath).content_str
-        for failure in linting_results:
-            failures += 1
-            lines = file_contents.splitlines()
-            yield LintingViolation(
-                path=filepath,
-                lineno=failure[1],
-                line=lines[min(failure[1], len(lines)) - 1] if lines else "",
-                rule=failure[0],
-            )
+    jobs = effective_jobs(jobs, len(first_paths))
+    if jobs > 1:
+        yield from parallel_rules_violations(filepaths, rules, jobs, result_cache, file_manager, budget)
+    else:
+        linter = Linter(file_manager, rules, result_cache, budget)
+
+        for filepath in filepaths:
+            yield from linter.file_violations(filepath)
+            file_manager.release(filepath)
+
+    if result_cache is not None:
+        result_cache.prune()
 
 
 @cli.command()
@@ -134,8 +172,8 @@ def init(project_directory: pathlib.Path, force: bool, bellybutton: bool) -> Non
     @param force: Force init even when config file already exists
     @param bellybutton: Init as a bellybutton config file instead of Navel
     """
-    config_file_bellybutton = project_directory / ".bellybutton.yml"
-    config_file_navel = project_directory / ".navel.yml"
+    config_file_bellybutton = project_directory / CONFIG_FILE_BELLYBUTTON
+    config_file_navel = project_directory / CONFIG_FILE_NAVEL
 
     if not force:
         if config_file_bellybutton.exists():
@@ -156,6 +194,431 @@ def init(project_directory: pathlib.Path, force: bool, bellybutton: bool) -> Non
         config_file_navel.write_text(config)
 
 
+def git_changes(
+    project_directory: pathlib.Path, commit_range: Optional[str]
+) -> Tuple["ChangedLines", Optional["RevisionSource"]]:
+    """
+    Get changed lines of a project and the source of the changed files
+    @raise click.ClickException: When the changes can not be read from git
+    @param project_directory: Path of the project
+    @param commit_range: Commit range to get changes of, None for changes of the working tree since the merge base
+    with the default branch
+    @return: Changed lines and the source reading files from the head of the commit range, None for the working tree
+    """
+    from navel.git import ChangedLines, RevisionSource, changed_lines, commit_range_head, diff_base
+
+    try:
+        if commit_range is None:
+            return ChangedLines(changed_lines(project_directory, [diff_base(project_directory)])), None
+        source = RevisionSource(project_directory, commit_range_head(commit_range))
+        return ChangedLines(changed_lines(project_directory, [commit_range])), source
+    except NavelError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+
+def changed_lines_violations(  # pylint: disable=too-many-arguments
+    filepaths: Iterable[pathlib.Path],
+    rules: List["Rule"],
+    changed: "ChangedLines",
+    jobs: int,
+    result_cache: Optional["ResultCache"],
+    file_manager: "FileManager",
+    budget: Optional["TimeBudget"] = None,
+) -> Generator["LintingViolation", None, None]:
+    """
+    Yield violations of rules on changed lines only
+
+    Violations of AST-based rules are reported on lines with code only, so files whose changed lines hold only
+    comments and whitespace are linted only by regex rules and are not parsed at all.
+    @param filepaths: Files to lint
+    @param rules: List of rules to lint by
+    @param changed: Changed lines of the files
+    @param jobs: Maximal number of worker processes to lint with
+    @param result_cache: Cache of linting results, None to disable caching
+    @param file_manager: FileManager to read files with
+    @param budget: Time budgets of evaluations of rules, None for no limits
+    @return: Generator with violations on the changed lines
+    """
+    from navel.yaml_expr.regex import RegExExpr
+
+    code_paths: List[pathlib.Path] = []
+    comment_paths: List[pathlib.Path] = []
+    for path in filepaths:
+        if not changed.changed(path):
+            continue
+        if changed.any_of(path, file_manager.get(path).code_lines):
+            code_paths.append(path)
+        else:
+            comment_paths.append(path)
+            file_manager.release(path)
+
+    text_rules = [rule for rule in rules if isinstance(rule.expr, RegExExpr)]
+    violations = itertools.chain(
+        rules_violations(code_paths, rules, jobs, result_cache, file_manager, budget),
+        rules_violations(comment_paths, text_rules, jobs, result_cache, file_manager, budget),
+    )
+    yield from (violation for violation in violations if changed.contains(violation.path, violation.lineno))
+
+
+def lint_revision(  # pylint: disable=too-many-arguments
+    project_directory: pathlib.Path,
+    revision: str,
+    baseline_revision: Optional[str],
+    rules: List["Rule"],
+    lint_function: "LintFunction",
+    max_cached_files: int,
+    profiler: Optional[Profiler],
+    formatter: Formatter,
+) -> Tuple[int, int, "FileManagerStats"]:
+    """
+    Lint files as they are in a git revision and write their violations
+    @raise click.ClickException: When the files can not be read from git
+    @param project_directory: Path of the project
+    @param revision: Revision to lint
+    @param baseline_revision: Revision whose violations are not written, None to write all violations
+    @param rules: List of rules to lint by
+    @param lint_function: Function linting files read by a FileManager
+    @param max_cached_files: Maximal number of parsed files kept in memory at once
+    @param profiler: Profiler to measure the run with, None to disable profiling
+    @param formatter: Formatter to write the violations with
+    @return: Number of violations, number of linted files and counters of the file caches
+    """
+    from navel.revisions import RevisionLinter
+
+    revision_linter = RevisionLinter(project_directory, rules, lint_function, max_cached_files, profiler)
+    try:
+        failures = report_violations(
+            (
+                revision_linter.violations(revision)
+                if baseline_revision is None
+                else revision_linter.new_violations(revision, baseline_revision)
+            ),
+            formatter,
+        )
+    except NavelError as exc:
+        raise click.ClickException(str(exc)) from exc
+    return failures, revision_linter.files_count, revision_linter.stats
+
+
+def prefetch_paths(
+    filepaths: Iterable[pathlib.Path], file_manager: "FileManager", prefetch_memory: int, jobs: int
+) -> Tuple[Iterable[pathlib.Path], Optional["Prefetcher"]]:
+    """
+    Read files ahead of linting them in background threads, the FileManager gets the contents read in advance
+    @param filepaths: Files to lint
+    @param file_manager: FileManager the files are read by
+    @param prefetch_memory: MiB of file contents read in advance, 0 to disable reading ahead
+    @param jobs: Number of worker processes to lint with
+    @return: Files to lint and the Prefetcher reading them, None when files are not read ahead
+    """
+    from navel.caching.prefetch import Prefetcher
+
+    # Worker processes read their files themselves and revisions are read from a single git process
+    if prefetch_memory == 0 or jobs > 1 or file_manager.source is not None:
+        return filepaths, None
+
+    prefetcher = Prefetcher(filepaths, prefetch_memory * MIB)
+    file_manager.source = prefetcher
+    return prefetcher, prefetcher
+
+
+def load_baseline(
+    project_directory: pathlib.Path, baseline_file: pathlib.Path, rules: List["Rule"], write: bool
+) -> "Baseline":
+    """
+    Create the baseline of accepted violations of a project
+    @raise click.ClickException: When the baseline file can not be read
+    @param project_directory: Path of the project, paths in the baseline are relative to it
+    @param baseline_file: Path of the baseline file
+    @param rules: List of rules to lint by
+    @param write: Create an empty baseline to be written instead of loading it
+    @return: Baseline
+    """
+    from navel.baseline import Baseline
+
+    baseline = Baseline(project_directory, rules)
+    if not write:
+        try:
+            baseline.load(baseline_file)
+        except NavelError as exc:
+            raise click.ClickException(str(exc)) from exc
+    return baseline
+
+
+def baseline_paths(
+    filepaths: Iterable[pathlib.Path], baseline: "Baseline", file_manager: "FileManager", write: bool
+) -> Generator[pathlib.Path, None, None]:
+    """
+    Yield files to lint with a baseline, files unchanged since the baseline was written are skipped without parsing
+    @param filepaths: Files of the project
+    @param baseline: Baseline of accepted violations
+    @param file_manager: FileManager to read files with
+    @param write: Record hashes of all files in the baseline instead of skipping unchanged files
+    @return: Generator of files to lint
+    """
+    for path in filepaths:
+        content = file_manager.get(path).content_bytes
+        if write:
+            baseline.record(path, content)
+        elif baseline.unchanged(path, content):
+            file_manager.release(path)
+            continue
+        yield path
+
+
+def echo_baseline(baseline: "Baseline", baseline_file: pathlib.Path, write: bool, err: bool = False) -> None:
+    """
+    Write the baseline file or print how many violations and files have been matched by the baseline
+    @param baseline: Baseline of accepted violations
+    @param baseline_file: Path of the baseline file
+    @param write: Write the baseline to the baseline file
+    @param err: Print to the standard error output
+    """
+    if write:
+        baseline.dump(baseline_file)
+        click.echo(f"Baseline with {baseline.violations_count} violations written to `{baseline_file}`", err=err)
+    else:
+        click.echo(
+            f"Baseline: {baseline.matched_violations} accepted violations, {baseline.skipped_files} unchanged files",
+            err=err,
+        )
+
+
+def load_project_rules(project_directory: pathlib.Path, use_cache: bool = True) -> List["Rule"]:
+    """
+    Load rules from the config file of a project
+    @raise click.ClickException: When the config file is missing or invalid
+    @param project_directory: Path of the project
+    @param use_cache: Reuse rules of an unchanged config from the cache of the project
+    @return: List of rules
+    """
+    from navel.parsing import load_config_file, project_config_file
+
+    try:
+        config_file = project_config_file(project_directory)
+    except NavelError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+    try:
+        return load_config_file(config_file, project_directory / CACHE_DIRECTORY if use_cache else None)
+    except NavelError as exc:
+        raise click.ClickException(repr(exc)) from exc
+    except IOError as exc:
+        raise click.ClickException(f"Can not read from config file `{config_file}`") from exc
+
+
+def project_rules_loader(project_directory: pathlib.Path) -> Callable[[], List["Rule"]]:
+    """
+    Get loader of rules of a project, used by commands reloading the rules as the config file changes
+    @param project_directory: Path of the project
+    @return: Function loading the rules, raising NavelError or OSError when the config file is missing or invalid
+    """
+    from navel.parsing import load_config_file, project_config_file
+
+    return lambda: load_config_file(project_config_file(project_directory), project_directory / CACHE_DIRECTORY)
+
+
+def echo_violation(failure: "ReportedViolation", project_directory: pathlib.Path, verbose: bool) -> None:
+    """
+    Print a linting violation
+    @param failure: Violation to print
+    @param project_directory: Path of the project, paths are printed relative to it
+    @param verbose: Print verbose description of the violation
+    """
+    click.echo(format_text(failure, os.path.relpath(failure.path, project_directory), verbose))
+
+
+def report_violations(
+    violations: Iterable["LintingViolation"],
+    formatter: Formatter,
+    baseline: Optional["Baseline"] = None,
+    write_baseline: bool = False,
+) -> int:
+    """
+    Write violations not accepted in a baseline
+    @param violations: Violations to report
+    @param formatter: Formatter to write the violations with
+    @param baseline: Baseline of accepted violations, None to print all violations
+    @param write_baseline: Accept all violations into the baseline instead of printing them
+    @return: Number of written violations
+    """
+    if baseline is not None and write_baseline:
+        for violation in violations:
+            baseline.add(violation)
+        return 0
+
+    failures = 0
+    for failure in violations if baseline is None else baseline.filter(violations):
+        failures += 1
+        formatter.write(failure)
+    return failures
+
+
+def echo_summary(  # pylint: disable=too-many-arguments
+    rules_count: int,
+    files_count: int,
+    failures: int,
+    err: bool = False,
+    skipped_files: int = 0,
+    regex_only_files: int = 0,
+    timeouts: int = 0,
+) -> None:
+    """
+    Print summary of a lint run
+    @param rules_count: Number of rules
+    @param files_count: Number of linted files
+    @param failures: Number of violations
+    @param err: Print to the standard error output
+    @param skipped_files: Number of generated or large files no rule has been applied to
+    @param regex_only_files: Number of generated or large files linted by regex rules only
+    @param timeouts: Number of evaluations of rules which ran out of their time budgets
+    """
+    guarded = (
+        (f", {skipped_files} file{'' if skipped_files == 1 else 's'} skipped" if skipped_files else "")
+        + (f", {regex_only_files} linted by regex rules only" if regex_only_files else "")
+        + (f", {timeouts} timeout{'' if timeouts == 1 else 's'}" if timeouts else "")
+    )
+    click.echo(
+        click.style(
+            f'Linting {"failed" if failures else "succeeded"} ('
+            f'{rules_count} rule{"" if rules_count == 1 else "s"}, '
+            f'{files_count} file{"" if files_count == 1 else "s"}, '
+            f'{failures} violation{"" if failures == 1 else "s"}'
+            f"{guarded}).",
+            fg="bright_green" if failures == 0 else "bright_red",
+        ),
+        err=err,
+    )
+
+
+def echo_stats(stats: "FileManagerStats", project_directory: pathlib.Path, verbose: bool, err: bool) -> None:
+    """
+    Print counters of a lint run and evaluations of rules which ran out of their time budgets, timeouts are always
+    printed to the standard error output
+    @param stats: Counters of the file caches and the timeouts
+    @param project_directory: Path of the project, paths are printed relative to it
+    @param verbose: Print the counters
+    @param err: Print the counters to the standard error output
+    """
+    if verbose:
+        click.echo(f"File cache: {stats.hits} hits, {stats.misses} misses, {stats.evictions} evictions", err=err)
+        click.echo(f"Rules skipped on files without their node types: {stats.skipped_rules}", err=err)
+
+    for timeout in stats.timeouts:
+        budget = "the time budget of the file" if timeout.file_budget else "its time budget"
+        message = (
+            f"{os.path.relpath(timeout.path, project_directory)}: rule {timeout.rule} exceeded {budget} "
+            f"of {timeout.seconds:g} s"
+        )
+        if timeout.file_budget:
+            message += ", rules after it were not evaluated on the file"
+        if timeout.disabled:
+            message += ", the rule is disabled for the rest of the run"
+        click.echo(click.style(message, fg="yellow"), err=True)
+
+
+def start_formatter(output_format: str, output: str, project_directory: pathlib.Path, verbose: bool) -> Formatter:
+    """
+    Open the output and start writing violations to it, the output file is truncated, so all checks must pass before
+    @param output_format: Format of the violations
+    @param output: File to write the violations to, `-` for the standard output
+    @param project_directory: Path of the project, paths are written relative to it
+    @param verbose: Write verbose descriptions of the violations
+    @return: Started formatter, the output is closed with the click context
+    """
+    stream = cast(TextIO, click.open_file(output, "w", encoding="utf-8"))
+    click.get_current_context().call_on_close(stream.close)
+    formatter = FORMATTERS[output_format](stream, project_directory, verbose)
+    formatter.start()
+    return formatter
+
+
+def lint_by_daemon(  # pylint: disable=too-many-arguments
+    project_directory: pathlib.Path,
+    files: Optional[List[pathlib.Path]],
+    respect_gitignore: bool,
+    output_format: str,
+    output: str,
+    verbose: bool,
+) -> bool:
+    """
+    Lint files by the daemon of the project and write the results
+    @param project_directory: Path of the project
+    @param files: Files to lint, None to lint all files in the project
+    @param respect_gitignore: Skip files ignored by .gitignore files when searching for files to lint
+    @param output_format: Format of the violations
+    @param output: File to write the violations to, `-` for the standard output
+    @param verbose: Enable verbose output
+    @return: False when no daemon is running or it could not lint the files and nothing has been written
+    """
+    result = request_lint(project_directory, files, respect_gitignore)
+    if result is None:
+        return False
+
+    formatter = start_formatter(output_format, output, project_directory, verbose)
+    for failure in result.violations:
+        formatter.write(failure)
+    formatter.finish()
+    if verbose:
+        click.echo(
+            f"Linted by the daemon listening on `{socket_path(project_directory)}`", err=formatter.machine_readable
+        )
+    echo_summary(
+        result.rules,
+        result.files,
+        len(result.violations),
+        formatter.machine_readable,
+        result.skipped_files,
+        result.regex_only_files,
+    )
+    sys.exit(1 if result.violations else 0)
+
+
+def write_profile(profiler: Profiler, top: Optional[int], output: Optional[pathlib.Path], output_format: str) -> None:
+    """
+    Print the profile of a run and write it to a file
+    @param profiler: Profiler with the measurements of the run
+    @param top: Number of the slowest rules and files printed, None to not print the profile
+    @param output: File to write the profile to, None to not write it
+    @param output_format: Format of the file
+    """
+    if top is not None:
+        for line in profiler.report(top):
+            click.echo(line, err=True)
+    if output is not None:
+        output.write_text(profiler.dumps(output_format == PROFILE_FORMAT_CHROME_TRACE) + "\n", encoding="utf-8")
+
+
+def check_lint_options(  # pylint: disable=too-many-arguments
+    partial: bool,
+    rev: Optional[str],
+    baseline_file: Optional[pathlib.Path],
+    write_baseline: bool,
+    budget: Optional[TimeBudget],
+    max_rule_timeouts: Optional[int],
+) -> None:
+    """
+    Check that options of the lint command can be combined
+    @raise click.UsageError: When the options can not be combined
+    @param partial: Only some files of the project are linted
+    @param rev: Revision to lint
+    @param baseline_file: File with the baseline of accepted violations
+    @param write_baseline: Write all violations to the baseline file
+    @param budget: Time budgets of evaluations of rules, None for no limit
+    @param max_rule_timeouts: Number of timeouts after which a rule is disabled, None to never disable rules
+    """
+    if rev is not None and partial:
+        raise click.UsageError(
+            "Option --rev can not be combined with --modified-only, --diff-lines, --commit-range or --files"
+        )
+    if baseline_file is not None and rev is not None:
+        raise click.UsageError("Option --baseline can not be combined with --rev or --baseline-rev")
+    if write_baseline and (baseline_file is None or partial):
+        raise click.UsageError("Option --write-baseline requires --baseline and all files of the project to be linted")
+    if max_rule_timeouts is not None and budget is None:
+        raise click.BadParameter("requires --rule-timeout or --file-timeout", param_hint="--max-rule-timeouts")
+
+
 @cli.command()
 @click.option(
     "--project-directory",
@@ -184,11 +647,158 @@ def init(project_directory: pathlib.Path, force: bool, bellybutton: bool) -> Non
     default=False,
 )
 @click.option("--files", "-f", help="Specifies exact files to be checked", multiple=True, required=False)
-def lint(
+@click.option(
+    "--jobs",
+    "-j",
+    help=f"Number of worker processes to lint with, `{JOBS_AUTO}` to use all available CPUs",
+    default="1",
+    show_default=True,
+)
+@click.option(
+    "--no-cache",
+    help=f"Do not use and update the cache of linting results and rule sets in `{CACHE_DIRECTORY}`",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--max-cached-files",
+    help="Maximal number of parsed files kept in memory at once by every process",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_ENTRIES,
+    show_default=True,
+)
+@click.option(
+    "--prefetch-memory",
+    help="MiB of file contents read in advance by background threads while linting in a single process, "
+    "0 disables reading ahead",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+)
+@click.option(
+    "--rule-timeout",
+    help="Seconds an evaluation of a rule on a file may take, slower evaluations are aborted and reported. "
+    "The daemon does not enforce time budgets, runs with a budget lint in this process",
+    type=click.FloatRange(min=0, min_open=True),
+)
+@click.option(
+    "--file-timeout",
+    help="Seconds evaluations of all rules on a file may take, rules left when it runs out are not evaluated. "
+    "The daemon does not enforce time budgets, runs with a budget lint in this process",
+    type=click.FloatRange(min=0, min_open=True),
+)
+@click.option(
+    "--max-rule-timeouts",
+    help="Number of timeouts after which a rule is disabled for the rest of the run by every process",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--no-gitignore",
+    help="Do not skip files ignored by .gitignore files when searching for files to lint",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--profile",
+    help="Print time spent in stages of linting and the slowest rules and files",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--profile-top",
+    help="Number of the slowest rules and files printed by --profile",
+    type=click.IntRange(min=1),
+    default=DEFAULT_TOP,
+    show_default=True,
+)
+@click.option(
+    "--profile-output",
+    help="File to write the profile to, implies profiling",
+    type=click.Path(dir_okay=False, writable=True, path_type=pathlib.Path),
+)
+@click.option(
+    "--profile-format",
+    help="Format of the --profile-output file, `chrome-trace` can be viewed in chrome://tracing or Perfetto",
+    type=click.Choice([PROFILE_FORMAT_JSON, PROFILE_FORMAT_CHROME_TRACE]),
+    default=PROFILE_FORMAT_JSON,
+    show_default=True,
+)
+@click.option(
+    "--no-daemon",
+    help="Lint in this process even when a daemon of the project is running",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--diff-lines",
+    help="Report only violations on lines changed since the merge base with the default branch or in --commit-range",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--commit-range",
+    help="Lint files changed in a commit range `base..head` as they are in the head revision, read from git",
+)
+@click.option(
+    "--rev",
+    help="Lint all files as they are in a git revision, read from git without checking the revision out",
+)
+@click.option(
+    "--baseline-rev",
+    help="Report only violations not present in a git revision, --rev defaults to HEAD",
+)
+@click.option(
+    "--baseline",
+    "baseline_file",
+    help="Report only violations not accepted in a baseline file, files unchanged since it was written are skipped",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "--write-baseline",
+    help="Accept all current violations by writing them to the --baseline file",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--format",
+    "output_format",
+    help="Format of the violations, all formats but text are streamed as violations are found",
+    type=click.Choice(OUTPUT_FORMATS),
+    default=OUTPUT_FORMAT_TEXT,
+    show_default=True,
+)
+@click.option(
+    "--output",
+    help="File to write the violations to instead of the standard output, other messages are printed as usual",
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+    default="-",
+)
+def lint(  # pylint: disable=too-many-arguments,too-many-locals,too-many-branches
     project_directory: pathlib.Path,
     modified_only: bool,
     verbose: bool,
     files: Tuple[str],
+    jobs: str,
+    no_cache: bool,
+    max_cached_files: int,
+    prefetch_memory: int,
+    rule_timeout: Optional[float],
+    file_timeout: Optional[float],
+    max_rule_timeouts: Optional[int],
+    no_gitignore: bool,
+    profile: bool,
+    profile_top: int,
+    profile_output: Optional[pathlib.Path],
+    profile_format: str,
+    no_daemon: bool,
+    diff_lines: bool,
+    commit_range: Optional[str],
+    rev: Optional[str],
+    baseline_rev: Optional[str],
+    baseline_file: Optional[pathlib.Path],
+    write_baseline: bool,
+    output_format: str,
+    output: str,
 ) -> None:
     """
     Lint files in a project directory
@@ -196,70 +806,503 @@ def lint(
     @param modified_only: Check only modified files based on GIT
     @param verbose: Enable verbose output
     @param files: List of files to lint. Lints all files in the project directory when empty.
+    @param jobs: Number of worker processes to lint with
+    @param no_cache: Disable the cache of linting results
+    @param max_cached_files: Maximal number of parsed files kept in memory at once
+    @param prefetch_memory: MiB of file contents read in advance, 0 to disable reading ahead
+    @param rule_timeout: Seconds an evaluation of a rule on a file may take, None for no limit
+    @param file_timeout: Seconds evaluations of all rules on a file may take, None for no limit
+    @param max_rule_timeouts: Number of timeouts after which a rule is disabled, None to never disable rules
+    @param no_gitignore: Lint also files ignored by .gitignore files
+    @param profile: Print the profile of the run
+    @param profile_top: Number of the slowest rules and files in the printed profile
+    @param profile_output: File to write the profile to
+    @param profile_format: Format of the profile file
+    @param no_daemon: Do not use the daemon of the project
+    @param diff_lines: Report only violations on changed lines
+    @param commit_range: Commit range whose changed files are linted as they are in its head revision
+    @param rev: Revision to lint
+    @param baseline_rev: Revision whose violations are not reported
+    @param baseline_file: File with the baseline of accepted violations
+    @param write_baseline: Write all violations to the baseline file instead of reporting them
+    @param output_format: Format of the violations
+    @param output: File to write the violations to, `-` for the standard output
     """
+    if baseline_rev is not None and rev is None:
+        rev = "HEAD"
+    budget = (
+        TimeBudget(rule_timeout, file_timeout, max_rule_timeouts)
+        if rule_timeout is not None or file_timeout is not None
+        else None
+    )
+    check_lint_options(
+        modified_only or diff_lines or commit_range is not None or len(files) != 0,
+        rev,
+        baseline_file,
+        write_baseline,
+        budget,
+        max_rule_timeouts,
+    )
+
+    # Messages are kept out of the standard output when it is read by tools
+    err = FORMATTERS[output_format].machine_readable
 
-    config_file_bellybutton = project_directory / ".bellybutton.yml"
-    config_file_navel = project_directory / ".navel.yml"
+    # The daemon is asked first, so runs served by it import none of the modules linting is done by
+    git_mode = diff_lines or commit_range is not None or rev is not None
+    # The daemon does not enforce time budgets
+    local_only = git_mode or baseline_file is not None or budget is not None
+    if not no_daemon and not profile and profile_output is None and not local_only:
+        daemon_files = (
+            (list(get_git_modified(project_directory)) if modified_only else None)
+            if len(files) == 0
+            else [pathlib.Path(f) for f in files]
+        )
+        lint_by_daemon(project_directory, daemon_files, not no_gitignore, output_format, output, verbose)
 
-    bellybutton = config_file_bellybutton.exists()
-    if not bellybutton and not config_file_navel.exists():
-        raise click.ClickException(f"Uninitialized `{project_directory}` - config file not found")
+    from navel.caching.file_manager import FileManager
+    from navel.caching.result_cache import ResultCache
+    from navel.discovery import FileDiscovery, PathStream
+    from navel.parallel import resolve_jobs
+    from navel.rule_set import PathMatcher, rules_xml_omissions
 
     try:
-        rules = load_config_file(config_file_bellybutton if bellybutton else config_file_navel)
+        jobs_count = resolve_jobs(jobs)
     except NavelError as exc:
-        raise click.ClickException(repr(exc)) from exc
-    except IOError as exc:
-        raise click.ClickException(
-            f"Can not read from config file `{config_file_bellybutton if bellybutton else config_file_navel}`"
-        ) from exc
-
-    filepaths: List[pathlib.Path] = (
-        list(get_git_modified(project_directory) if modified_only else walk_python_files(project_directory))
-        if len(files) == 0
-        else [pathlib.Path(f) for f in files]
+        raise click.BadParameter(str(exc), param_hint="--jobs") from exc
+
+    rules = load_project_rules(project_directory, use_cache=not no_cache)
+
+    result_cache = None if no_cache else ResultCache(project_directory / CACHE_DIRECTORY, rules)
+    profiler = (
+        Profiler(trace=profile_format == PROFILE_FORMAT_CHROME_TRACE) if profile or profile_output is not None else None
     )
 
-    failures = 0
-    for failure in rules_violations(filepaths, rules):
-        failures += 1
-        path = os.path.relpath(failure.path, project_directory)
-        lineno = failure.lineno
-        line = failure.line
-        rule = failure.rule
-
-        if verbose:
-            file_name = click.style(f"{path}:{lineno}", fg="bright_magenta", bold=True)
-            rule_name = click.style(rule.name, fg="bright_magenta", bold=True, underline=True)
-            example = (
-                f'{click.style("Example", bold=True)}:\n{rule.example.strip()}\n' if rule.example is not None else ""
+    if rev is not None:
+        formatter = start_formatter(output_format, output, project_directory, verbose)
+        failures, files_count, stats = lint_revision(
+            project_directory,
+            rev,
+            baseline_rev,
+            rules,
+            lambda paths, file_manager: rules_violations(paths, rules, jobs_count, result_cache, file_manager, budget),
+            max_cached_files,
+            profiler,
+            formatter,
+        )
+    else:
+        changed, source = git_changes(project_directory, commit_range) if git_mode else (None, None)
+        # Files no rule applies to are dropped before they are read
+        filepaths = PathStream(
+            PathMatcher(rules).plan(
+                (
+                    changed.paths
+                    if changed is not None
+                    else get_git_modified(project_directory)
+                    if modified_only
+                    else FileDiscovery(rules, respect_gitignore=not no_gitignore).walk(project_directory)
+                )
+                if len(files) == 0
+                else [pathlib.Path(f) for f in files]
             )
-            instead = (
-                f'{click.style("Instead", bold=True)}:\n{rule.instead.strip()}\n' if rule.instead is not None else ""
+        )
+        file_manager = FileManager(max_cached_files, profiler, source, rules_xml_omissions(rules), MMAP_MIN_SIZE)
+        baseline = (
+            None if baseline_file is None else load_baseline(project_directory, baseline_file, rules, write_baseline)
+        )
+        # Violations are written only once all options, the config and the baseline are known to be valid
+        formatter = start_formatter(output_format, output, project_directory, verbose)
+        planned_paths, prefetcher = prefetch_paths(filepaths, file_manager, prefetch_memory, jobs_count)
+        lint_paths = (
+            planned_paths if baseline is None else baseline_paths(planned_paths, baseline, file_manager, write_baseline)
+        )
+        try:
+            failures = report_violations(
+                (
+                    changed_lines_violations(lint_paths, rules, changed, jobs_count, result_cache, file_manager, budget)
+                    if diff_lines and changed is not None
+                    else rules_violations(lint_paths, rules, jobs_count, result_cache, file_manager, budget)
+                ),
+                formatter,
+                baseline,
+                write_baseline,
             )
+        finally:
+            if prefetcher is not None:
+                prefetcher.close()
+            if source is not None:
+                source.close()
+        files_count, stats = filepaths.count, file_manager.stats
 
-            click.echo(
-                textwrap.dedent(
-                    f"""
-                    {file_name}\t{rule_name}
-                    {click.style("Description", bold=True)}: {rule.description}
-                    {click.style("Line", bold=True)}:
-                    {line}
-                    {example}{instead}
-                """
-                ).lstrip()
-            )
-        else:
-            click.echo(f"{path}:{lineno}\t{rule.name}: {rule.description}")
+        if baseline is not None and baseline_file is not None and (write_baseline or verbose):
+            echo_baseline(baseline, baseline_file, write_baseline, err)
+    formatter.finish()
+
+    echo_stats(stats, project_directory, verbose, err)
+
+    if profiler is not None:
+        write_profile(profiler, profile_top if profile else None, profile_output, profile_format)
+
+    echo_summary(
+        len(rules), files_count, failures, err, stats.skipped_files, stats.regex_only_files, len(stats.timeouts)
+    )
+    sys.exit(1 if failures != 0 else 0)
+
+
+@cli.group()
+def cache() -> None:
+    """
+    Manage the cache of linting results and rule sets
+    """
+
+
+@cache.command()
+@click.option(
+    "--project-directory",
+    help="Path to the root directory of the project",
+    type=click.Path(
+        exists=True,
+        dir_okay=True,
+        file_okay=False,
+        writable=True,
+        readable=True,
+        path_type=pathlib.Path,
+    ),
+    default=pathlib.Path("."),
+)
+def clear(project_directory: pathlib.Path) -> None:
+    """
+    Remove all cached linting results and rule sets
+    @param project_directory: Path of the project to clear the cache of
+    """
+    from navel.caching.result_cache import clear_cache
+    from navel.caching.rule_cache import clear_rule_cache
+
+    clear_cache(project_directory / CACHE_DIRECTORY)
+    clear_rule_cache(project_directory / CACHE_DIRECTORY)
+
+
+@cli.command()
+@click.option("--files", help="Number of files of the generated corpus", type=click.IntRange(min=1), default=200)
+@click.option("--lines", help="Approximate number of lines of every file", type=click.IntRange(min=1), default=200)
+@click.option("--seed", help="Seed of the generated corpus", type=int, default=0)
+@click.option(
+    "--rule-set",
+    "rule_sets",
+    help="Rule set to benchmark, all rule sets are benchmarked when not specified",
+    type=click.Choice(BENCHMARK_RULE_SETS),
+    multiple=True,
+)
+@click.option("--repeat", help="Number of runs of every stage", type=click.IntRange(min=1), default=3)
+@click.option(
+    "--output",
+    help="File to write the JSON results to instead of the standard output",
+    type=click.Path(dir_okay=False, writable=True, path_type=pathlib.Path),
+)
+@click.option(
+    "--baseline",
+    help="JSON results of a previous run to compare with, fails when any stage got slower",
+    type=click.Path(exists=True, dir_okay=False, readable=True, path_type=pathlib.Path),
+)
+@click.option(
+    "--tolerance",
+    help="Allowed relative slowdown compared with the baseline",
+    type=click.FloatRange(min=0),
+    default=0.1,
+    show_default=True,
+)
+def bench(  # pylint: disable=too-many-arguments
+    files: int,
+    lines: int,
+    seed: int,
+    rule_sets: Tuple[str],
+    repeat: int,
+    output: Optional[pathlib.Path],
+    baseline: Optional[pathlib.Path],
+    tolerance: float,
+) -> None:
+    """
+    Benchmark linting stages on a generated corpus of Python files
+    @param files: Number of files of the corpus
+    @param lines: Approximate number of lines of every file
+    @param seed: Seed of the corpus
+    @param rule_sets: Names of rule sets to benchmark
+    @param repeat: Number of runs of every stage
+    @param output: File to write the results to
+    @param baseline: File with results to compare with
+    @param tolerance: Allowed relative slowdown
+    """
+    from navel.benchmark import compare_results, generate_corpus, run_benchmarks
+
+    with tempfile.TemporaryDirectory(prefix="navel-bench-") as directory:
+        corpus = generate_corpus(pathlib.Path(directory), files, lines, seed)
+        results = run_benchmarks(corpus, rule_sets or BENCHMARK_RULE_SETS, repeat)
+
+    results_json = json.dumps(results, indent=2)
+    if output is None:
+        click.echo(results_json)
+    else:
+        output.write_text(results_json + "\n", encoding="utf-8")
+
+    if baseline is not None:
+        regressions = compare_results(json.loads(baseline.read_text(encoding="utf-8")), results, tolerance)
+        for regression in regressions:
+            click.echo(click.style(f"Regression: {regression}", fg="bright_red"), err=True)
+        sys.exit(1 if regressions else 0)
+
+
+def echo_watch_delta(
+    delta: "WatchDelta", session: "WatchSession", project_directory: pathlib.Path, verbose: bool
+) -> None:
+    """
+    Print changes of violations of a watched project
+    @param delta: Changes of violations
+    @param session: Session of the watched project
+    @param project_directory: Path of the project, paths are printed relative to it
+    @param verbose: Print verbose description of the violations
+    """
+    if delta.rules_reloaded:
+        rules_count = len(session.rules)
+        click.echo(click.style(f'Rules reloaded ({rules_count} rule{"" if rules_count == 1 else "s"})', bold=True))
+    for error in delta.errors:
+        click.echo(click.style(error, fg="bright_red"), err=True)
+    for prefix, color, violations in (("-", "bright_green", delta.fixed), ("+", "bright_red", delta.new)):
+        for violation in violations:
+            click.echo(click.style(prefix, fg=color, bold=True) + " ", nl=False)
+            echo_violation(violation, project_directory, verbose)
 
+    violations_count = session.violations_count
     click.echo(
         click.style(
-            f'Linting {"failed" if failures else "succeeded"} ('
-            f'{len(rules)} rule{"" if len(rules) == 1 else "s"}, '
-            f'{len(filepaths)} file{"" if len(filepaths) == 1 else "s"}, '
-            f'{failures} violation{"" if failures == 1 else "s"}'
-            f").",
-            fg="bright_green" if failures == 0 else "bright_red",
+            f"{len(delta.new)} new, {len(delta.fixed)} fixed, {violations_count} "
+            f'violation{"" if violations_count == 1 else "s"} in {session.files_count} '
+            f'file{"" if session.files_count == 1 else "s"} '
+            f"({delta.linted_files} linted in {delta.seconds * 1000:.0f} ms).",
+            fg="bright_green" if violations_count == 0 else "bright_red",
         )
     )
-    sys.exit(1 if failures != 0 else 0)
+
+
+@cli.command()
+@click.option(
+    "--project-directory",
+    help="Path to the root directory of the project to be watched",
+    type=click.Path(
+        exists=True,
+        dir_okay=True,
+        file_okay=False,
+        readable=True,
+        path_type=pathlib.Path,
+    ),
+    default=pathlib.Path("."),
+)
+@click.option(
+    "--verbose",
+    "-v",
+    help="Enables verbose output",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--max-cached-files",
+    help="Maximal number of parsed files kept in memory at once",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_ENTRIES,
+    show_default=True,
+)
+@click.option(
+    "--no-gitignore",
+    help="Do not skip files ignored by .gitignore files",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--poll",
+    help="Detect changes by periodic rescanning instead of inotify",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--poll-interval",
+    help="Seconds between two rescans when detecting changes by rescanning",
+    type=click.FloatRange(min=0, min_open=True),
+    default=POLL_INTERVAL,
+    show_default=True,
+)
+def watch(  # pylint: disable=too-many-arguments
+    project_directory: pathlib.Path,
+    verbose: bool,
+    max_cached_files: int,
+    no_gitignore: bool,
+    poll: bool,
+    poll_interval: float,
+) -> None:
+    """
+    Lint files in a project directory and keep linting them as they change
+    @param project_directory: Path of the project to watch
+    @param verbose: Enable verbose output
+    @param max_cached_files: Maximal number of parsed files kept in memory at once
+    @param no_gitignore: Lint also files ignored by .gitignore files
+    @param poll: Detect changes by rescanning instead of inotify
+    @param poll_interval: Seconds between two rescans
+    """
+    from navel.watch import PollingWatcher, Watcher, WatchSession, create_watcher, watch_loop
+
+    load_project_rules(project_directory)
+    watcher: Watcher = PollingWatcher(poll_interval) if poll else create_watcher()
+    with watcher:
+        session = WatchSession(
+            project_directory,
+            project_rules_loader(project_directory),
+            watcher,
+            respect_gitignore=not no_gitignore,
+            max_cached_files=max_cached_files,
+        )
+        try:
+            watch_loop(session, watcher, lambda delta: echo_watch_delta(delta, session, project_directory, verbose))
+        except KeyboardInterrupt:
+            pass
+
+
+@cli.group()
+def daemon() -> None:
+    """
+    Manage the lint daemon of a project serving `navel lint` runs
+    """
+
+
+@daemon.command()
+@click.option(
+    "--project-directory",
+    help="Path to the root directory of the project",
+    type=click.Path(
+        exists=True,
+        dir_okay=True,
+        file_okay=False,
+        readable=True,
+        path_type=pathlib.Path,
+    ),
+    default=pathlib.Path("."),
+)
+@click.option(
+    "--idle-timeout",
+    help="Seconds without requests after which the daemon shuts down",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_IDLE_TIMEOUT,
+    show_default=True,
+)
+@click.option(
+    "--max-cached-files",
+    help="Maximal number of parsed files kept in memory at once",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_ENTRIES,
+    show_default=True,
+)
+@click.option(
+    "--detach",
+    help="Run the daemon in the background",
+    is_flag=True,
+    default=False,
+)
+def start(project_directory: pathlib.Path, idle_timeout: float, max_cached_files: int, detach: bool) -> None:
+    """
+    Start the lint daemon of a project
+    @param project_directory: Path of the project
+    @param idle_timeout: Seconds without requests after which the daemon shuts down
+    @param max_cached_files: Maximal number of parsed files kept in memory at once
+    @param detach: Run the daemon in the background
+    """
+    if detach:
+        subprocess.Popen(  # pylint: disable=consider-using-with
+            [
+                sys.executable,
+                "-m",
+                "navel",
+                "daemon",
+                "start",
+                "--project-directory",
+                str(project_directory),
+                "--idle-timeout",
+                str(idle_timeout),
+                "--max-cached-files",
+                str(max_cached_files),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + DAEMON_START_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                send_request(socket_path(project_directory), {"command": COMMAND_STATUS})
+            except NavelError:
+                time.sleep(0.05)
+            else:
+                click.echo(f"Daemon is listening on `{socket_path(project_directory)}`")
+                return
+        raise click.ClickException("Daemon has not started")
+
+    from navel.daemon import LintDaemon
+
+    # Globs of the rules are relative to the config file, they must be absolute as the daemon lints absolute paths
+    project_directory = project_directory.resolve()
+    load_project_rules(project_directory)
+    lint_daemon = LintDaemon(
+        project_directory,
+        project_rules_loader(project_directory),
+        idle_timeout,
+        max_cached_files,
+    )
+    try:
+        lint_daemon.serve(lambda path: click.echo(f"Listening on `{path}`"))
+    except NavelError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+
+@daemon.command()
+@click.option(
+    "--project-directory",
+    help="Path to the root directory of the project",
+    type=click.Path(
+        exists=True,
+        dir_okay=True,
+        file_okay=False,
+        readable=True,
+        path_type=pathlib.Path,
+    ),
+    default=pathlib.Path("."),
+)
+def stop(project_directory: pathlib.Path) -> None:
+    """
+    Stop the lint daemon of a project
+    @param project_directory: Path of the project
+    """
+    try:
+        send_request(socket_path(project_directory), {"command": COMMAND_STOP})
+    except NavelError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+
+@daemon.command()
+@click.option(
+    "--project-directory",
+    help="Path to the root directory of the project",
+    type=click.Path(
+        exists=True,
+        dir_okay=True,
+        file_okay=False,
+        readable=True,
+        path_type=pathlib.Path,
+    ),
+    default=pathlib.Path("."),
+)
+def status(project_directory: pathlib.Path) -> None:
+    """
+    Check whether the lint daemon of a project is running
+    @param project_directory: Path of the project
+    """
+    try:
+        response = send_request(socket_path(project_directory), {"command": COMMAND_STATUS})
+    except NavelError as exc:
+        raise click.ClickException(str(exc)) from exc
+    click.echo(f"Daemon of `{response['project_directory']}` is running with PID {response['pid']}")
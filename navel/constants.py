@@ -0,0 +1,39 @@
+"""
+Module with constants shared by the CLI and the modules implementing its commands
+
+The module has no dependencies, so the CLI can be set up without importing the heavy modules linting is done by.
+"""
+
+CONFIG_FILE_NAVEL = ".navel.yml"
+CONFIG_FILE_BELLYBUTTON = ".bellybutton.yml"
+
+# Directory in the project with the persistent caches
+CACHE_DIRECTORY = ".navel_cache"
+
+# Default maximal number of files kept by a FileManager
+DEFAULT_MAX_ENTRIES = 128
+
+# Number of bytes in a mebibyte, sizes in options are given in MiB
+MIB = 1024 * 1024
+
+# Size in bytes from which files linted by the lint command are memory-mapped instead of read into memory
+MMAP_MIN_SIZE = MIB
+
+# Value of the number of jobs using all available CPUs
+JOBS_AUTO = "auto"
+
+# Time in seconds between two scans of the PollingWatcher
+POLL_INTERVAL = 1.0
+
+# Default time in seconds without requests after which the daemon shuts down
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+
+# Names of the rule sets of benchmarks
+BENCHMARK_RULE_SETS = ("glob", "regex", "xpath")
+
+# Formats of the output of linting
+OUTPUT_FORMAT_TEXT = "text"
+OUTPUT_FORMAT_JSONL = "jsonl"
+OUTPUT_FORMAT_SARIF = "sarif"
+OUTPUT_FORMAT_CHECKSTYLE = "checkstyle"
+OUTPUT_FORMATS = (OUTPUT_FORMAT_TEXT, OUTPUT_FORMAT_JSONL, OUTPUT_FORMAT_SARIF, OUTPUT_FORMAT_CHECKSTYLE)
@@ -0,0 +1,227 @@
+"""
+Module for the lint daemon serving lint requests of a project over a Unix domain socket
+"""
+
+import json
+import os
+import pathlib
+import socketserver
+import stat
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from navel.caching.file_manager import FileManager
+from navel.constants import DEFAULT_IDLE_TIMEOUT, DEFAULT_MAX_ENTRIES
+from navel.daemon_client import COMMAND_LINT, COMMAND_STATUS, COMMAND_STOP, PROTOCOL_VERSION, send_request, socket_path
+from navel.discovery import FileDiscovery
+from navel.errors import DaemonError, NavelError
+from navel.linter import Linter
+from navel.models import Rule
+from navel.parsing import ConfigState, config_state
+from navel.rule_set import PathMatcher, rules_xml_omissions
+
+# Maximal time in seconds between checks whether the daemon has been stopped or has been idle for too long
+STOP_CHECK_INTERVAL = 0.2
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handler of a single connection, every connection carries one request and one response
+    """
+
+    server: "_DaemonServer"
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            if not isinstance(request, dict):
+                raise DaemonError("Request must be a JSON object")
+            response = self.server.daemon.handle(request)
+        except (ValueError, NavelError, SyntaxError, OSError) as exc:
+            response = {"ok": False, "error": f"{exc.__class__.__name__}: {exc}"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Server handling every connection in its own thread, closing the server waits for the running requests
+    """
+
+    def __init__(self, path: str, daemon: "LintDaemon"):
+        self.daemon: LintDaemon = daemon
+        super().__init__(path, _RequestHandler)
+
+
+class LintDaemon:  # pylint: disable=too-many-instance-attributes
+    """
+    Class holding rules and parsed files of a project and linting files on request
+
+    Connections are accepted concurrently, linting itself is serialized as the FileManager and Linter are shared.
+    Rules are reloaded when the config changes, files are read again when their modification time or size changes.
+    """
+
+    def __init__(
+        self,
+        project_directory: pathlib.Path,
+        load_rules: Callable[[], List[Rule]],
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        max_cached_files: Optional[int] = DEFAULT_MAX_ENTRIES,
+    ):
+        self._project_directory: pathlib.Path = project_directory.resolve()
+        self._load_rules: Callable[[], List[Rule]] = load_rules
+        self._idle_timeout: float = idle_timeout
+        self._lock: threading.Lock = threading.Lock()
+        self._file_manager: FileManager = FileManager(max_cached_files)
+        self._file_states: Dict[pathlib.Path, Tuple[int, int]] = {}
+        self._config_state: ConfigState = config_state(self._project_directory)
+        self._rules: List[Rule] = load_rules()
+        self._file_manager.set_xml_omissions(rules_xml_omissions(self._rules))
+        self._linter: Linter = Linter(self._file_manager, self._rules)
+        self._path_matcher: PathMatcher = PathMatcher(self._rules)
+        self._last_activity: float = time.monotonic()
+        self._stopping: bool = False
+
+    @property
+    def socket_path(self) -> pathlib.Path:
+        """
+        Get path of the socket the daemon listens on
+        @return: Path of the socket
+        """
+        return socket_path(self._project_directory)
+
+    def _refresh_rules(self) -> None:
+        """
+        Reload the rules when the config has changed, an invalid config fails every request until it is fixed
+        """
+        current_config_state = config_state(self._project_directory)
+        if current_config_state == self._config_state:
+            return
+        self._rules = self._load_rules()
+        self._config_state = current_config_state
+        self._file_manager.set_xml_omissions(rules_xml_omissions(self._rules))
+        self._linter = Linter(self._file_manager, self._rules)
+        self._path_matcher = PathMatcher(self._rules)
+
+    def _refresh_file(self, path: pathlib.Path) -> None:
+        """
+        Drop the cached file when it has changed since it has been read
+        @param path: Path to the file
+        """
+        try:
+            path_stat = path.stat()
+        except OSError:
+            self._file_manager.release(path)
+            self._file_states.pop(path, None)
+            return
+
+        state = (path_stat.st_mtime_ns, path_stat.st_size)
+        if self._file_states.get(path) != state:
+            self._file_manager.release(path)
+            self._file_states[path] = state
+
+    def lint(self, files: Optional[List[str]], respect_gitignore: bool) -> Dict[str, Any]:
+        """
+        Lint files
+        @param files: Absolute paths of files to lint, None to lint all files in the project
+        @param respect_gitignore: Skip files ignored by .gitignore files when searching for files to lint
+        @return: Response with the violations
+        """
+        with self._lock:
+            self._refresh_rules()
+            # Paths are planned as by `navel lint`, so files no rule applies to are neither read nor counted
+            paths = list(
+                self._path_matcher.plan(
+                    FileDiscovery(self._rules, respect_gitignore).walk(self._project_directory)
+                    if files is None
+                    else [pathlib.Path(file) for file in files]
+                )
+            )
+
+            self._file_manager.reset_stats()
+            violations: List[Tuple[str, int, str, str]] = []
+            for path in paths:
+                self._refresh_file(path)
+                violations.extend(
+                    (str(path), violation.lineno, violation.line, violation.rule.name)
+                    for violation in self._linter.file_violations(path)
+                )
+
+            stats = self._file_manager.reset_stats()
+            return {
+                "ok": True,
+                "files": len(paths),
+                "rules": {rule.name: (rule.description, rule.example, rule.instead) for rule in self._rules},
+                "violations": violations,
+                "skipped_files": stats.skipped_files,
+                "regex_only_files": stats.regex_only_files,
+            }
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Handle a request of a client
+        @raise DaemonError: When the request is invalid
+        @param request: Request of the client
+        @return: Response to the request
+        """
+        self._last_activity = time.monotonic()
+        if request.get("version") != PROTOCOL_VERSION:
+            raise DaemonError(f"Unsupported protocol version {request.get('version')}")
+
+        try:
+            command = request.get("command")
+            if command == COMMAND_LINT:
+                files = request.get("files")
+                if files is not None and not (isinstance(files, list) and all(isinstance(f, str) for f in files)):
+                    raise DaemonError("Files must be a list of paths")
+                return self.lint(files, bool(request.get("respect_gitignore", True)))
+            if command == COMMAND_STATUS:
+                return {"ok": True, "project_directory": str(self._project_directory), "pid": os.getpid()}
+            if command == COMMAND_STOP:
+                self._stopping = True
+                return {"ok": True}
+            raise DaemonError(f"Unknown command {command}")
+        finally:
+            self._last_activity = time.monotonic()
+
+    def _prepare_socket(self) -> None:
+        """
+        Create the private directory of the socket and remove a stale socket left by a crashed daemon
+        @raise DaemonError: When a daemon of the project is already running
+        """
+        path = self.socket_path
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        directory_stat = path.parent.stat()
+        private = directory_stat.st_uid == os.getuid() and not stat.S_IMODE(directory_stat.st_mode) & 0o077
+        if not private:
+            raise DaemonError(f"Directory `{path.parent}` is not private to the current user")
+
+        if path.exists():
+            try:
+                send_request(path, {"command": COMMAND_STATUS})
+            except DaemonError:
+                path.unlink()
+            else:
+                raise DaemonError(f"Daemon of `{self._project_directory}` is already running")
+
+    def serve(self, on_ready: Optional[Callable[[pathlib.Path], None]] = None) -> None:
+        """
+        Serve requests until stopped or idle for longer than the idle timeout
+        @raise DaemonError: When a daemon of the project is already running
+        @param on_ready: Callback called with the path of the socket once the daemon accepts connections
+        """
+        self._prepare_socket()
+        path = self.socket_path
+        with _DaemonServer(str(path), self) as server:
+            try:
+                if on_ready is not None:
+                    on_ready(path)
+                self._last_activity = time.monotonic()
+                while not self._stopping:
+                    remaining = self._last_activity + self._idle_timeout - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    server.timeout = min(remaining, STOP_CHECK_INTERVAL)
+                    server.handle_request()
+            finally:
+                path.unlink(missing_ok=True)
@@ -0,0 +1,145 @@
+"""
+Module for communicating with the lint daemon, kept free of heavy imports to start quickly
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import pathlib
+import socket
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+from navel.errors import DaemonError
+
+# Version of the protocol, the daemon refuses requests of other versions
+PROTOCOL_VERSION = 1
+
+# Maximal time in seconds to wait for the daemon to accept a connection
+CONNECT_TIMEOUT = 1.0
+
+COMMAND_LINT = "lint"
+COMMAND_STATUS = "status"
+COMMAND_STOP = "stop"
+
+
+@dataclasses.dataclass
+class RemoteRule:
+    """
+    Rule as reported by the daemon
+    """
+
+    name: str
+    description: str
+    example: Optional[str]
+    instead: Optional[str]
+
+
+@dataclasses.dataclass
+class RemoteViolation:
+    """
+    Linting violation as reported by the daemon
+    """
+
+    path: pathlib.Path
+    lineno: int
+    line: str
+    rule: RemoteRule
+
+
+@dataclasses.dataclass
+class RemoteResult:
+    """
+    Result of linting by the daemon
+    """
+
+    violations: List[RemoteViolation]
+    files: int
+    rules: int
+    # Generated or large files no rule has been applied to, or which have been linted by regex rules only
+    skipped_files: int = 0
+    regex_only_files: int = 0
+
+
+def socket_path(project_directory: pathlib.Path) -> pathlib.Path:
+    """
+    Get path of the socket of the daemon of a project, the socket is in a directory private to the user
+    @param project_directory: Path of the project
+    @return: Path of the socket
+    """
+    digest = hashlib.sha256(os.fsencode(os.path.realpath(project_directory))).hexdigest()[:16]
+    user = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    return pathlib.Path(tempfile.gettempdir(), f"navel-{user}", f"{digest}.sock")
+
+
+def send_request(path: pathlib.Path, request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Send a request to the daemon and wait for its response
+    @raise DaemonError: When the daemon is not running or the communication fails
+    @param path: Path of the socket of the daemon
+    @param request: Request to be sent
+    @return: Response of the daemon
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("Unix domain sockets are not supported")
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(CONNECT_TIMEOUT)
+            connection.connect(str(path))
+            connection.settimeout(None)
+            connection.sendall(json.dumps({"version": PROTOCOL_VERSION, **request}).encode("utf-8") + b"\n")
+            with connection.makefile("rb") as stream:
+                response_line = stream.readline()
+    except OSError as exc:
+        raise DaemonError(f"Can not communicate with the daemon at `{path}`: {exc}") from exc
+
+    try:
+        response = json.loads(response_line)
+    except ValueError as exc:
+        raise DaemonError("Invalid response of the daemon") from exc
+    if not isinstance(response, dict) or not response.get("ok"):
+        error = response.get("error") if isinstance(response, dict) else None
+        raise DaemonError(f"Daemon failed: {error}")
+    return response
+
+
+def request_lint(
+    project_directory: pathlib.Path, files: Optional[Sequence[pathlib.Path]], respect_gitignore: bool
+) -> Optional[RemoteResult]:
+    """
+    Lint files by the daemon of a project
+    @param project_directory: Path of the project
+    @param files: Files to lint, None to lint all files in the project
+    @param respect_gitignore: Skip files ignored by .gitignore files when searching for files to lint
+    @return: Result of linting, None when no daemon is running or it could not lint the files
+    """
+    path = socket_path(project_directory)
+    if not path.exists():
+        return None
+
+    request = {
+        "command": COMMAND_LINT,
+        "files": None if files is None else [os.path.abspath(file) for file in files],
+        "respect_gitignore": respect_gitignore,
+    }
+    try:
+        response = send_request(path, request)
+    except DaemonError:
+        return None
+
+    rules = {
+        name: RemoteRule(name=name, description=description, example=example, instead=instead)
+        for name, (description, example, instead) in response["rules"].items()
+    }
+    return RemoteResult(
+        violations=[
+            RemoteViolation(path=pathlib.Path(file), lineno=lineno, line=line, rule=rules[rule_name])
+            for file, lineno, line, rule_name in response["violations"]
+        ],
+        files=response["files"],
+        rules=len(rules),
+        skipped_files=response.get("skipped_files", 0),
+        regex_only_files=response.get("regex_only_files", 0),
+    )
@@ -0,0 +1,235 @@
+"""
+Module for discovering Python files to be linted
+"""
+
+import concurrent.futures
+import dataclasses
+import fnmatch
+import os
+import pathlib
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import pathspec
+
+from navel.models import Rule
+from navel.rule_set import pattern_str
+
+PYTHON_FILE_EXTENSION = ".py"
+
+GITIGNORE_FILE = ".gitignore"
+
+# Directories which never contain files to be linted
+PRUNED_DIRECTORIES = frozenset(
+    (
+        ".git",
+        ".hg",
+        ".svn",
+        ".tox",
+        ".nox",
+        ".eggs",
+        ".venv",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".navel_cache",
+        "__pycache__",
+        "node_modules",
+    )
+)
+
+# File present in the root of every virtual environment
+VIRTUALENV_MARKER = "pyvenv.cfg"
+
+# Directory the .gitignore file is located in together with the matcher of paths relative to the directory
+GitIgnore = Tuple[str, Callable[[str], bool]]
+
+
+@dataclasses.dataclass
+class ScannedDirectory:
+    """
+    Result of scanning a single directory
+    """
+
+    path: str
+    # Gitignore specs applying to the directory, inherited from its parent directories
+    gitignores: Sequence[GitIgnore]
+    files: List[pathlib.Path]
+    # Subdirectories to be scanned with gitignore specs applying to them
+    subdirectories: List[Tuple[str, Sequence[GitIgnore]]]
+
+
+class PathStream:
+    """
+    Iterable of paths counting the paths it has yielded
+    """
+
+    def __init__(self, paths: Iterable[pathlib.Path]):
+        self._paths: Iterable[pathlib.Path] = paths
+        self.count: int = 0
+
+    def __iter__(self) -> Iterator[pathlib.Path]:
+        for path in self._paths:
+            self.count += 1
+            yield path
+
+
+def _load_gitignore(directory: str) -> Optional[GitIgnore]:
+    """
+    Load .gitignore file located in a directory
+    @param directory: Directory to load the .gitignore file from
+    @return: Loaded gitignore spec or None when the directory contains no readable .gitignore file
+    """
+    try:
+        spec = pathspec.GitIgnoreSpec.from_lines(
+            pathlib.Path(directory, GITIGNORE_FILE).read_text(encoding="utf-8").splitlines()
+        )
+    except (OSError, UnicodeDecodeError):
+        return None
+    return os.path.abspath(directory), spec.match_file
+
+
+def _parent_gitignores(root_dir: pathlib.Path) -> List[GitIgnore]:
+    """
+    Load .gitignore files of the parent directories of the root directory within its git repository
+    @param root_dir: Root directory of the discovery
+    @return: List of gitignore specs, the outermost first
+    """
+    root = root_dir.resolve()
+    if (root / ".git").exists():
+        return []
+
+    gitignores: List[GitIgnore] = []
+    for parent in root.parents:
+        gitignore = _load_gitignore(str(parent))
+        if gitignore is not None:
+            gitignores.append(gitignore)
+        if (parent / ".git").exists():
+            return gitignores[::-1]
+
+    # Outside a git repository .gitignore files of parent directories do not apply
+    return []
+
+
+def _is_ignored(path: str, is_dir: bool, gitignores: Sequence[GitIgnore]) -> bool:
+    """
+    Check if a path is ignored by any of the gitignore specs
+    @param path: Path to be checked
+    @param is_dir: True when the path is a directory
+    @param gitignores: Gitignore specs the path is checked against
+    @return: True when the path is ignored, False otherwise
+    """
+    absolute_path = os.path.abspath(path)
+    for directory, match_file in gitignores:
+        relative_path = os.path.relpath(absolute_path, directory)
+        if match_file(relative_path + "/" if is_dir else relative_path):
+            return True
+    return False
+
+
+class FileDiscovery:
+    """
+    Class discovering Python files in a directory tree
+
+    Directories excluded by all rules, directories of tools and virtual environments and paths ignored by git
+    are not descended into. Directories are scanned by a pool of threads ahead of the consumer of the paths.
+    """
+
+    def __init__(self, rules: Sequence[Rule], respect_gitignore: bool = True, threads: Optional[int] = None):
+        self._rules_exclusions: List[List[str]] = [
+            [pattern_str(pattern) for pattern in rule.settings.excluded if pattern_str(pattern).endswith("*")]
+            for rule in rules
+        ]
+        self._respect_gitignore: bool = respect_gitignore
+        self._threads: Optional[int] = threads
+
+    def _is_excluded(self, directory: str) -> bool:
+        """
+        Check if all files in a directory are excluded by every rule
+        @param directory: Path of the directory
+        @return: True when no file in the directory can be linted, False otherwise
+        """
+        # A pattern ending with `*` matching the directory with a trailing separator matches all paths inside it
+        directory_prefix = str(pathlib.Path(directory)) + os.sep
+        return all(
+            any(fnmatch.fnmatch(directory_prefix, pattern) for pattern in exclusions)
+            for exclusions in self._rules_exclusions
+        )
+
+    def scan(self, directory: str, gitignores: Sequence[GitIgnore]) -> ScannedDirectory:
+        """
+        Scan a single directory
+        @param directory: Directory to be scanned
+        @param gitignores: Gitignore specs applying to the directory
+        @return: Python files in the directory and subdirectories to be scanned
+        """
+        scanned = ScannedDirectory(path=directory, gitignores=gitignores, files=[], subdirectories=[])
+        if self._respect_gitignore:
+            gitignore = _load_gitignore(directory)
+            if gitignore is not None:
+                gitignores = (*gitignores, gitignore)
+
+        try:
+            entries = sorted(os.scandir(directory), key=lambda x: x.name)
+        except OSError:
+            return scanned
+
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_python_file = not is_dir and entry.name.endswith(PYTHON_FILE_EXTENSION) and entry.is_file()
+            except OSError:
+                continue
+
+            if is_dir:
+                if (
+                    entry.name in PRUNED_DIRECTORIES
+                    or os.path.exists(os.path.join(entry.path, VIRTUALENV_MARKER))
+                    or self._is_excluded(entry.path)
+                    or _is_ignored(entry.path, True, gitignores)
+                ):
+                    continue
+                scanned.subdirectories.append((entry.path, gitignores))
+            elif is_python_file and not _is_ignored(entry.path, False, gitignores):
+                scanned.files.append(pathlib.Path(entry.path))
+
+        return scanned
+
+    def scan_tree(self, root_dir: pathlib.Path) -> Iterator[ScannedDirectory]:
+        """
+        Scan a directory and its subdirectories, a directory is yielded before its subdirectories,
+        entries of every directory are sorted by name
+        @param root_dir: Directory to be scanned
+        @return: Generator of scanned directories
+        """
+        yield from self.scan_subtree(str(root_dir), _parent_gitignores(root_dir) if self._respect_gitignore else [])
+
+    def scan_subtree(self, directory: str, gitignores: Sequence[GitIgnore]) -> Iterator[ScannedDirectory]:
+        """
+        Scan a directory and its subdirectories given the gitignore specs applying to the directory
+        @param directory: Directory to be scanned
+        @param gitignores: Gitignore specs applying to the directory
+        @return: Generator of scanned directories
+        """
+        with concurrent.futures.ThreadPoolExecutor(self._threads) as executor:
+            pending = [executor.submit(self.scan, directory, gitignores)]
+            try:
+                while pending:
+                    scanned = pending.pop().result()
+                    yield scanned
+                    pending.extend(
+                        executor.submit(self.scan, subdirectory, subdirectory_gitignores)
+                        for subdirectory, subdirectory_gitignores in reversed(scanned.subdirectories)
+                    )
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def walk(self, root_dir: pathlib.Path) -> Iterator[pathlib.Path]:
+        """
+        Yield all Python files in a directory and its subdirectories, files of a directory are yielded before
+        the files of its subdirectories, entries of every directory are sorted by name
+        @param root_dir: Directory to be searched
+        @return: Generator of paths of Python files
+        """
+        for scanned in self.scan_tree(root_dir):
+            yield from scanned.files
@@ -25,3 +25,27 @@ class ExprError(NavelError):
     """
     Error when an expression is not a valid expression
     """
+
+
+class DaemonError(NavelError):
+    """
+    Error when communicating with the lint daemon
+    """
+
+
+class GitError(NavelError):
+    """
+    Error when reading from a git repository
+    """
+
+
+class BaselineError(NavelError):
+    """
+    Error when reading a baseline of violations
+    """
+
+
+class EvaluationTimeoutError(LinterError):
+    """
+    Error when an evaluation of a rule runs out of its time budget
+    """
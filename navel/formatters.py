@@ -0,0 +1,270 @@
+"""
+Module with formatters writing violations to a stream as they are produced
+
+None of the formatters keeps the violations in memory, documents of SARIF and checkstyle are written incrementally.
+"""
+
+import abc
+import json
+import os
+import pathlib
+from typing import Dict, Optional, Protocol, TextIO, Type
+
+import click
+
+from navel.constants import OUTPUT_FORMAT_CHECKSTYLE, OUTPUT_FORMAT_JSONL, OUTPUT_FORMAT_SARIF, OUTPUT_FORMAT_TEXT
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+TOOL_NAME = "navel"
+
+# Escapes of characters in XML attribute values, whitespace is escaped so it survives normalization of the values
+XML_ATTRIBUTE_ESCAPES = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+)
+TOOL_URI = "https://github.com/antoninkriz/navel"
+
+
+class ReportedRule(Protocol):
+    """
+    Rule of a reported violation, either a parsed rule or a rule as reported by the daemon
+    """
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the rule
+        """
+
+    @property
+    def description(self) -> str:
+        """
+        Description of the rule
+        """
+
+    @property
+    def example(self) -> Optional[str]:
+        """
+        Example of code violating the rule
+        """
+
+    @property
+    def instead(self) -> Optional[str]:
+        """
+        Example of code to be used instead
+        """
+
+
+class ReportedViolation(Protocol):
+    """
+    Reported violation, either a linting violation or a violation as reported by the daemon
+    """
+
+    @property
+    def path(self) -> pathlib.Path:
+        """
+        Path of the violating file
+        """
+
+    @property
+    def lineno(self) -> int:
+        """
+        Number of the violating line
+        """
+
+    @property
+    def line(self) -> str:
+        """
+        The violating line
+        """
+
+    @property
+    def rule(self) -> ReportedRule:
+        """
+        The violated rule
+        """
+
+
+def quote_attribute(value: str) -> str:
+    """
+    Quote a value of an XML attribute, `xml.sax.saxutils` is not used as it imports `urllib` on every startup
+    @param value: Value of the attribute
+    @return: Escaped value in double quotes
+    """
+    return f'"{value.translate(XML_ATTRIBUTE_ESCAPES)}"'
+
+
+def format_text(violation: ReportedViolation, path: str, verbose: bool) -> str:
+    """
+    Format a violation as human readable text
+    @param violation: Violation to format
+    @param path: Path of the violating file as printed
+    @param verbose: Format verbose description of the violation
+    @return: Formatted violation, styled by ANSI codes
+    """
+    rule = violation.rule
+    if not verbose:
+        return f"{path}:{violation.lineno}\t{rule.name}: {rule.description}"
+
+    file_name = click.style(f"{path}:{violation.lineno}", fg="bright_magenta", bold=True)
+    rule_name = click.style(rule.name, fg="bright_magenta", bold=True, underline=True)
+    example = f'{click.style("Example", bold=True)}:\n{rule.example.strip()}\n' if rule.example is not None else ""
+    instead = f'{click.style("Instead", bold=True)}:\n{rule.instead.strip()}\n' if rule.instead is not None else ""
+    return (
+        f"{file_name}\t{rule_name}\n"
+        f'{click.style("Description", bold=True)}: {rule.description}\n'
+        f'{click.style("Line", bold=True)}:\n'
+        f"{violation.line}\n"
+        f"{example}{instead}"
+    )
+
+
+class Formatter(abc.ABC):
+    """
+    Abstract class of formatters of violations
+    """
+
+    # Output is read by tools, so other messages must not be mixed with it
+    machine_readable: bool = True
+
+    def __init__(self, stream: TextIO, project_directory: pathlib.Path, verbose: bool = False):
+        self._stream: TextIO = stream
+        self._project_directory: pathlib.Path = project_directory
+        self._verbose: bool = verbose
+
+    def _relative_path(self, path: pathlib.Path) -> str:
+        """
+        Get path of a file relative to the project
+        @param path: Path of the file
+        @return: Relative path with forward slashes
+        """
+        return pathlib.Path(os.path.relpath(path, self._project_directory)).as_posix()
+
+    def start(self) -> None:
+        """
+        Write the beginning of the output before any violation
+        """
+
+    @abc.abstractmethod
+    def write(self, violation: ReportedViolation) -> None:
+        """
+        Write a violation
+        @param violation: Violation to be written
+        """
+        raise NotImplementedError
+
+    def finish(self) -> None:
+        """
+        Write the end of the output after all violations
+        """
+        self._stream.flush()
+
+
+class TextFormatter(Formatter):
+    """
+    Formatter of human readable text, styles are stripped when the stream is not a terminal
+    """
+
+    machine_readable = False
+
+    def write(self, violation: ReportedViolation) -> None:
+        path = os.path.relpath(violation.path, self._project_directory)
+        click.echo(format_text(violation, path, self._verbose), file=self._stream)
+
+
+class JsonLinesFormatter(Formatter):
+    """
+    Formatter of JSON Lines, every violation is a JSON object on its own line
+    """
+
+    def write(self, violation: ReportedViolation) -> None:
+        record = {
+            "path": self._relative_path(violation.path),
+            "line": violation.lineno,
+            "rule": violation.rule.name,
+            "description": violation.rule.description,
+            "source": violation.line,
+        }
+        self._stream.write(json.dumps(record) + "\n")
+
+
+class SarifFormatter(Formatter):
+    """
+    Formatter of a SARIF log, results are written as they are produced and the rules they refer to after them
+    """
+
+    def __init__(self, stream: TextIO, project_directory: pathlib.Path, verbose: bool = False):
+        super().__init__(stream, project_directory, verbose)
+        self._rules: Dict[str, str] = {}
+        self._results: int = 0
+
+    def start(self) -> None:
+        self._stream.write(f'{{"$schema": {json.dumps(SARIF_SCHEMA)}, "version": {json.dumps(SARIF_VERSION)}, ')
+        self._stream.write('"runs": [{"results": [')
+
+    def write(self, violation: ReportedViolation) -> None:
+        rule = violation.rule
+        result = {
+            "ruleId": rule.name,
+            "level": "error",
+            "message": {"text": rule.description},
+            "locations": [
+                {
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": self._relative_path(violation.path), "uriBaseId": "%SRCROOT%"},
+                        "region": {"startLine": violation.lineno, "snippet": {"text": violation.line}},
+                    }
+                }
+            ],
+        }
+        self._stream.write(("\n" if self._results == 0 else ",\n") + json.dumps(result))
+        self._results += 1
+        self._rules.setdefault(rule.name, rule.description)
+
+    def finish(self) -> None:
+        rules = [
+            {"id": name, "shortDescription": {"text": description}} for name, description in sorted(self._rules.items())
+        ]
+        tool = {"driver": {"name": TOOL_NAME, "informationUri": TOOL_URI, "rules": rules}}
+        self._stream.write(f'\n], "tool": {json.dumps(tool)}}}]}}\n')
+        super().finish()
+
+
+class CheckstyleFormatter(Formatter):
+    """
+    Formatter of a checkstyle XML report, consecutive violations of the same file are grouped into one element
+    """
+
+    def __init__(self, stream: TextIO, project_directory: pathlib.Path, verbose: bool = False):
+        super().__init__(stream, project_directory, verbose)
+        self._path: Optional[pathlib.Path] = None
+
+    def start(self) -> None:
+        self._stream.write('<?xml version="1.0" encoding="utf-8"?>\n<checkstyle version="4.3">\n')
+
+    def write(self, violation: ReportedViolation) -> None:
+        if violation.path != self._path:
+            if self._path is not None:
+                self._stream.write("</file>\n")
+            self._stream.write(f"<file name={quote_attribute(self._relative_path(violation.path))}>\n")
+            self._path = violation.path
+
+        rule = violation.rule
+        self._stream.write(
+            f'<error line="{violation.lineno}" severity="error" message={quote_attribute(rule.description)} '
+            f"source={quote_attribute(f'{TOOL_NAME}.{rule.name}')}/>\n"
+        )
+
+    def finish(self) -> None:
+        if self._path is not None:
+            self._stream.write("</file>\n")
+        self._stream.write("</checkstyle>\n")
+        super().finish()
+
+
+FORMATTERS: Dict[str, Type[Formatter]] = {
+    OUTPUT_FORMAT_TEXT: TextFormatter,
+    OUTPUT_FORMAT_JSONL: JsonLinesFormatter,
+    OUTPUT_FORMAT_SARIF: SarifFormatter,
+    OUTPUT_FORMAT_CHECKSTYLE: CheckstyleFormatter,
+}
@@ -0,0 +1,364 @@
+"""
+Module for reading changes and contents of files from git repositories
+"""
+
+import bisect
+import os
+import pathlib
+import re
+import subprocess
+import threading
+from types import TracebackType
+from typing import IO, AbstractSet, Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from navel.errors import GitError
+
+# Header of a hunk of a unified diff, only the position and length of the new side are used
+HUNK_HEADER = re.compile(r"@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+# Header of a file of a unified diff with the path of the new side
+NEW_FILE_HEADER = "+++ "
+
+# Mode of tree entries which are symbolic links, their blobs hold the target path instead of the file contents
+SYMLINK_MODE = "120000"
+
+# Ranges of changed lines of a file - inclusive numbers of the first and the last line, sorted
+LineRanges = List[Tuple[int, int]]
+
+
+def run_git(repository: pathlib.Path, *args: str) -> str:
+    """
+    Run a git command and get its output
+    @raise GitError: When git is not available or the command fails
+    @param repository: Directory in the repository
+    @param args: Arguments of the git command
+    @return: Standard output of the command
+    """
+    try:
+        return subprocess.run(
+            ["git", "-C", str(repository), *args],
+            check=True,
+            encoding="utf-8",
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        ).stdout
+    except OSError as exc:
+        raise GitError(f"Can not run git: {exc}") from exc
+    except subprocess.CalledProcessError as exc:
+        raise GitError(f"Command `git {' '.join(args)}` failed: {exc.stderr.strip()}") from exc
+
+
+def repository_root(directory: pathlib.Path) -> pathlib.Path:
+    """
+    Get root directory of the repository a directory belongs to
+    @raise GitError: When the directory is not in a git repository
+    @param directory: Directory in the repository
+    @return: Absolute path of the root directory
+    """
+    return pathlib.Path(run_git(directory, "rev-parse", "--show-toplevel").strip())
+
+
+def default_branch(directory: pathlib.Path) -> str:
+    """
+    Get name of the default branch of the `origin` remote
+    @raise GitError: When the default branch is not known
+    @param directory: Directory in the repository
+    @return: Name of the default branch
+    """
+    return run_git(directory, "symbolic-ref", "refs/remotes/origin/HEAD").strip().split("/")[-1]
+
+
+def diff_base(directory: pathlib.Path) -> str:
+    """
+    Get revision changes of the working tree are compared with
+    @raise GitError: When the merge base can not be computed
+    @param directory: Directory in the repository
+    @return: Merge base of HEAD and the default branch, HEAD when the default branch is not known
+    """
+    try:
+        branch = default_branch(directory)
+    except GitError:
+        return "HEAD"
+    return run_git(directory, "merge-base", branch, "HEAD").strip()
+
+
+def commit_range_head(commit_range: str) -> str:
+    """
+    Get the head revision of a commit range
+    @raise GitError: When the range is not in the form `base..head` or `base...head`
+    @param commit_range: Commit range, the head revision defaults to HEAD
+    @return: Head revision
+    """
+    base, separator, head = commit_range.partition("...")
+    if not separator:
+        base, separator, head = commit_range.partition("..")
+    if not separator or not base:
+        raise GitError(f"Invalid commit range `{commit_range}`, expected `base..head`")
+    return head or "HEAD"
+
+
+def _real_path(path: pathlib.Path) -> pathlib.Path:
+    """
+    Get absolute path of a file with symbolic links resolved in the directory only, as git stores links to files
+    @param path: Path of the file
+    @return: Path of the file comparable with paths in the repository
+    """
+    return pathlib.Path(os.path.realpath(path.parent), path.name)
+
+
+def _unquote_path(path: str) -> str:
+    """
+    Unquote a path quoted by git because of special characters
+    @param path: Path as printed by git
+    @return: The path itself
+    """
+    if not path.startswith('"'):
+        return path
+    return path[1:-1].encode("latin-1").decode("unicode_escape").encode("latin-1").decode("utf-8")
+
+
+def parse_diff(diff: str) -> Dict[str, LineRanges]:
+    """
+    Get changed lines of files from a unified diff
+    @param diff: Output of git diff, with no context lines for the most precise ranges
+    @return: Mapping of paths in the repository to ranges of their added or modified lines, deleted files are omitted
+    """
+    changed: Dict[str, LineRanges] = {}
+    ranges: Optional[LineRanges] = None
+    for line in diff.splitlines():
+        if line.startswith(NEW_FILE_HEADER):
+            path = _unquote_path(line[len(NEW_FILE_HEADER) :].rstrip("\t"))
+            ranges = None if path == "/dev/null" else changed.setdefault(path[len("b/") :], [])
+            continue
+
+        match = HUNK_HEADER.match(line)
+        if match is None or ranges is None:
+            continue
+        start = int(match.group(1))
+        count = 1 if match.group(2) is None else int(match.group(2))
+        if count > 0:
+            ranges.append((start, start + count - 1))
+
+    return {path: sorted(ranges) for path, ranges in changed.items()}
+
+
+def changed_lines(directory: pathlib.Path, revisions: Iterable[str]) -> Dict[pathlib.Path, LineRanges]:
+    """
+    Get changed lines of Python files
+    @raise GitError: When the diff can not be computed
+    @param directory: Directory in the repository
+    @param revisions: Revisions to diff as accepted by git diff - a base revision to diff the working tree with,
+    two revisions or a commit range
+    @return: Mapping of paths of the files in the directory to ranges of their added or modified lines, the paths
+    are relative when the directory is, so they are matched by the same globs as paths of discovered files
+    """
+    root = repository_root(directory)
+    real_directory = pathlib.Path(os.path.realpath(directory))
+    diff = run_git(
+        directory,
+        "-c",
+        "core.quotePath=false",
+        "diff",
+        "--unified=0",
+        "--no-color",
+        "--no-ext-diff",
+        "--diff-filter=d",
+        *revisions,
+        "--",
+        "*.py",
+    )
+    return {
+        directory / (root / path).relative_to(real_directory): ranges
+        for path, ranges in parse_diff(diff).items()
+        if real_directory in (root / path).parents
+    }
+
+
+def tree_blobs(directory: pathlib.Path, revision: str) -> Dict[pathlib.Path, str]:
+    """
+    Get Python files of a directory as they are in a revision
+    @raise GitError: When the revision does not exist
+    @param directory: Directory in the repository, only files in it and its subdirectories are listed
+    @param revision: Revision to list files of
+    @return: Mapping of paths of the files in the directory to hashes of their blobs
+    """
+    blobs: Dict[pathlib.Path, str] = {}
+    for entry in run_git(directory, "ls-tree", "-r", "-z", revision).split("\0"):
+        if not entry:
+            continue
+        info, _, path = entry.partition("\t")
+        mode, object_type, blob = info.split(" ")
+        if object_type == "blob" and mode != SYMLINK_MODE and path.endswith(".py"):
+            blobs[directory / path] = blob
+    return blobs
+
+
+class ChangedLines:
+    """
+    Class answering whether lines of files have been changed
+    """
+
+    def __init__(self, changed: Dict[pathlib.Path, LineRanges]):
+        self._paths: List[pathlib.Path] = sorted(path for path, ranges in changed.items() if ranges)
+        self._starts: Dict[pathlib.Path, List[int]] = {}
+        self._ends: Dict[pathlib.Path, List[int]] = {}
+        for path, ranges in changed.items():
+            self._starts[_real_path(path)] = [start for start, _ in ranges]
+            self._ends[_real_path(path)] = [end for _, end in ranges]
+
+    @property
+    def paths(self) -> List[pathlib.Path]:
+        """
+        Get paths of the changed files
+        @return: Sorted list of paths of files with added or modified lines
+        """
+        return self._paths
+
+    def changed(self, path: pathlib.Path) -> bool:
+        """
+        Check whether a file has any added or modified lines
+        @param path: Path of the file
+        @return: True when the file has changed lines, False otherwise
+        """
+        return bool(self._starts.get(_real_path(path)))
+
+    def contains(self, path: pathlib.Path, lineno: int) -> bool:
+        """
+        Check whether a line has been changed
+        @param path: Path of the file
+        @param lineno: Number of the line
+        @return: True when the line has been added or modified, False otherwise
+        """
+        real_path = _real_path(path)
+        starts = self._starts.get(real_path)
+        if not starts:
+            return False
+        index = bisect.bisect_right(starts, lineno) - 1
+        return index >= 0 and lineno <= self._ends[real_path][index]
+
+    def any_of(self, path: pathlib.Path, lines: AbstractSet[int]) -> bool:
+        """
+        Check whether any of lines has been changed
+        @param path: Path of the file
+        @param lines: Numbers of the lines
+        @return: True when any of the lines has been added or modified, False otherwise
+        """
+        real_path = _real_path(path)
+        return any(
+            lineno in lines
+            for start, end in zip(self._starts.get(real_path, ()), self._ends.get(real_path, ()))
+            for lineno in range(start, end + 1)
+        )
+
+
+class CatFile:
+    """
+    Class reading objects from a git repository through a single long-lived `git cat-file --batch` process
+
+    Reading is thread-safe, requests are serialized as they share the process.
+    """
+
+    def __init__(self, repository: pathlib.Path):
+        try:
+            self._process: "subprocess.Popen[bytes]" = subprocess.Popen(  # pylint: disable=consider-using-with
+                ["git", "-C", str(repository), "cat-file", "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+        except OSError as exc:
+            raise GitError(f"Can not run git: {exc}") from exc
+        self._lock: threading.Lock = threading.Lock()
+
+    def _pipes(self) -> Tuple[IO[bytes], IO[bytes]]:
+        if self._process.stdin is None or self._process.stdout is None:
+            raise GitError("Process `git cat-file` has no pipes")
+        return self._process.stdin, self._process.stdout
+
+    def read(self, name: str) -> Optional[bytes]:
+        """
+        Read contents of an object
+        @raise GitError: When the name is not valid or the process has failed
+        @param name: Name of the object, e.g. a blob hash or `revision:path`
+        @return: Contents of the object, None when the object does not exist
+        """
+        if "\n" in name:
+            raise GitError(f"Invalid object name `{name}`")
+
+        with self._lock:
+            stdin, stdout = self._pipes()
+            try:
+                stdin.write(name.encode("utf-8") + b"\n")
+                stdin.flush()
+                header = stdout.readline()
+                if not header:
+                    raise GitError("Process `git cat-file` has terminated")
+                if header.endswith(b" missing\n") or header.endswith(b" ambiguous\n"):
+                    return None
+                size = int(header.split()[2])
+                content = stdout.read(size)
+                stdout.read(1)
+            except (OSError, ValueError, IndexError) as exc:
+                raise GitError(f"Can not read `{name}` from git: {exc}") from exc
+        return content
+
+    def close(self) -> None:
+        """
+        Terminate the process
+        """
+        if self._process.stdin is not None:
+            self._process.stdin.close()
+        self._process.wait()
+        if self._process.stdout is not None:
+            self._process.stdout.close()
+
+    def __enter__(self) -> "CatFile":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class RevisionSource:
+    """
+    Source of file contents reading files as they are in a git revision instead of the working tree
+
+    The `git cat-file` process is started on the first read, so the source can be sent to worker processes.
+    """
+
+    def __init__(self, repository: pathlib.Path, revision: str):
+        self._root: pathlib.Path = repository_root(repository)
+        self._revision: str = revision
+        self._cat_file: Optional[CatFile] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_cat_file"] = None
+        return state
+
+    def __call__(self, path: pathlib.Path) -> bytes:
+        """
+        Read a file
+        @raise FileNotFoundError: When the file does not exist in the revision
+        @param path: Path of the file in the working tree
+        @return: Contents of the file in the revision
+        """
+        if self._cat_file is None:
+            self._cat_file = CatFile(self._root)
+        relative_path = _real_path(path).relative_to(self._root).as_posix()
+        content = self._cat_file.read(f"{self._revision}:{relative_path}")
+        if content is None:
+            raise FileNotFoundError(f"File `{relative_path}` does not exist in `{self._revision}`")
+        return content
+
+    def close(self) -> None:
+        """
+        Terminate the `git cat-file` process if it has been started
+        """
+        if self._cat_file is not None:
+            self._cat_file.close()
+            self._cat_file = None
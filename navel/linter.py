@@ -2,14 +2,24 @@
 Module with the Linter class
 """
 
+import functools
 import pathlib
 import re
+import time
 import tokenize
-from typing import FrozenSet, Generator, List, Tuple
+from typing import Callable, Dict, FrozenSet, Generator, Iterable, List, Optional, Set, Tuple, Union
 
+import lxml.etree
+
+from navel.budget import TimeBudget, Timeout, deadline
 from navel.caching.file_manager import File, FileManager
-from navel.errors import LinterError
-from navel.models import Rule
+from navel.caching.result_cache import ResultCache
+from navel.errors import EvaluationTimeoutError, LinterError
+from navel.models import LINT_ALL, LINT_REGEX, LintingViolation, Rule, Settings
+from navel.profiling import STAGE_MATCH, STAGE_REPORT, measure_rule, measure_stage
+from navel.rule_set import PathMatcher, XPathIndex
+from navel.yaml_expr.regex import RegExExpr
+from navel.yaml_expr.xpath import XPathExpr
 from navel.yaml_expr.yaml_expr import YamlExpr
 
 IGNORE_COMMENTS = [
@@ -18,14 +28,43 @@ IGNORE_COMMENTS = [
 ]
 
 
-class Linter:
+def lint_mode(file: File, settings: Settings) -> str:
+    """
+    Get how a file is linted by rules with given settings, guarding against generated and large files
+    @param file: File to be linted
+    @param settings: Settings of the rules
+    @return: One of LINT_MODES
+    """
+    if settings.generated != LINT_ALL and file.generated:
+        return settings.generated
+    if settings.max_file_size is not None and file.size > settings.max_file_size:
+        return LINT_REGEX
+    if settings.max_lines is not None and file.line_count > settings.max_lines:
+        return LINT_REGEX
+    return LINT_ALL
+
+
+class Linter:  # pylint: disable=too-many-instance-attributes
     """
     Class handling all linting operations
     """
 
-    def __init__(self, file_manager: FileManager, rules: List[Rule]):
+    def __init__(
+        self,
+        file_manager: FileManager,
+        rules: List[Rule],
+        result_cache: Optional[ResultCache] = None,
+        budget: Optional[TimeBudget] = None,
+    ):
         self._file_manager: FileManager = file_manager
         self._rules: List[Rule] = rules
+        self._rules_by_name: Dict[str, Rule] = {rule.name: rule for rule in rules}
+        self._path_matcher: PathMatcher = PathMatcher(rules)
+        self._xpath_index: XPathIndex = XPathIndex(rules)
+        self._result_cache: Optional[ResultCache] = result_cache
+        self._budget: Optional[TimeBudget] = budget
+        self._rule_timeouts: Dict[str, int] = {}
+        self._disabled_rules: Set[str] = set()
 
     @staticmethod
     def _get_ignored_lines(file: File) -> FrozenSet[int]:
@@ -34,6 +73,9 @@ class Linter:
         @param file: File object to get ignored lines form
         @return: Set of all line numbers of ignored lines
         """
+        if not file.may_contain_ignore_comments:
+            return frozenset()
+
         return frozenset(
             line
             for token_type, token, (line, _), _, _ in file.tokens
@@ -41,26 +83,202 @@ class Linter:
             if any(r.search(token) for r in IGNORE_COMMENTS)
         )
 
-    def lint_file(self, path: pathlib.Path) -> Generator[Tuple[Rule, int], None, None]:
+    def _matching_rules(self, path: pathlib.Path) -> List[Rule]:
+        """
+        Get rules matching a path
+        @param path: Path to the file
+        @return: List of rules matching the path
+        """
+        return self._path_matcher.match(path)
+
+    def _applied_rules(self, file: File, rules: List[Rule]) -> List[Rule]:
+        """
+        Get rules applied to a file, generated and large files are linted by some of the rules only
+        @param file: File to be linted
+        @param rules: Rules matching the path of the file
+        @return: List of rules to be applied
+        """
+        if self._disabled_rules:
+            rules = [rule for rule in rules if rule.name not in self._disabled_rules]
+
+        modes: Dict[int, str] = {}
+        applied: List[Rule] = []
+        for rule in rules:
+            mode = modes.get(id(rule.settings))
+            if mode is None:
+                mode = modes[id(rule.settings)] = lint_mode(file, rule.settings)
+            if mode == LINT_ALL or mode == LINT_REGEX and isinstance(rule.expr, RegExExpr):
+                applied.append(rule)
+
+        if len(applied) == len(rules):
+            return rules
+        if len(applied) == 0:
+            self._file_manager.stats.skipped_files += 1
+        else:
+            self._file_manager.stats.regex_only_files += 1
+        return applied
+
+    def _evaluate(
+        self,
+        path: pathlib.Path,
+        rule: Rule,
+        evaluate: Callable[[], Iterable[int]],
+        file_deadline: Optional[float],
+    ) -> Union[FrozenSet[int], Timeout]:
+        """
+        Evaluate a rule on a file within its time budget, rules timing out too many times are disabled
+        @param path: Path to the file
+        @param rule: Evaluated rule
+        @param evaluate: Function evaluating the rule and returning the matching lines
+        @param file_deadline: Time of `time.perf_counter` by which the file has to be linted, None for no limit
+        @return: Set of the matching lines, or the timeout when the evaluation ran out of its budget
+        """
+        if self._budget is None:
+            return frozenset(evaluate())
+
+        try:
+            with deadline(self._budget.seconds(file_deadline)):
+                return frozenset(evaluate())
+        except EvaluationTimeoutError:
+            pass
+
+        file_budget = file_deadline is not None and time.perf_counter() >= file_deadline
+        timeouts = self._rule_timeouts[rule.name] = self._rule_timeouts.get(rule.name, 0) + 1
+        disabled = self._budget.max_timeouts is not None and timeouts >= self._budget.max_timeouts
+        if disabled:
+            self._disabled_rules.add(rule.name)
+        timeout = Timeout(
+            path=path,
+            rule=rule.name,
+            seconds=(self._budget.file_seconds if file_budget else self._budget.rule_seconds) or 0.0,
+            file_budget=file_budget,
+            disabled=disabled,
+        )
+        self._file_manager.stats.timeouts.append(timeout)
+        return timeout
+
+    def lint_file(  # pylint: disable=too-many-branches
+        self, path: pathlib.Path, rules: Optional[List[Rule]] = None
+    ) -> Generator[Tuple[Rule, int], None, None]:
         """
         Lint a file
         @param path: Path to the file to be linted
+        @param rules: Rules applied to the file, None to apply the rules matching its path and guarding its contents
         @return: Generator of [Rule, line number] tuples where a Rule matches the line (a Rule is violated)
         """
-        matching_rules = [rule for rule in self._rules if rule.match_path(path)]
-        if len(matching_rules) == 0:
+        if rules is None:
+            rules = self._matching_rules(path)
+            if len(rules) == 0:
+                return
+            file = self._file_manager.get(path)
+            rules = self._applied_rules(file, rules)
+        else:
+            file = self._file_manager.get(path)
+        if len(rules) == 0:
             return
 
-        file = self._file_manager.get(path)
-        ignored_lines = self._get_ignored_lines(file)
+        profiler = self._file_manager.profiler
+        file_deadline = None if self._budget is None else self._budget.file_deadline()
+        with measure_stage(profiler, STAGE_MATCH):
+            ignored_lines = self._get_ignored_lines(file)
 
-        for rule in sorted(self._rules, key=lambda x: x.name):
+        candidate_parents: Optional[Dict[str, List[lxml.etree._Element]]] = None
+        for rule in rules:
             if not isinstance(rule.expr, YamlExpr):
                 raise LinterError(f"Rule {rule.name} is not a valid Navel rule")
 
-            matching_lines = frozenset(rule.expr.match_line_numbers(file))
+            # Node types are collected when parsing, so XPath rules are skipped before the XML tree is even built
+            if isinstance(rule.expr, XPathExpr) and not rule.expr.may_match(file.node_types):
+                self._file_manager.stats.skipped_rules += 1
+                continue
+
+            with measure_rule(profiler, rule.name, rule.expr):
+                # Representations of the file are shared by the rules, so they are not charged to the budget of a rule
+                rule.expr.prepare(file)
+                if isinstance(rule.expr, XPathExpr) and rule.expr.indexed_tags is not None:
+                    if candidate_parents is None:
+                        candidate_parents = self._xpath_index.candidate_parents(file)
+                    evaluate = functools.partial(rule.expr.match_line_numbers_indexed, file, candidate_parents)
+                else:
+                    evaluate = functools.partial(rule.expr.match_line_numbers, file)
+                result = self._evaluate(path, rule, evaluate, file_deadline)
+            if isinstance(result, Timeout):
+                if result.file_budget:
+                    break
+                continue
+
+            matching_lines = result
             if rule.settings.allow_ignore:
                 matching_lines -= ignored_lines
 
             for line in matching_lines:
                 yield rule, line
+
+    def file_violations(self, path: pathlib.Path) -> Generator[LintingViolation, None, None]:
+        """
+        Lint a file and yield its violations including the violating lines, cached results are used when available
+        @param path: Path to the file to be linted
+        @return: Generator with all violations of rules in the file
+        """
+        profiler = self._file_manager.profiler
+        if profiler is None:
+            yield from self._file_violations(path)
+            return
+
+        with profiler.file(str(path)):
+            violations = list(self._file_violations(path))
+        yield from violations
+
+    def _file_violations(self, path: pathlib.Path) -> Generator[LintingViolation, None, None]:
+        """
+        Lint a file and yield its violations including the violating lines, cached results are used when available
+        @param path: Path to the file to be linted
+        @return: Generator with all violations of rules in the file
+        """
+        if self._result_cache is None:
+            yield from self._lint_violations(path)
+            return
+
+        matching_rules = self._matching_rules(path)
+        if len(matching_rules) == 0:
+            return
+
+        file = self._file_manager.get(path)
+        rules = self._applied_rules(file, matching_rules)
+        if len(rules) == 0:
+            return
+
+        key = self._result_cache.key(file.content_buffer, rules)
+        cached = self._result_cache.get(key)
+        if cached is None:
+            timeouts = len(self._file_manager.stats.timeouts)
+            violations = list(self._lint_violations(path, rules))
+            # Results of files with evaluations which timed out are incomplete
+            if len(self._file_manager.stats.timeouts) == timeouts:
+                self._result_cache.put(key, [(v.rule.name, v.lineno, v.line) for v in violations])
+            yield from violations
+            return
+
+        for rule_name, lineno, line in cached:
+            yield LintingViolation(path=path, lineno=lineno, line=line, rule=self._rules_by_name[rule_name])
+
+    def _lint_violations(
+        self, path: pathlib.Path, rules: Optional[List[Rule]] = None
+    ) -> Generator[LintingViolation, None, None]:
+        """
+        Lint a file and yield its violations including the violating lines
+        @param path: Path to the file to be linted
+        @param rules: Rules applied to the file, None to apply the rules matching its path and guarding its contents
+        @return: Generator with all violations of rules in the file
+        """
+        linting_results = list(self.lint_file(path, rules))
+        if len(linting_results) == 0:
+            return
+
+        file = self._file_manager.get(path)
+        with measure_stage(self._file_manager.profiler, STAGE_REPORT):
+            violations = [
+                LintingViolation(path=path, lineno=lineno, line=file.line(lineno), rule=rule)
+                for rule, lineno in linting_results
+            ]
+        yield from violations
@@ -5,11 +5,17 @@ Data models module
 import dataclasses
 import fnmatch
 import pathlib
-from typing import List, Union
+from typing import List, Optional, Union
 
 from navel.yaml_expr.glob import GlobExpr
 from navel.yaml_expr.yaml_expr import YamlExpr
 
+# How files are linted - by all rules, by regex rules only or not at all
+LINT_ALL = "lint"
+LINT_REGEX = "regex"
+LINT_SKIP = "skip"
+LINT_MODES = (LINT_ALL, LINT_REGEX, LINT_SKIP)
+
 
 @dataclasses.dataclass
 class Settings:
@@ -20,6 +26,11 @@ class Settings:
     included: List[Union[str, GlobExpr]]
     excluded: List[Union[str, GlobExpr]]
     allow_ignore: bool
+    # Files larger than this number of bytes or with more lines are linted by regex rules only, None for no limit
+    max_file_size: Optional[int] = None
+    max_lines: Optional[int] = None
+    # How files with a header marking them as generated are linted, one of LINT_MODES
+    generated: str = LINT_ALL
 
 
 @dataclasses.dataclass
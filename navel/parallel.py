@@ -0,0 +1,179 @@
+"""
+Module for linting files in parallel using a pool of worker processes
+"""
+
+import collections
+import itertools
+import multiprocessing
+import multiprocessing.pool
+import os
+import pathlib
+from typing import Deque, Dict, Generator, Iterable, List, Optional, Tuple
+
+from navel.budget import TimeBudget
+from navel.caching.ast_xml import XmlOmissions
+from navel.caching.file_manager import FileManager, FileManagerStats, FileSource
+from navel.caching.result_cache import ResultCache
+from navel.constants import JOBS_AUTO
+from navel.errors import LinterError
+from navel.linter import Linter
+from navel.models import LintingViolation, Rule
+from navel.profiling import Profiler
+
+# Minimal number of files per worker process, pool startup dominates the run time for fewer files
+MIN_FILES_PER_JOB = 16
+
+# Number of files sent to a worker at once, smaller chunks balance the load better
+CHUNKSIZE = 4
+
+# Number of chunks queued per worker process, files are taken from the paths to lint only when their chunk is queued
+QUEUED_CHUNKS_PER_JOB = 4
+
+# Violations as sent from the worker processes - name of the rule, line number and the line itself
+WorkerViolation = Tuple[str, int, str]
+# Results of linting a file in a worker process - the path, its violations, counters and measurements
+WorkerResult = Tuple[pathlib.Path, List[WorkerViolation], FileManagerStats, Optional[Profiler]]
+
+_WORKER_FILE_MANAGER: Optional[FileManager] = None
+_WORKER_LINTER: Optional[Linter] = None
+
+
+def resolve_jobs(jobs: str) -> int:
+    """
+    Resolve number of jobs from the CLI option value
+    @raise LinterError: When the value is not a positive number or `auto`
+    @param jobs: Positive number of jobs or `auto` to use all available CPUs
+    @return: Number of jobs
+    """
+    if jobs == JOBS_AUTO:
+        try:
+            return len(os.sched_getaffinity(0))
+        except AttributeError:
+            return os.cpu_count() or 1
+
+    try:
+        resolved = int(jobs)
+    except ValueError as exc:
+        raise LinterError(f"Number of jobs must be a positive number or `{JOBS_AUTO}`, got `{jobs}`") from exc
+    if resolved < 1:
+        raise LinterError(f"Number of jobs must be a positive number or `{JOBS_AUTO}`, got `{jobs}`")
+    return resolved
+
+
+def effective_jobs(jobs: int, files_count: int) -> int:
+    """
+    Get number of worker processes worth starting for the given amount of files
+    @param jobs: Requested number of jobs
+    @param files_count: Number of files to be linted
+    @return: Number of worker processes, 1 means linting should run serially in the current process
+    """
+    return max(1, min(jobs, files_count // MIN_FILES_PER_JOB))
+
+
+def _init_worker(  # pylint: disable=too-many-arguments
+    rules: List[Rule],
+    result_cache: Optional[ResultCache],
+    max_files: Optional[int],
+    profiler: Optional[Profiler],
+    source: Optional[FileSource],
+    xml_omissions: XmlOmissions,
+    mmap_min_size: Optional[int],
+    budget: Optional[TimeBudget],
+) -> None:
+    """
+    Initialize a worker process with its own FileManager and Linter
+    @param rules: List of rules to lint by
+    @param result_cache: Cache of linting results, None to disable caching
+    @param max_files: Maximal number of files cached by the FileManager of the worker
+    @param profiler: Empty profiler to be used by the worker, None to disable profiling
+    @param source: Source of file contents, None to read files from the file system
+    @param xml_omissions: Parts of XML trees omitted from the files
+    @param mmap_min_size: Size in bytes from which files are memory-mapped, None to read all files into memory
+    @param budget: Time budgets of evaluations of rules, None for no limits
+    """
+    global _WORKER_FILE_MANAGER, _WORKER_LINTER  # pylint: disable=global-statement
+    _WORKER_FILE_MANAGER = FileManager(max_files, profiler, source, xml_omissions, mmap_min_size)
+    _WORKER_LINTER = Linter(_WORKER_FILE_MANAGER, rules, result_cache, budget)
+
+
+def _lint_worker(path: pathlib.Path) -> WorkerResult:
+    """
+    Lint a file in a worker process
+    @param path: Path to the file to lint
+    @return: The path, list of violations found in the file, FileManager counters and measurements of linting the file
+    """
+    if _WORKER_FILE_MANAGER is None or _WORKER_LINTER is None:
+        raise LinterError("Worker process has not been initialized")
+
+    violations = [
+        (violation.rule.name, violation.lineno, violation.line) for violation in _WORKER_LINTER.file_violations(path)
+    ]
+    _WORKER_FILE_MANAGER.release(path)
+    profiler = _WORKER_FILE_MANAGER.profiler
+    return path, violations, _WORKER_FILE_MANAGER.reset_stats(), None if profiler is None else profiler.reset()
+
+
+def _lint_chunk(paths: List[pathlib.Path]) -> List[WorkerResult]:
+    """
+    Lint a chunk of files in a worker process
+    @param paths: Paths to the files to lint
+    @return: Results of linting the files in the same order
+    """
+    return [_lint_worker(path) for path in paths]
+
+
+def parallel_rules_violations(  # pylint: disable=too-many-arguments
+    filepaths: Iterable[pathlib.Path],
+    rules: List[Rule],
+    jobs: int,
+    result_cache: Optional[ResultCache] = None,
+    file_manager: Optional[FileManager] = None,
+    budget: Optional[TimeBudget] = None,
+) -> Generator[LintingViolation, None, None]:
+    """
+    Yield all violations of rules provided, files are linted by a pool of worker processes.
+    Violations are yielded in the same order as when linting serially.
+    @param filepaths: Files to lint, consumed lazily by the thread iterating the violations
+    @param rules: List of rules to lint by
+    @param jobs: Number of worker processes
+    @param result_cache: Cache of linting results, None to disable caching
+    @param file_manager: FileManager whose budget, profiling settings, source, omissions and mapping threshold are used
+    by the workers and which collects counters and measurements of the workers
+    @param budget: Time budgets of evaluations of rules, None for no limits, every worker disables rules on its own
+    @return: Generator with all violations of provided rules
+    """
+    if file_manager is None:
+        file_manager = FileManager()
+    rules_by_name: Dict[str, Rule] = {rule.name: rule for rule in rules}
+
+    profiler = file_manager.profiler
+    initargs = (
+        rules,
+        result_cache,
+        file_manager.max_entries,
+        None if profiler is None else Profiler(profiler.tracing),
+        file_manager.source,
+        file_manager.xml_omissions,
+        file_manager.mmap_min_size,
+        budget,
+    )
+    # Chunks are queued by this thread instead of `Pool.imap`, whose task handler thread would consume the paths
+    # concurrently with this thread, while the paths may be produced using the FileManager merging the counters
+    paths = iter(filepaths)
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=initargs) as pool:
+        queued: Deque["multiprocessing.pool.AsyncResult[List[WorkerResult]]"] = collections.deque()
+        while True:
+            while len(queued) < jobs * QUEUED_CHUNKS_PER_JOB:
+                chunk = list(itertools.islice(paths, CHUNKSIZE))
+                if len(chunk) == 0:
+                    break
+                queued.append(pool.apply_async(_lint_chunk, (chunk,)))
+            if len(queued) == 0:
+                break
+
+            for filepath, violations, stats, worker_profiler in queued.popleft().get():
+                file_manager.stats.merge(stats)
+                if profiler is not None and worker_profiler is not None:
+                    profiler.merge(worker_profiler)
+                for rule_name, lineno, line in violations:
+                    yield LintingViolation(path=filepath, lineno=lineno, line=line, rule=rules_by_name[rule_name])
@@ -3,24 +3,35 @@ Module related to all parsing operations
 """
 
 import ast
+import functools
+import io
 import pathlib
-from typing import Any, Dict, List, Optional, TextIO
+from typing import Any, Dict, List, Optional, TextIO, Tuple
 
 import yaml
 
 from navel.caching.file_manager import File
+from navel.caching.rule_cache import RuleCache, config_key
+from navel.constants import CONFIG_FILE_BELLYBUTTON, CONFIG_FILE_NAVEL
 from navel.errors import ParsingError
 from navel.models import Rule
 from navel.yaml_expr.glob import GlobExpr
 from navel.yaml_expr.regex import RegExExpr
 from navel.yaml_expr.settings import SettingsExpr
 from navel.yaml_expr.xpath import XPathExpr
-from navel.yaml_expr.yaml_expr import YamlExpr
+from navel.yaml_expr.yaml_expr import ConfigLoader, YamlExpr
 
-GlobExpr.add_to_yaml()
-RegExExpr.add_to_yaml()
-SettingsExpr.add_to_yaml()
-XPathExpr.add_to_yaml()
+# Modification time in nanoseconds and size of every config file of a project, None for missing files
+ConfigState = Tuple[Optional[Tuple[int, int]], ...]
+
+
+@functools.lru_cache(maxsize=None)
+def register_expressions() -> None:
+    """
+    Register all Yaml Expressions to the YAML loaders, done once before the first config is loaded
+    """
+    for expr in (GlobExpr, RegExExpr, SettingsExpr, XPathExpr):
+        expr.add_to_yaml()
 
 
 def validate_syntax(rule_clause: str) -> bool:
@@ -98,13 +109,38 @@ def parse_rule(
     )
 
 
-def load_config(stream: TextIO) -> List[Rule]:
+def _rename_marks(error: yaml.MarkedYAMLError, name: str) -> None:
+    """
+    Set name of the config in marks of a YAML error, the loader based on libyaml names marks after the stream only
+    @param error: Error whose marks are renamed
+    @param name: Name of the config, its path for config files
+    """
+    for attribute in ("context_mark", "problem_mark"):
+        mark = getattr(error, attribute)
+        if mark is not None:
+            setattr(error, attribute, yaml.Mark(name, mark.index, mark.line, mark.column, None, 0))
+
+
+def load_config(stream: TextIO, name: Optional[str] = None) -> List[Rule]:
     """
     Load config from TextIO stream in the form of a list of rules
     @param stream: Text stream to parse
+    @raise ParsingError: When the config is not valid YAML
+    @param name: Path of the config file globs are relative to, name of the stream by default
     @return: List of rules
     """
-    yml = yaml.load(stream, Loader=yaml.FullLoader)
+    register_expressions()
+    loader = ConfigLoader(stream)
+    if name is not None:
+        loader.name = name
+    try:
+        yml = loader.get_single_data()
+    except yaml.YAMLError as exc:
+        if isinstance(exc, yaml.MarkedYAMLError):
+            _rename_marks(exc, str(loader.name))
+        raise ParsingError(f"Invalid YAML: {exc}") from exc
+    finally:
+        loader.dispose()
     default_settings = yml.get("default_settings")
     if default_settings is not None and not isinstance(default_settings, SettingsExpr):
         raise ParsingError("Value of `default_settings` must be a !settings node.")
@@ -114,10 +150,54 @@ def load_config(stream: TextIO) -> List[Rule]:
     return rules
 
 
-def load_config_file(path: pathlib.Path) -> List[Rule]:
+def load_config_file(path: pathlib.Path, cache_directory: Optional[pathlib.Path] = None) -> List[Rule]:
     """
-    Load config from TextIO stream in the form of a list of rules
+    Load config from a file in the form of a list of rules
     @param path: File to read the config from
+    @param cache_directory: Cache directory to reuse rules of an unchanged config from, None to disable the caching
     @return: List of rules
     """
-    return load_config(path.open("r"))
+    if cache_directory is None:
+        with path.open("r") as stream:
+            return load_config(stream, str(path))
+
+    content = path.read_bytes()
+    rule_cache = RuleCache(cache_directory)
+    key = config_key(content, path)
+    rules = rule_cache.get(key)
+    if rules is None:
+        # Rules are parsed from the hashed content, so a concurrent change of the config can not be cached under it
+        rules = load_config(io.StringIO(content.decode("utf-8")), str(path))
+        rule_cache.put(key, rules)
+    return rules
+
+
+def project_config_file(project_directory: pathlib.Path) -> pathlib.Path:
+    """
+    Get the config file of a project, .bellybutton.yml takes precedence over .navel.yml
+    @raise ParsingError: When the project has no config file
+    @param project_directory: Path of the project
+    @return: Path of the config file
+    """
+    for name in (CONFIG_FILE_BELLYBUTTON, CONFIG_FILE_NAVEL):
+        config_file = project_directory / name
+        if config_file.exists():
+            return config_file
+    raise ParsingError(f"Uninitialized `{project_directory}` - config file not found")
+
+
+def config_state(project_directory: pathlib.Path) -> ConfigState:
+    """
+    Get state of the config files of a project used to detect their changes
+    @param project_directory: Path of the project
+    @return: Modification time and size of every config file, None for missing files
+    """
+    states: List[Optional[Tuple[int, int]]] = []
+    for name in (CONFIG_FILE_BELLYBUTTON, CONFIG_FILE_NAVEL):
+        try:
+            stat = (project_directory / name).stat()
+        except OSError:
+            states.append(None)
+            continue
+        states.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(states)
@@ -0,0 +1,252 @@
+"""
+Module for profiling linting runs
+"""
+
+import contextlib
+import dataclasses
+import json
+import os
+import threading
+import time
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+STAGE_READ = "read"
+STAGE_PARSE = "parse"
+STAGE_AST_TO_XML = "ast_to_xml"
+STAGE_TOKENIZE = "tokenize"
+STAGE_MATCH = "match"
+STAGE_REPORT = "report"
+
+# Kinds of measured entities
+KIND_STAGE = "stage"
+KIND_RULE = "rule"
+KIND_EXPR = "expr"
+KIND_FILE = "file"
+
+# Default number of the slowest rules and files in the report
+DEFAULT_TOP = 10
+
+# Kind and name of a measured entity
+TimingKey = Tuple[str, str]
+
+# Complete event of the Chrome trace format - name, category, start and duration in seconds, process and thread id
+TraceEvent = Tuple[str, str, float, float, int, int]
+
+
+@dataclasses.dataclass
+class Timing:
+    """
+    Accumulated wall time and number of calls of a measured entity
+    """
+
+    calls: int = 0
+    seconds: float = 0.0
+
+
+class Profiler:
+    """
+    Class accumulating wall time spent in stages of linting, by rules and by files
+
+    Time of nested measurements is not included in the time of the stage or rule enclosing them, so stages and rules
+    are attributed only the time spent in them directly. Time of files includes everything done for the file.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.timings: Dict[TimingKey, Timing] = {}
+        self.events: Optional[List[TraceEvent]] = [] if trace else None
+        # Time spent in nested measurements of every measurement in progress
+        self._nested: List[float] = []
+
+    @property
+    def tracing(self) -> bool:
+        """
+        Check if trace events are recorded
+        @return: True when trace events are recorded, False otherwise
+        """
+        return self.events is not None
+
+    def _add(self, key: TimingKey, seconds: float) -> None:
+        timing = self.timings.get(key)
+        if timing is None:
+            timing = self.timings[key] = Timing()
+        timing.calls += 1
+        timing.seconds += seconds
+
+    @contextlib.contextmanager
+    def _measure(self, name: str, category: str, keys: Tuple[TimingKey, ...]) -> Iterator[None]:
+        """
+        Measure time of a block exclusive of nested measurements
+        @param name: Name of the trace event
+        @param category: Category of the trace event
+        @param keys: Keys the exclusive time is accumulated to
+        """
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            exclusive = elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            for key in keys:
+                self._add(key, exclusive)
+            if self.events is not None:
+                self.events.append((name, category, start, elapsed, os.getpid(), threading.get_ident()))
+
+    def stage(self, stage: str) -> ContextManager[None]:
+        """
+        Measure a stage of linting
+        @param stage: Name of the stage
+        @return: Context manager measuring the block
+        """
+        return self._measure(stage, KIND_STAGE, ((KIND_STAGE, stage),))
+
+    def rule(self, rule_name: str, expr_type: str) -> ContextManager[None]:
+        """
+        Measure matching of a rule
+        @param rule_name: Name of the rule
+        @param expr_type: Type of the expression of the rule
+        @return: Context manager measuring the block
+        """
+        return self._measure(
+            rule_name, KIND_RULE, ((KIND_STAGE, STAGE_MATCH), (KIND_RULE, rule_name), (KIND_EXPR, expr_type))
+        )
+
+    @contextlib.contextmanager
+    def file(self, path: str) -> Iterator[None]:
+        """
+        Measure linting of a file including all stages of linting done for it
+        @param path: Path of the file
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._add((KIND_FILE, path), elapsed)
+            if self._nested:
+                self._nested[-1] += elapsed
+            if self.events is not None:
+                self.events.append((path, KIND_FILE, start, elapsed, os.getpid(), threading.get_ident()))
+
+    def merge(self, other: "Profiler") -> None:
+        """
+        Add measurements of other profiler to these
+        @param other: Profiler to be added
+        """
+        for key, timing in other.timings.items():
+            total = self.timings.get(key)
+            if total is None:
+                total = self.timings[key] = Timing()
+            total.calls += timing.calls
+            total.seconds += timing.seconds
+        if self.events is not None and other.events is not None:
+            self.events.extend(other.events)
+
+    def reset(self) -> "Profiler":
+        """
+        Reset the measurements
+        @return: Profiler with the measurements before the reset
+        """
+        profiler = Profiler(self.tracing)
+        profiler.timings, self.timings = self.timings, {}
+        if self.events is not None:
+            profiler.events, self.events = self.events, []
+        return profiler
+
+    def top(self, kind: str, count: Optional[int] = None) -> List[Tuple[str, Timing]]:
+        """
+        Get the slowest measured entities of a kind
+        @param kind: Kind of the entities
+        @param count: Maximal number of the entities, None for all of them
+        @return: List of names of the entities and their timings, the slowest first
+        """
+        timings = sorted(
+            ((name, timing) for (timing_kind, name), timing in self.timings.items() if timing_kind == kind),
+            key=lambda x: (-x[1].seconds, x[0]),
+        )
+        return timings if count is None else timings[:count]
+
+    def report(self, count: int = DEFAULT_TOP) -> List[str]:
+        """
+        Format a human-readable report of the slowest stages, expression types, rules and files
+        @param count: Number of the slowest rules and files
+        @return: Lines of the report
+        """
+        sections = (
+            ("Stages", KIND_STAGE, None),
+            ("Expression types", KIND_EXPR, None),
+            (f"Slowest rules (top {count})", KIND_RULE, count),
+            (f"Slowest files (top {count})", KIND_FILE, count),
+        )
+        lines: List[str] = []
+        for title, kind, kind_count in sections:
+            lines.append(f"{title}:")
+            lines.extend(
+                f"  {timing.seconds * 1000:10.2f} ms {timing.calls:8} calls  {name}"
+                for name, timing in self.top(kind, kind_count)
+            )
+        return lines
+
+    def to_json(self) -> Dict[str, Any]:
+        """
+        Get the measurements in a JSON serializable form
+        @return: Mapping of kinds to mappings of names to their timings
+        """
+        data: Dict[str, Any] = {kind: {} for kind in (KIND_STAGE, KIND_EXPR, KIND_RULE, KIND_FILE)}
+        for (kind, name), timing in sorted(self.timings.items()):
+            data[kind][name] = {"calls": timing.calls, "seconds": timing.seconds}
+        return data
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Get the recorded events in the Chrome trace format, viewable in chrome://tracing or Perfetto
+        @return: Trace in the JSON object format
+        """
+        events = self.events or []
+        origin = min((start for _, _, start, _, _, _ in events), default=0.0)
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": (start - origin) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": pid,
+                    "tid": tid,
+                }
+                for name, category, start, duration, pid, tid in events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def dumps(self, chrome_trace: bool) -> str:
+        """
+        Serialize the measurements
+        @param chrome_trace: Serialize the recorded events in the Chrome trace format instead of the timings
+        @return: JSON string
+        """
+        return json.dumps(self.to_chrome_trace() if chrome_trace else self.to_json(), indent=2)
+
+
+def measure_stage(profiler: Optional[Profiler], stage: str) -> ContextManager[None]:
+    """
+    Measure a stage of linting when profiling is enabled
+    @param profiler: Profiler to measure with, None when profiling is disabled
+    @param stage: Name of the stage
+    @return: Context manager measuring the block, doing nothing when profiling is disabled
+    """
+    return contextlib.nullcontext() if profiler is None else profiler.stage(stage)
+
+
+def measure_rule(profiler: Optional[Profiler], rule_name: str, expr: object) -> ContextManager[None]:
+    """
+    Measure matching of a rule when profiling is enabled
+    @param profiler: Profiler to measure with, None when profiling is disabled
+    @param rule_name: Name of the rule
+    @param expr: Expression of the rule
+    @return: Context manager measuring the block, doing nothing when profiling is disabled
+    """
+    return contextlib.nullcontext() if profiler is None else profiler.rule(rule_name, type(expr).__name__)
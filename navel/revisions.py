@@ -0,0 +1,158 @@
+"""
+Module for linting files as they are in git revisions, read directly from the object store without a checkout
+"""
+
+import collections
+import dataclasses
+import pathlib
+from typing import Callable, Counter, Dict, Generator, Iterable, List, Optional, Tuple
+
+from navel.caching.ast_xml import XmlOmissions
+from navel.caching.file_manager import FileManager, FileManagerStats
+from navel.constants import DEFAULT_MAX_ENTRIES
+from navel.git import RevisionSource, tree_blobs
+from navel.models import LintingViolation, Rule
+from navel.profiling import Profiler
+from navel.rule_set import PathMatcher, rules_xml_omissions
+
+# Key of linting results of a file - hash of its blob and names of the rules matching its path
+BlobKey = Tuple[str, Tuple[str, ...]]
+
+# Violation as compared with the baseline revision - name of the rule and the violating line without surrounding
+# whitespace, line numbers are left out as they shift whenever lines above the violation change
+RevisionViolationKey = Tuple[str, str]
+
+# Function linting files read by a FileManager
+LintFunction = Callable[[List[pathlib.Path], FileManager], Iterable[LintingViolation]]
+
+
+def revision_violation_key(violation: LintingViolation) -> RevisionViolationKey:
+    """
+    Get key a violation is compared with violations of the baseline revision by
+    @param violation: Violation
+    @return: Key of the violation
+    """
+    return violation.rule.name, violation.line.strip()
+
+
+class RevisionLinter:  # pylint: disable=too-many-instance-attributes
+    """
+    Class linting files as they are in git revisions
+
+    Results are kept by the hashes of blobs, so contents shared by several paths or revisions are linted only once.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        directory: pathlib.Path,
+        rules: List[Rule],
+        lint: LintFunction,
+        max_cached_files: Optional[int] = DEFAULT_MAX_ENTRIES,
+        profiler: Optional[Profiler] = None,
+    ):
+        self._directory: pathlib.Path = directory
+        self._path_matcher: PathMatcher = PathMatcher(rules)
+        self._xml_omissions: XmlOmissions = rules_xml_omissions(rules)
+        self._lint: LintFunction = lint
+        self._max_cached_files: Optional[int] = max_cached_files
+        self._profiler: Optional[Profiler] = profiler
+        self._results: Dict[BlobKey, List[LintingViolation]] = {}
+        self.stats: FileManagerStats = FileManagerStats()
+        self.files_count: int = 0
+
+    def blob_keys(self, revision: str) -> Dict[pathlib.Path, BlobKey]:
+        """
+        Get keys of linting results of files in a revision
+        @raise GitError: When the revision does not exist
+        @param revision: Revision
+        @return: Mapping of paths of files matched by any rule to keys of their results
+        """
+        keys: Dict[pathlib.Path, BlobKey] = {}
+        for path, blob in tree_blobs(self._directory, revision).items():
+            rules = self._path_matcher.match(path)
+            if rules:
+                keys[path] = (blob, tuple(rule.name for rule in rules))
+        return keys
+
+    def _lint_blobs(self, revision: str, keys: Dict[pathlib.Path, BlobKey]) -> None:
+        """
+        Lint blobs of files in a revision which have not been linted yet, one path of every blob is linted
+        @raise GitError: When the files can not be read from git
+        @param revision: Revision of the files
+        @param keys: Mapping of paths of the files to keys of their results
+        """
+        pending: Dict[BlobKey, pathlib.Path] = {}
+        for path, key in keys.items():
+            if key not in self._results:
+                pending.setdefault(key, path)
+        if len(pending) == 0:
+            return
+
+        keys_by_path = {path: key for key, path in pending.items()}
+        results: Dict[BlobKey, List[LintingViolation]] = {key: [] for key in pending}
+        source = RevisionSource(self._directory, revision)
+        file_manager = FileManager(self._max_cached_files, self._profiler, source, self._xml_omissions)
+        try:
+            for violation in self._lint(list(keys_by_path), file_manager):
+                results[keys_by_path[violation.path]].append(violation)
+        finally:
+            source.close()
+
+        self.stats.merge(file_manager.stats)
+        self._results.update(results)
+
+    def _violations(self, revision: str, keys: Dict[pathlib.Path, BlobKey]) -> Generator[LintingViolation, None, None]:
+        """
+        Yield violations of files in a revision
+        @raise GitError: When the files can not be read from git
+        @param revision: Revision of the files
+        @param keys: Mapping of paths of the files to keys of their results
+        @return: Generator with violations of the files, ordered by paths
+        """
+        self._lint_blobs(revision, keys)
+        for path, key in sorted(keys.items()):
+            for violation in self._results[key]:
+                yield violation if violation.path == path else dataclasses.replace(violation, path=path)
+
+    def violations(self, revision: str) -> Generator[LintingViolation, None, None]:
+        """
+        Yield violations of all files in a revision
+        @raise GitError: When the files can not be read from git
+        @param revision: Revision to lint
+        @return: Generator with violations of the files, ordered by paths
+        """
+        keys = self.blob_keys(revision)
+        self.files_count = len(keys)
+        yield from self._violations(revision, keys)
+
+    def new_violations(self, revision: str, baseline_revision: str) -> Generator[LintingViolation, None, None]:
+        """
+        Yield violations of files in a revision which are not present in a baseline revision
+
+        Files whose blobs are in the baseline under the same rules, even at another path, have no new violations
+        and are not linted. Other files are linted in both revisions and their violations are compared by rules
+        and violating lines, so violations moved to other lines of the same file are not new.
+        @raise GitError: When the files can not be read from git
+        @param revision: Revision to lint
+        @param baseline_revision: Revision with known violations
+        @return: Generator with new violations, ordered by paths
+        """
+        keys = self.blob_keys(revision)
+        baseline_keys = self.blob_keys(baseline_revision)
+        known_keys = frozenset(baseline_keys.values())
+        changed_keys = {path: key for path, key in keys.items() if key not in known_keys}
+        self.files_count = len(changed_keys)
+
+        known: Dict[pathlib.Path, Counter[RevisionViolationKey]] = {}
+        for violation in self._violations(
+            baseline_revision, {path: baseline_keys[path] for path in changed_keys if path in baseline_keys}
+        ):
+            known.setdefault(violation.path, collections.Counter())[revision_violation_key(violation)] += 1
+
+        for violation in self._violations(revision, changed_keys):
+            counter = known.get(violation.path)
+            key = revision_violation_key(violation)
+            if counter is not None and counter[key] > 0:
+                counter[key] -= 1
+                continue
+            yield violation
@@ -0,0 +1,165 @@
+"""
+Module compiling rule sets for their fast repeated use
+"""
+
+import fnmatch
+import os
+import pathlib
+import re
+from typing import Dict, FrozenSet, Generator, Iterable, List, Pattern, Sequence, Tuple, Union
+
+import lxml.etree
+
+from navel.caching.ast_xml import XmlOmissions
+from navel.caching.file_manager import File
+from navel.models import Rule
+from navel.yaml_expr.glob import GlobExpr
+from navel.yaml_expr.xpath import XPathExpr, xml_omissions
+
+# Indices of patterns included and excluded by a settings group
+SettingsKey = Tuple[Tuple[int, ...], Tuple[int, ...]]
+
+
+def pattern_str(pattern: Union[str, GlobExpr]) -> str:
+    """
+    Get string glob pattern of an included or excluded pattern
+    @param pattern: Pattern from Settings
+    @return: Glob pattern as a string
+    """
+    return str(pattern.glob if isinstance(pattern, GlobExpr) else pattern)
+
+
+class PathMatcher:
+    """
+    Class matching paths against included and excluded patterns of all rules at once
+
+    Every distinct pattern is compiled once and evaluated at most once per path, rules sharing the same settings
+    are decided together. Patterns matching every path in a directory are found once per directory.
+    """
+
+    def __init__(self, rules: Sequence[Rule]):
+        sorted_rules = sorted(rules, key=lambda x: x.name)
+        pattern_indices: Dict[str, int] = {}
+        groups: Dict[SettingsKey, List[Rule]] = {}
+        for rule in sorted_rules:
+            key = (
+                tuple(
+                    pattern_indices.setdefault(pattern_str(pattern), len(pattern_indices))
+                    for pattern in rule.settings.included
+                ),
+                tuple(
+                    pattern_indices.setdefault(pattern_str(pattern), len(pattern_indices))
+                    for pattern in rule.settings.excluded
+                ),
+            )
+            groups.setdefault(key, []).append(rule)
+
+        self._patterns: List[str] = [os.path.normcase(pattern) for pattern in pattern_indices]
+        self._regexes: List[Pattern[str]] = [re.compile(fnmatch.translate(pattern)) for pattern in self._patterns]
+        self._groups: List[Tuple[SettingsKey, List[Rule]]] = list(groups.items())
+        self._order: Dict[str, int] = {rule.name: index for index, rule in enumerate(sorted_rules)}
+        self._directories: Dict[str, Tuple[FrozenSet[int], Tuple[int, ...]]] = {}
+        # Rules sorted by their names for every combination of matched settings groups
+        self._plans: Dict[Tuple[int, ...], List[Rule]] = {}
+
+    def _directory_patterns(self, directory: str) -> Tuple[FrozenSet[int], Tuple[int, ...]]:
+        """
+        Split patterns to those matching every path in a directory and those to be evaluated for every path
+        @param directory: Directory of the path
+        @return: Indices of patterns matching every path in the directory and indices of undecided patterns
+        """
+        try:
+            return self._directories[directory]
+        except KeyError:
+            pass
+
+        # A pattern ending with `*` matching the directory with a trailing separator matches all paths inside it
+        directory_prefix = os.path.join(directory, "")
+        matching = frozenset(
+            index
+            for index, pattern in enumerate(self._patterns)
+            if pattern.endswith("*") and self._regexes[index].match(directory_prefix)
+        )
+        undecided = tuple(index for index in range(len(self._patterns)) if index not in matching)
+        self._directories[directory] = (matching, undecided)
+        return matching, undecided
+
+    def match(self, path: pathlib.Path) -> List[Rule]:
+        """
+        Get rules matching a path, the list is shared by all paths matched by the same rules and must not be modified
+        @param path: Path to be matched
+        @return: List of rules matching the path sorted by their names
+        """
+        path_str = os.path.normcase(str(path))
+        matching, undecided = self._directory_patterns(os.path.dirname(path_str))
+        matched = matching.union(index for index in undecided if self._regexes[index].match(path_str))
+
+        groups = tuple(
+            group_index
+            for group_index, ((included, excluded), _) in enumerate(self._groups)
+            if any(index in matched for index in included) and not any(index in matched for index in excluded)
+        )
+        try:
+            return self._plans[groups]
+        except KeyError:
+            pass
+
+        rules = [rule for group_index in groups for rule in self._groups[group_index][1]]
+        rules.sort(key=lambda x: self._order[x.name])
+        self._plans[groups] = rules
+        return rules
+
+    def plan(self, paths: Iterable[pathlib.Path]) -> Generator[pathlib.Path, None, None]:
+        """
+        Yield paths matched by any rule, paths of files no rule applies to are dropped without touching the files
+        @param paths: Paths to be planned
+        @return: Generator of paths to be linted
+        """
+        for path in paths:
+            if self.match(path):
+                yield path
+
+
+def rules_xml_omissions(rules: Iterable[Rule]) -> XmlOmissions:
+    """
+    Get parts of XML trees no XPath expression of the rules refers to
+    @param rules: Rules to be linted by
+    @return: Fields and attributes to omit from XML trees of linted files
+    """
+    return xml_omissions(rule.expr.path for rule in rules if isinstance(rule.expr, XPathExpr))
+
+
+class XPathIndex:
+    """
+    Class collecting candidate elements of all XPath rules in a single walk of the XML tree of a file
+
+    XPath rules selecting descendants by an element name are evaluated only on parents of elements of that name.
+    """
+
+    def __init__(self, rules: Sequence[Rule]):
+        self._tags: Tuple[str, ...] = tuple(
+            sorted(
+                {
+                    tag
+                    for rule in rules
+                    if isinstance(rule.expr, XPathExpr) and rule.expr.indexed_tags is not None
+                    for tag in rule.expr.indexed_tags
+                }
+            )
+        )
+
+    def candidate_parents(self, file: File) -> Dict[str, List[lxml.etree._Element]]:
+        """
+        Get parents of elements with names needed by the indexed XPath rules
+        @param file: File to get the elements from
+        @return: Mapping of element names to parents of elements with the name, the root element is excluded
+        """
+        if not self._tags:
+            return {}
+
+        parents: Dict[str, Dict[lxml.etree._Element, None]] = {}
+        for element in file.xml.iter(*self._tags):
+            parent = element.getparent()
+            if parent is not None:
+                parents.setdefault(element.tag, {})[parent] = None
+        return {tag: list(tag_parents) for tag, tag_parents in parents.items()}
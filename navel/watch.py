@@ -0,0 +1,547 @@
+"""
+Module for watching a project and re-linting files as they change
+"""
+
+import abc
+import collections
+import ctypes
+import ctypes.util
+import dataclasses
+import errno
+import hashlib
+import os
+import pathlib
+import select
+import struct
+import sys
+import time
+from types import TracebackType
+from typing import Callable, Dict, FrozenSet, Generator, Iterable, List, Optional, Set, Tuple, Type
+
+from navel.caching.file_manager import FileManager
+from navel.constants import CONFIG_FILE_BELLYBUTTON, CONFIG_FILE_NAVEL, DEFAULT_MAX_ENTRIES, POLL_INTERVAL
+from navel.discovery import GITIGNORE_FILE, PYTHON_FILE_EXTENSION, FileDiscovery, ScannedDirectory
+from navel.errors import NavelError
+from navel.linter import Linter
+from navel.models import LintingViolation, Rule
+from navel.parsing import ConfigState, config_state
+from navel.rule_set import PathMatcher, rules_xml_omissions
+
+# Events of inotify, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# Events of watched directories signalling that a file in the directory has been written, created, moved or removed
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# Header of an inotify event - watch descriptor, mask, cookie and length of the name following the header
+INOTIFY_EVENT = struct.Struct("iIII")
+
+INOTIFY_BUFFER_SIZE = 64 * 1024
+
+# Time in seconds to wait for further events after the first one, editors often write a file in several steps
+DEBOUNCE_DELAY = 0.02
+
+# Names of files in watched directories which do not end with the Python file extension but are relevant
+RELEVANT_FILE_NAMES = frozenset((GITIGNORE_FILE, CONFIG_FILE_NAVEL, CONFIG_FILE_BELLYBUTTON))
+
+# Violations as compared between runs - name of the rule and the violating line without surrounding whitespace,
+# line numbers are left out as they shift whenever lines above the violation change
+ViolationKey = Tuple[str, str]
+
+# State of a file used to detect its changes - modification time in nanoseconds, size and hash of the contents
+FileState = Tuple[int, int, str]
+
+
+class Watcher(abc.ABC):
+    """
+    Abstract class for watchers of changes in directories
+    """
+
+    @abc.abstractmethod
+    def watch(self, directory: str) -> None:
+        """
+        Start watching a directory, its subdirectories are not watched
+        @param directory: Directory to be watched
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def unwatch(self, directory: str) -> None:
+        """
+        Stop watching a directory
+        @param directory: Directory not to be watched anymore
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        """
+        Wait for changes in watched directories
+        @param timeout: Maximal time to wait in seconds, None to wait indefinitely
+        @return: Directories with changed entries, None when the whole tree may have changed and has to be rescanned
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Release resources held by the watcher
+        """
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class InotifyWatcher(Watcher):
+    """
+    Class watching directories using inotify of the Linux kernel
+    """
+
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is available only on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd: int = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._directories: Dict[int, str] = {}
+        self._descriptors: Dict[str, int] = {}
+
+    def watch(self, directory: str) -> None:
+        descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if descriptor < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                # The directory has been removed in the meantime
+                return
+            raise OSError(error, os.strerror(error), directory)
+        self._directories[descriptor] = directory
+        self._descriptors[directory] = descriptor
+
+    def unwatch(self, directory: str) -> None:
+        descriptor = self._descriptors.pop(directory, None)
+        if descriptor is not None:
+            del self._directories[descriptor]
+            self._libc.inotify_rm_watch(self._fd, descriptor)
+
+    def _read_events(self, changed: Set[str]) -> bool:
+        """
+        Read pending events
+        @param changed: Set the directories with relevant changes are added to
+        @return: True when the event queue has overflown and events have been lost, False otherwise
+        """
+        try:
+            data = os.read(self._fd, INOTIFY_BUFFER_SIZE)
+        except BlockingIOError:
+            return False
+
+        overflow = False
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + INOTIFY_EVENT.size : offset + INOTIFY_EVENT.size + length].rstrip(b"\0"))
+            offset += INOTIFY_EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+            directory = self._directories.get(descriptor)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # The directory has been removed, the kernel has removed the watch
+                del self._directories[descriptor], self._descriptors[directory]
+            elif mask & IN_ISDIR or name.endswith(PYTHON_FILE_EXTENSION) or name in RELEVANT_FILE_NAMES:
+                changed.add(directory)
+                overflow = overflow or name == GITIGNORE_FILE
+        return overflow
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        changed: Set[str] = set()
+        overflow = False
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        deadline = time.monotonic() + DEBOUNCE_DELAY
+        while readable:
+            overflow = self._read_events(changed) or overflow
+            readable, _, _ = select.select([self._fd], [], [], max(0.0, deadline - time.monotonic()))
+        # Changes of .gitignore files may affect whole subtrees, so they are handled as lost events
+        return None if overflow else changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(Watcher):
+    """
+    Class watching directories by rescanning them periodically, used where inotify is not available
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL) -> None:
+        self._interval: float = interval
+        self._directories: Set[str] = set()
+
+    def watch(self, directory: str) -> None:
+        self._directories.add(directory)
+
+    def unwatch(self, directory: str) -> None:
+        self._directories.discard(directory)
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        time.sleep(self._interval if timeout is None else min(timeout, self._interval))
+        return set(self._directories)
+
+
+def create_watcher() -> Watcher:
+    """
+    Create the most efficient watcher available
+    @return: InotifyWatcher if inotify is available, PollingWatcher otherwise
+    """
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError):
+        return PollingWatcher()
+
+
+def _violation_key(violation: LintingViolation) -> ViolationKey:
+    """
+    Get key a violation is compared with violations of the previous run by
+    @param violation: Violation
+    @return: Key of the violation
+    """
+    return violation.rule.name, violation.line.strip()
+
+
+def _unmatched_violations(
+    violations: List[LintingViolation], others: List[LintingViolation]
+) -> Generator[LintingViolation, None, None]:
+    """
+    Yield violations with no counterpart among other violations, every other violation is a counterpart of one at most
+    @param violations: Violations to be matched
+    @param others: Violations to match them with
+    @return: Generator of the unmatched violations
+    """
+    counts = collections.Counter(_violation_key(violation) for violation in others)
+    for violation in violations:
+        key = _violation_key(violation)
+        if counts[key] > 0:
+            counts[key] -= 1
+        else:
+            yield violation
+
+
+@dataclasses.dataclass
+class WatchDelta:
+    """
+    Changes of violations after an update of the watched project
+    """
+
+    new: List[LintingViolation] = dataclasses.field(default_factory=list)
+    fixed: List[LintingViolation] = dataclasses.field(default_factory=list)
+    errors: List[str] = dataclasses.field(default_factory=list)
+    linted_files: int = 0
+    rules_reloaded: bool = False
+    # Time taken by the update in seconds
+    seconds: float = 0.0
+
+
+def _rule_fingerprints(rules: Iterable[Rule]) -> Dict[str, str]:
+    """
+    Get fingerprints of rules, any change to a rule changes its fingerprint
+    @param rules: Rules to fingerprint
+    @return: Mapping of rule names to their fingerprints
+    """
+    return {rule.name: repr(rule) for rule in rules}
+
+
+class WatchSession:  # pylint: disable=too-many-instance-attributes
+    """
+    Class keeping rules, parsed files and violations of a project between its changes
+
+    Only files whose modification time or size changed are read again, and only files whose contents changed are
+    linted again. When the config changes, only files matched by added, changed or removed rules are linted again.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        project_directory: pathlib.Path,
+        load_rules: Callable[[], List[Rule]],
+        watcher: Watcher,
+        respect_gitignore: bool = True,
+        max_cached_files: Optional[int] = DEFAULT_MAX_ENTRIES,
+    ):
+        self._project_directory: pathlib.Path = project_directory
+        self._load_rules: Callable[[], List[Rule]] = load_rules
+        self._watcher: Watcher = watcher
+        self._respect_gitignore: bool = respect_gitignore
+        self._file_manager: FileManager = FileManager(max_cached_files)
+
+        self._config_state: ConfigState = config_state(project_directory)
+        # State of the last config which failed to load, so it is reported only once
+        self._invalid_config_state: Optional[ConfigState] = None
+        self._set_rules(load_rules())
+
+        self._directories: Dict[str, ScannedDirectory] = {}
+        # Directories of all watched files
+        self._file_directories: Dict[pathlib.Path, str] = {}
+        self._file_states: Dict[pathlib.Path, Optional[FileState]] = {}
+        self._violations: Dict[pathlib.Path, List[LintingViolation]] = {}
+
+    @property
+    def rules(self) -> List[Rule]:
+        """
+        Get the currently used rules
+        @return: List of rules
+        """
+        return self._rules
+
+    @property
+    def files_count(self) -> int:
+        """
+        Get number of watched files
+        @return: Number of watched files
+        """
+        return len(self._file_directories)
+
+    @property
+    def violations_count(self) -> int:
+        """
+        Get number of current violations in all watched files
+        @return: Number of violations
+        """
+        return sum(len(violations) for violations in self._violations.values())
+
+    def _set_rules(self, rules: List[Rule]) -> None:
+        self._rules: List[Rule] = rules
+        self._file_manager.set_xml_omissions(rules_xml_omissions(rules))
+        self._linter: Linter = Linter(self._file_manager, rules)
+        self._path_matcher: PathMatcher = PathMatcher(rules)
+        self._discovery: FileDiscovery = FileDiscovery(rules, respect_gitignore=self._respect_gitignore)
+
+    def start(self) -> WatchDelta:
+        """
+        Scan and lint the whole project, all violations are reported as new
+        @return: Violations found in the project
+        """
+        return self._relint(self._rescan_tree(), frozenset())
+
+    def update(self, changed_directories: Optional[Set[str]]) -> WatchDelta:
+        """
+        Lint files changed since the last update
+        @param changed_directories: Directories with changed entries, None to rescan the whole project
+        @return: New and fixed violations
+        """
+        current_config_state = config_state(self._project_directory)
+        if current_config_state not in (self._config_state, self._invalid_config_state):
+            return self._reload_rules(current_config_state)
+
+        if changed_directories is None:
+            return self._relint(self._rescan_tree(), frozenset())
+
+        paths: Set[pathlib.Path] = set()
+        for directory in sorted(changed_directories):
+            paths.update(self._rescan_directory(directory))
+        return self._relint(paths, frozenset())
+
+    def _reload_rules(self, current_config_state: ConfigState) -> WatchDelta:
+        """
+        Reload the rules and lint files affected by the changed rules, an invalid config keeps the previous rules
+        @param current_config_state: State of the config the rules are loaded from
+        @return: New and fixed violations
+        """
+        try:
+            rules = self._load_rules()
+        except (NavelError, OSError) as exc:
+            self._invalid_config_state = current_config_state
+            return WatchDelta(errors=[f"Can not reload rules: {exc}"])
+        self._config_state = current_config_state
+        self._invalid_config_state = None
+
+        old_fingerprints = _rule_fingerprints(self._rules)
+        new_fingerprints = _rule_fingerprints(rules)
+        changed_rules = frozenset(
+            name
+            for name in old_fingerprints.keys() | new_fingerprints.keys()
+            if old_fingerprints.get(name) != new_fingerprints.get(name)
+        )
+
+        old_path_matcher = self._path_matcher
+        self._set_rules(rules)
+        paths = self._rescan_tree()
+        forced = frozenset(
+            path
+            for path in paths
+            if any(rule.name in changed_rules for rule in old_path_matcher.match(path))
+            or any(rule.name in changed_rules for rule in self._path_matcher.match(path))
+        )
+
+        delta = self._relint(paths, forced)
+        delta.rules_reloaded = True
+        return delta
+
+    def _add_directory(self, scanned: ScannedDirectory) -> None:
+        previous = self._directories.get(scanned.path)
+        if previous is None:
+            self._watcher.watch(scanned.path)
+        else:
+            for path in previous.files:
+                del self._file_directories[path]
+        self._directories[scanned.path] = scanned
+        self._file_directories.update((path, scanned.path) for path in scanned.files)
+
+    def _forget_directory(self, directory: str) -> Set[pathlib.Path]:
+        """
+        Stop watching a directory, its subdirectories are kept
+        @param directory: Directory not to be watched anymore
+        @return: Paths of files which have been in the directory
+        """
+        scanned = self._directories.pop(directory, None)
+        if scanned is None:
+            return set()
+        self._watcher.unwatch(directory)
+        for path in scanned.files:
+            del self._file_directories[path]
+        return set(scanned.files)
+
+    def _remove_directory(self, directory: str) -> Set[pathlib.Path]:
+        """
+        Stop watching a directory and its subdirectories
+        @param directory: Directory not to be watched anymore
+        @return: Paths of files which have been in the directory and its subdirectories
+        """
+        scanned = self._directories.get(directory)
+        if scanned is None:
+            return set()
+        paths = self._forget_directory(directory)
+        for subdirectory, _ in scanned.subdirectories:
+            paths.update(self._remove_directory(subdirectory))
+        return paths
+
+    def _rescan_tree(self) -> Set[pathlib.Path]:
+        """
+        Scan the whole project again
+        @return: Paths of all files which have been or are now watched
+        """
+        paths = set(self._file_directories)
+        scanned_directories = list(self._discovery.scan_tree(self._project_directory))
+        current = {scanned.path for scanned in scanned_directories}
+        for directory in set(self._directories) - current:
+            self._forget_directory(directory)
+        for scanned in scanned_directories:
+            self._add_directory(scanned)
+            paths.update(scanned.files)
+        return paths
+
+    def _rescan_directory(self, directory: str) -> Set[pathlib.Path]:
+        """
+        Scan a single directory again, new subdirectories are scanned recursively
+        @param directory: Directory to be scanned
+        @return: Paths of files which have been or are now in the directory or its new or removed subdirectories
+        """
+        previous = self._directories.get(directory)
+        if previous is None:
+            return set()
+        if not os.path.isdir(directory):
+            return self._remove_directory(directory)
+
+        paths = set(previous.files)
+        scanned = self._discovery.scan(directory, previous.gitignores)
+        self._add_directory(scanned)
+        paths.update(scanned.files)
+
+        previous_subdirectories = {subdirectory for subdirectory, _ in previous.subdirectories}
+        current_subdirectories = {subdirectory for subdirectory, _ in scanned.subdirectories}
+        for subdirectory in previous_subdirectories - current_subdirectories:
+            paths.update(self._remove_directory(subdirectory))
+        for subdirectory, gitignores in scanned.subdirectories:
+            if subdirectory not in previous_subdirectories:
+                for scanned_subdirectory in self._discovery.scan_subtree(subdirectory, gitignores):
+                    self._add_directory(scanned_subdirectory)
+                    paths.update(scanned_subdirectory.files)
+        return paths
+
+    def _relint(self, paths: Iterable[pathlib.Path], forced: FrozenSet[pathlib.Path]) -> WatchDelta:
+        """
+        Lint files which have changed
+        @param paths: Paths of files which may have changed, been added or removed
+        @param forced: Paths of files to be linted even when they have not changed
+        @return: New and fixed violations
+        """
+        delta = WatchDelta()
+        for path in sorted(paths):
+            if path not in self._file_directories:
+                self._file_states.pop(path, None)
+                self._file_manager.release(path)
+                delta.fixed.extend(self._violations.pop(path, []))
+                continue
+
+            state = self._file_states.get(path)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path not in forced and state is not None and state[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+
+            self._file_manager.release(path)
+            digest = hashlib.sha256(self._file_manager.get(path).content_bytes).hexdigest()
+            self._file_states[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            if path not in forced and state is not None and state[2] == digest:
+                continue
+
+            try:
+                violations = list(self._linter.file_violations(path))
+            except (SyntaxError, ValueError) as exc:
+                delta.errors.append(f"{path}: {exc}")
+                continue
+            delta.linted_files += 1
+
+            previous = self._violations.get(path, [])
+            delta.new.extend(_unmatched_violations(violations, previous))
+            delta.fixed.extend(_unmatched_violations(previous, violations))
+            # Violations are kept with their current line numbers even when they have only moved
+            self._violations[path] = violations
+        return delta
+
+
+def watch_loop(
+    session: WatchSession, watcher: Watcher, on_delta: Callable[[WatchDelta], None], iterations: Optional[int] = None
+) -> None:
+    """
+    Lint the project and keep linting its changes
+    @param session: Session of the watched project
+    @param watcher: Watcher used by the session
+    @param on_delta: Callback receiving the initial violations and every change of violations
+    @param iterations: Maximal number of waits for changes, None to watch indefinitely
+    """
+    start = time.perf_counter()
+    delta = session.start()
+    delta.seconds = time.perf_counter() - start
+    on_delta(delta)
+
+    waits = 0
+    while iterations is None or waits < iterations:
+        waits += 1
+        changed = watcher.wait()
+        if changed is not None and not changed:
+            continue
+        start = time.perf_counter()
+        delta = session.update(changed)
+        delta.seconds = time.perf_counter() - start
+        if delta.new or delta.fixed or delta.errors or delta.rules_reloaded:
+            on_delta(delta)
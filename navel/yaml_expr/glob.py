@@ -11,10 +11,9 @@ import yaml
 
 from navel.caching.file_manager import File
 from navel.errors import ExprError
-from navel.yaml_expr.yaml_expr import YamlExpr, yaml_add
+from navel.yaml_expr.yaml_expr import YamlExpr
 
 
-@yaml_add
 class GlobExpr(YamlExpr):
     """
     Construct and parse glob expressions in YAML
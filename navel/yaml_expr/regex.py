@@ -2,18 +2,16 @@
 Module for the custom RegExp Yaml Expression
 """
 
-import bisect
 import re
-from typing import List
+from typing import List, Optional
 
 import yaml
 
 from navel.caching.file_manager import File
 from navel.errors import ExprError
-from navel.yaml_expr.yaml_expr import YamlExpr, yaml_add
+from navel.yaml_expr.yaml_expr import YamlExpr
 
 
-@yaml_add
 class RegExExpr(YamlExpr):
     """
     Construct and parse RegEx expressions in YAML
@@ -22,6 +20,9 @@ class RegExExpr(YamlExpr):
     !regex .*
     Output:
     re.Pattern(/.*/m)
+
+    An ASCII pattern is compiled for bytes too, so memory-mapped ASCII files are scanned without being decoded.
+    Both patterns match the same on ASCII text.
     """
 
     def __init__(self, loader: yaml.Loader, node: yaml.ScalarNode):
@@ -34,14 +35,26 @@ class RegExExpr(YamlExpr):
         except re.error as exc:
             raise ExprError("Invalid RegEx") from exc
 
+        self._bytes_regex: Optional["re.Pattern[bytes]"] = None
+        if val.isascii():
+            try:
+                self._bytes_regex = re.compile(val.encode("ascii"), re.MULTILINE | re.DOTALL)
+            except re.error:
+                pass
+
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} {self._regex}>"
 
+    def prepare(self, file: File) -> None:
+        if file.ascii_mapping is None or self._bytes_regex is None:
+            _ = file.content_str
+        _ = file.line_starts
+
     def match_line_numbers(self, file: File) -> List[int]:
-        matched_line_numbers = [match.start() for match in re.finditer("\n", file.content_str)]
-        return [
-            bisect.bisect(matched_line_numbers, match.start() - 1) for match in self._regex.finditer(file.content_str)
-        ]
+        mapping = file.ascii_mapping
+        if mapping is not None and self._bytes_regex is not None:
+            return [file.line_number(match.start()) for match in self._bytes_regex.finditer(mapping)]
+        return [file.line_number(match.start()) for match in self._regex.finditer(file.content_str)]
 
     def matches(self, file: File) -> bool:
         return bool(re.finditer("\n", file.content_str))
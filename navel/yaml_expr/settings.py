@@ -9,11 +9,11 @@ import yaml
 
 from navel.caching.file_manager import File
 from navel.errors import ExprError
+from navel.models import LINT_MODES
 from navel.models import Settings as SettingsModel
-from navel.yaml_expr.yaml_expr import YamlExpr, yaml_add
+from navel.yaml_expr.yaml_expr import YamlExpr
 
 
-@yaml_add
 class SettingsExpr(YamlExpr):
     """
     Construct and parse glob expressions in YAML
@@ -27,13 +27,25 @@ class SettingsExpr(YamlExpr):
     def __init__(self, loader: yaml.Loader, node: yaml.MappingNode):
         super().__init__(loader, node)
         values = cast(Dict[str, Any], loader.construct_mapping(node))
-        try:
-            self._settings = SettingsModel(**values)
-        except TypeError as exc:
-            for field in dataclasses.fields(SettingsModel):
-                if field.name not in values:
-                    raise ExprError(f"!settings node is missing required field `{field.name}`") from exc
-            raise
+        fields = dataclasses.fields(SettingsModel)
+        known = {field.name for field in fields}
+        for name in values:
+            if name not in known:
+                raise ExprError(f"!settings node has unknown field `{name}`")
+        for field in fields:
+            required = field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+            if required and field.name not in values:
+                raise ExprError(f"!settings node is missing required field `{field.name}`")
+        self._settings = SettingsModel(**values)
+
+        for limit in ("max_file_size", "max_lines"):
+            value = getattr(self._settings, limit)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 1):
+                raise ExprError(f"!settings field `{limit}` must be a positive integer, got `{value}`")
+        if self._settings.generated not in LINT_MODES:
+            raise ExprError(
+                f"!settings field `generated` must be one of {', '.join(LINT_MODES)}, got `{self._settings.generated}`"
+            )
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} {self._settings}>"
@@ -2,19 +2,170 @@
 Module for the custom XPath Yaml Expression
 """
 
+import ast
 import re
-from typing import List
+from typing import AbstractSet, Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
 
 import lxml.etree
-import pyastgrep.search
 import yaml
 
+from navel.caching.ast_xml import XmlOmissions, element_line
 from navel.caching.file_manager import File
 from navel.errors import ExprError
-from navel.yaml_expr.yaml_expr import YamlExpr, yaml_add
+from navel.yaml_expr.yaml_expr import YamlExpr
+
+# Placeholder of characters inside predicates, parentheses and string literals
+NESTED = "\0"
+
+# Branch of a union selecting descendants by an element name followed by a plain location path
+DESCENDANT_BRANCH = re.compile(r"//([A-Za-z_][\w.\-]*)((?:[\[/][\w.\-:/@*()\[\]\0]*)?)", re.DOTALL)
+
+# Name of the XPath variable holding parents of candidate elements of the n-th branch
+CANDIDATES_VARIABLE = "candidates{}"
+
+# Branch of a union made of a location path only, possibly with predicates and node tests
+LOCATION_PATH = re.compile(r"/[\w.\-:/@*()\[\]\0]*", re.DOTALL)
+
+# Predicate or arguments of a function with masked contents
+MASKED_GROUP = re.compile(r"\[\0*\]|\(\0*\)")
+
+# Names of concrete AST node types, elements of the XML tree are named by them or by lowercase names of fields
+AST_NODE_TYPES = frozenset(
+    name
+    for name, value in vars(ast).items()
+    if name[:1].isupper() and isinstance(value, type) and issubclass(value, ast.AST)
+)
+
+# Fields and attributes of XML trees which can be omitted, with names whose occurrence in an expression keeps them
+OMITTABLE_FIELDS = {"ctx": frozenset(("ctx", "Load", "Store", "Del"))}
+OMITTABLE_ATTRIBUTES = {"col_offset": frozenset(("col_offset",))}
+
+# Name of an element, attribute or function in an XPath expression
+XPATH_NAME = re.compile(r"[A-Za-z_][\w.\-]*")
+
+# Wildcards of names and node tests, expressions with them may select any element or attribute
+XPATH_WILDCARD = re.compile(r"\*|\bnode\s*\(")
+
+
+def _mask_nested(path: str) -> Optional[str]:
+    """
+    Replace contents of predicates, parentheses and string literals by placeholders
+    @param path: XPath expression
+    @return: Masked expression of the same length, None when the expression is not balanced
+    """
+    masked: List[str] = []
+    closing: List[str] = []
+    quote: Optional[str] = None
+    for char in path:
+        if quote is not None:
+            masked.append(NESTED)
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            masked.append(NESTED if closing else char)
+            quote = char
+        elif char in "[(":
+            masked.append(char if not closing else NESTED)
+            closing.append("]" if char == "[" else ")")
+        elif char in "])":
+            if not closing or closing.pop() != char:
+                return None
+            masked.append(char if not closing else NESTED)
+        else:
+            masked.append(NESTED if closing else char)
+    return "".join(masked) if quote is None and not closing else None
+
+
+def _union_branches(path: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    Split an XPath expression to branches of its top-level union
+    @param path: XPath expression
+    @return: List of masked branches and the branches themselves, None when the expression is not balanced
+    """
+    masked = _mask_nested(path)
+    if masked is None:
+        return None
+
+    branches: List[Tuple[str, str]] = []
+    start = 0
+    for end in [index for index, char in enumerate(masked) if char == "|"] + [len(masked)]:
+        branches.append((masked[start:end].strip(), path[start:end].strip()))
+        start = end + 1
+    return branches
+
+
+def required_node_types(path: str) -> Optional[Tuple[FrozenSet[str], ...]]:
+    """
+    Get AST node types which must be present in a file for an XPath expression to select anything
+
+    Every element named by a step of a location path must exist for the path to select anything. Predicates
+    are not inspected as they may negate the existence of elements.
+    @param path: XPath expression
+    @return: Node types required by every union branch, None when the expression is not made of location paths
+    """
+    branches = _union_branches(path)
+    if branches is None or "$" in path:
+        return None
+
+    required: List[FrozenSet[str]] = []
+    for branch_masked, _ in branches:
+        if LOCATION_PATH.fullmatch(branch_masked) is None:
+            return None
+        steps = MASKED_GROUP.sub("", branch_masked).split("/")
+        required.append(frozenset(step.rpartition("::")[2] for step in steps) & AST_NODE_TYPES)
+    return tuple(required)
+
+
+def index_path(path: str) -> Optional[Tuple[Tuple[str, ...], str]]:
+    """
+    Rewrite an XPath expression to be evaluated only on parents of candidate elements
+
+    Expressions made of union branches of the form `//Name...` are supported. Every branch `//Name...` is rewritten
+    to `$candidatesN/Name...`, which selects the same nodes when the variable holds parents of all `Name` elements.
+    @param path: XPath expression
+    @return: Element names of branches and the rewritten expression, None when the expression is not supported
+    """
+    union_branches = _union_branches(path)
+    if union_branches is None or "$" in path:
+        return None
+
+    tags: List[str] = []
+    branches: List[str] = []
+    for branch_masked, branch in union_branches:
+        match = DESCENDANT_BRANCH.fullmatch(branch_masked)
+        if match is None:
+            return None
+        tags.append(match.group(1))
+        branches.append(f"${CANDIDATES_VARIABLE.format(len(branches))}/{branch[2:]}")
+
+    return tuple(tags), " | ".join(branches)
+
+
+def xml_omissions(paths: Iterable[str]) -> XmlOmissions:
+    """
+    Get parts of XML trees none of XPath expressions refers to
+
+    A field or an attribute is omitted only when no expression contains any of its names, even in a string literal,
+    and no expression contains a wildcard, so all expressions select the same elements in the trees with omissions.
+    @param paths: XPath expressions
+    @return: Fields and attributes to omit
+    """
+    names: Set[str] = set()
+    for path in paths:
+        if XPATH_WILDCARD.search(path) is not None:
+            return XmlOmissions()
+        names.update(XPATH_NAME.findall(path))
+
+    return XmlOmissions(
+        fields=frozenset(field for field, field_names in OMITTABLE_FIELDS.items() if field_names.isdisjoint(names)),
+        attributes=frozenset(
+            attribute
+            for attribute, attribute_names in OMITTABLE_ATTRIBUTES.items()
+            if attribute_names.isdisjoint(names)
+        ),
+    )
 
 
-@yaml_add
 class XPathExpr(YamlExpr):
     """
     Construct and parse XPath expressions in YAML
@@ -43,13 +194,83 @@ class XPathExpr(YamlExpr):
             self._path = lxml.etree.XPath(val)
         except lxml.etree.XPathSyntaxError as exc:
             raise ExprError("Invalid XPath") from exc
+        self._compile_indexed_path()
+        self._required_node_types: Optional[Tuple[FrozenSet[str], ...]] = required_node_types(val)
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} {self._path}>"
 
-    def match_line_numbers(self, file: File) -> List[int]:
-        matching_elements = self._path(file.xml)
+    def __getstate__(self) -> Dict[str, Any]:
+        # Compiled XPath objects can not be pickled, only their source is stored
+        state = super().__getstate__()
+        state["_path"] = self._path.path
+        del state["_indexed_tags"], state["_indexed_path"], state["_required_node_types"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        self._path = lxml.etree.XPath(state["_path"])
+        self._compile_indexed_path()
+        self._required_node_types = required_node_types(state["_path"])
 
+    def _compile_indexed_path(self) -> None:
+        """
+        Compile the expression rewritten for evaluation on candidate elements, if the expression supports it
+        """
+        self._indexed_tags: Optional[Tuple[str, ...]] = None
+        self._indexed_path: Optional[lxml.etree.XPath] = None
+
+        indexed = index_path(self._path.path)
+        if indexed is None:
+            return
+        try:
+            self._indexed_path = lxml.etree.XPath(indexed[1])
+        except lxml.etree.XPathSyntaxError:
+            return
+        self._indexed_tags = indexed[0]
+
+    @property
+    def path(self) -> str:
+        """
+        Get source of the expression
+        @return: XPath expression
+        """
+        return str(self._path.path)
+
+    @property
+    def indexed_tags(self) -> Optional[Tuple[str, ...]]:
+        """
+        Get element names whose parents are needed to evaluate the expression by match_line_numbers_indexed
+        @return: Element names for every union branch, None when the expression can not be evaluated on candidates
+        """
+        return self._indexed_tags
+
+    @property
+    def required_node_types(self) -> Optional[Tuple[FrozenSet[str], ...]]:
+        """
+        Get AST node types which must be present in a file for the expression to select anything
+        @return: Node types required by every union branch, None when not known
+        """
+        return self._required_node_types
+
+    def may_match(self, node_types: AbstractSet[str]) -> bool:
+        """
+        Cheaply check whether the expression may match a file without evaluating it
+        @param node_types: Names of AST node types present in the file
+        @return: False when the expression certainly matches nothing, True otherwise
+        """
+        if self._required_node_types is None:
+            return True
+        return any(required <= node_types for required in self._required_node_types)
+
+    @staticmethod
+    def _line_numbers(matching_elements: Any) -> List[int]:
+        """
+        Get line numbers of AST nodes matched by the expression
+        @raise ExprError: When the matched elements are not AST nodes
+        @param matching_elements: Result of the XPath evaluation
+        @return: List of line numbers
+        """
         if not isinstance(matching_elements, list):
             raise ExprError(f"Result not iterable: {str(matching_elements)}")
         iterator = iter(matching_elements)
@@ -59,12 +280,36 @@ class XPathExpr(YamlExpr):
             if not isinstance(element, lxml.etree._Element):
                 raise ExprError(f"Not an AST node: {str(element)}")
 
-            ast_node = file.ast_xml_mapping.get(element, None)
-            if ast_node is not None:
-                position = pyastgrep.search.position_from_node(ast_node)
-                if position is not None:
-                    linenos.append(position.lineno)
+            lineno = element_line(element)
+            if lineno is not None:
+                linenos.append(lineno)
         return linenos
 
+    def prepare(self, file: File) -> None:
+        _ = file.xml
+
+    def match_line_numbers(self, file: File) -> List[int]:
+        return self._line_numbers(self._path(file.xml))
+
+    def match_line_numbers_indexed(
+        self, file: File, candidate_parents: Mapping[str, Iterable[lxml.etree._Element]]
+    ) -> List[int]:
+        """
+        Matched line numbers by the expression evaluated only on parents of candidate elements
+        @param file: File object to match the lines in
+        @param candidate_parents: Parents of elements with the names from indexed_tags, the root element excluded
+        @return: List of matched line numbers, the same as returned by match_line_numbers
+        """
+        if self._indexed_tags is None or self._indexed_path is None or file.xml.tag in self._indexed_tags:
+            return self.match_line_numbers(file)
+
+        variables: Dict[str, Any] = {
+            CANDIDATES_VARIABLE.format(index): list(candidate_parents.get(tag, ()))
+            for index, tag in enumerate(self._indexed_tags)
+        }
+        if not any(variables.values()):
+            return []
+        return self._line_numbers(self._indexed_path(file.xml, **variables))
+
     def matches(self, file: File) -> bool:
         return bool(self._path(file.xml))
@@ -3,12 +3,31 @@ Module for the abstract class for the custom Yaml Expression
 """
 
 import abc
-from typing import List, Optional, Pattern, Type, TypeVar
+from typing import Any, Dict, List, Optional, Pattern, Type, TypeVar
 
 import yaml
 
 from navel.caching.file_manager import File
 
+try:
+    from yaml import CFullLoader as _FullLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import FullLoader as _FullLoader  # type: ignore[assignment]
+
+
+class ConfigLoader(_FullLoader):  # pylint: disable=too-many-ancestors
+    """
+    YAML loader of configs, scanning and parsing is done by libyaml when PyYAML is built with it
+
+    Constructors of all Yaml Expressions are registered to this loader.
+    """
+
+    def __init__(self, stream: Any):
+        super().__init__(stream)
+        # Loader based on libyaml does not keep the name of the stream, globs are resolved relative to the config file
+        if not hasattr(self, "name"):
+            self.name = getattr(stream, "name", "<file>")
+
 
 class YamlExpr(abc.ABC):
     """
@@ -30,6 +49,23 @@ class YamlExpr(abc.ABC):
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}>"
 
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Get picklable state of the expression, the YAML loader and node are not preserved
+        @return: State of the expression
+        """
+        state = self.__dict__.copy()
+        state.pop("_loader", None)
+        state.pop("_node", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """
+        Restore state of the expression created by __getstate__
+        @param state: State of the expression
+        """
+        self.__dict__.update(state)
+
     @classmethod
     def add_to_yaml(cls) -> None:
         """
@@ -37,8 +73,16 @@ class YamlExpr(abc.ABC):
         """
         tag = cls.TAG if cls.TAG is not None else f"!{cls.__name__.lower()[:-4]}"
         yaml.add_constructor(tag, cls)
+        yaml.add_constructor(tag, cls, Loader=ConfigLoader)
         if cls.PATTERN is not None:
             yaml.add_implicit_resolver(tag, cls.PATTERN)
+            yaml.add_implicit_resolver(tag, cls.PATTERN, Loader=ConfigLoader)
+
+    def prepare(self, file: File) -> None:
+        """
+        Build representations of a file the expression is matched against, so matching does only its own work
+        @param file: File object to be matched
+        """
 
     @abc.abstractmethod
     def match_line_numbers(self, file: File) -> List[int]:
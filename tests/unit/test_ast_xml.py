@@ -0,0 +1,88 @@
+import ast
+import sys
+import textwrap
+
+import lxml.etree
+import pyastgrep.asts
+import pyastgrep.search
+import pytest
+
+from navel.caching.ast_xml import XmlOmissions, ast_to_xml, element_line
+
+CODE = textwrap.dedent(
+    """
+    # type: ignore
+    import os as operating_system
+
+    @decorator(
+        1,
+    )
+    def f(a: int, *, b=print, c) -> str:  # type: ignore
+        '''Docstring with <tags> & "quotes"\\r\\n\\ttabs'''
+        x = {**a, "key": b"\\x00bytes", 1.5: ...}
+        print(a, sep=",")
+        return [y for y in a if not y]
+
+    class C(Base, metaclass=Meta):
+        def g(self):
+            global z
+            z = lambda: -self.attribute[1:2]
+    """
+)
+
+# Operators and contexts are singletons whose parents in pyastgrep are the last nodes they were found in
+SINGLETONS = (ast.expr_context, ast.operator, ast.boolop, ast.unaryop, ast.cmpop)
+
+
+@pytest.fixture
+def tree():
+    tree = ast.parse(CODE, type_comments=True)
+    for node in ast.walk(tree):
+        for child in ast.iter_child_nodes(node):
+            child.parent = node
+    return tree
+
+
+def test_same_as_pyastgrep(tree):
+    """
+    Ensure the XML tree and lines of elements are the same as with pyastgrep
+    """
+    mapping = {}
+    expected = pyastgrep.asts.ast_to_xml(tree, mapping)
+    converted = ast_to_xml(tree)
+    assert lxml.etree.tostring(converted) == lxml.etree.tostring(expected)
+
+    lines = []
+    for expected_element, element in zip(expected.iter(), converted.iter()):
+        node = mapping.get(expected_element)
+        if isinstance(node, SINGLETONS):
+            continue
+        position = None if node is None else pyastgrep.search.position_from_node(node)
+        lines.append((element.tag, element_line(element), None if position is None else position.lineno))
+    assert [(tag, line) for tag, line, _ in lines] == [(tag, line) for tag, _, line in lines]
+
+
+def test_omissions(tree):
+    """
+    Ensure omitted fields and attributes are left out of the tree without changing lines of elements
+    """
+    converted = ast_to_xml(tree, XmlOmissions(fields=frozenset(("ctx",)), attributes=frozenset(("col_offset",))))
+    assert converted.xpath("//ctx | //Load | //@col_offset") == []
+    assert [element_line(element) for element in converted.xpath("//Name")] == [
+        element_line(element) for element in ast_to_xml(tree).xpath("//Name")
+    ]
+
+
+def test_deep_tree():
+    """
+    Ensure trees deeper than the XML parser allows are converted as well
+    """
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(10000)
+    try:
+        tree = ast.parse("x = " + " + ".join(["a"] * 1500))
+        converted = ast_to_xml(tree, XmlOmissions(fields=frozenset(("ctx",))))
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+    assert len(converted.xpath("//BinOp")) == 1499
+    assert {element_line(element) for element in converted.xpath("//Name")} == {1}
@@ -0,0 +1,124 @@
+import io
+import json
+import pathlib
+
+import pytest
+
+from navel.baseline import BASELINE_VERSION, Baseline, line_fingerprint
+from navel.errors import BaselineError
+from navel.models import LintingViolation
+from navel.parsing import load_config
+
+CONFIG = """
+default_settings: !settings
+  included:
+    - "*"
+  excluded: []
+  allow_ignore: yes
+
+rules:
+  NoPrint:
+    description: "No print"
+    expr: //Call[func/Name/@id='print']
+  NoTodo:
+    description: "No TODO"
+    expr: !regex TODO
+"""
+
+
+@pytest.fixture
+def rules():
+    return load_config(io.StringIO(CONFIG))
+
+
+def violation(rules, path: pathlib.Path, lineno: int, line: str, rule_index: int = 0):
+    return LintingViolation(path=path, lineno=lineno, line=line, rule=rules[rule_index])
+
+
+def test_line_fingerprint():
+    """
+    Ensure fingerprints of lines ignore indentation and whitespace
+    """
+    assert line_fingerprint("    print( 1 )") == line_fingerprint("print(  1 )\t")
+    assert line_fingerprint("print(1)") != line_fingerprint("print(2)")
+
+
+def test_filter(rules, tmp_path: pathlib.Path):
+    """
+    Ensure accepted violations are filtered out even when shifted to other lines, once per accepted violation
+    """
+    path = tmp_path / "a.py"
+    baseline = Baseline(tmp_path, rules)
+    baseline.add(violation(rules, path, 1, "print(1)"))
+    baseline.add(violation(rules, path, 2, "print(1)"))
+    baseline.add(violation(rules, path, 3, "x = 1  # TODO", 1))
+
+    new = list(
+        baseline.filter(
+            [
+                violation(rules, path, 5, "    print(1)"),
+                violation(rules, path, 6, "print(1)"),
+                violation(rules, path, 7, "print(1)"),
+                violation(rules, path, 8, "x = 1  # TODO"),
+                violation(rules, tmp_path / "b.py", 1, "print(1)"),
+            ]
+        )
+    )
+    assert [(v.path.name, v.lineno) for v in new] == [("a.py", 7), ("a.py", 8), ("b.py", 1)]
+    assert baseline.matched_violations == 2
+
+
+def test_dump_and_load(rules, tmp_path: pathlib.Path):
+    """
+    Ensure a written baseline is loaded with its violations and unchanged files are skipped
+    """
+    baseline_file = tmp_path / "baseline.json"
+    baseline = Baseline(tmp_path, rules)
+    baseline.record(tmp_path / "a.py", b"print(1)\n")
+    baseline.record(tmp_path / "sub" / "b.py", b"x = 1\n")
+    baseline.add(violation(rules, tmp_path / "a.py", 1, "print(1)"))
+    baseline.dump(baseline_file)
+    assert sorted(json.loads(baseline_file.read_text())["files"]) == ["a.py", "sub/b.py"]
+
+    loaded = Baseline(tmp_path, rules)
+    loaded.load(baseline_file)
+    assert loaded.violations_count == 1
+    assert loaded.unchanged(tmp_path / "a.py", b"print(1)\n")
+    assert not loaded.unchanged(tmp_path / "a.py", b"print(2)\n")
+    assert loaded.unchanged(tmp_path / "sub" / "b.py", b"x = 1\n")
+    assert not loaded.unchanged(tmp_path / "c.py", b"x = 1\n")
+    assert loaded.skipped_files == 2
+    assert list(loaded.filter([violation(rules, tmp_path / "a.py", 3, "print(1)")])) == []
+
+
+def test_changed_rules(rules, tmp_path: pathlib.Path):
+    """
+    Ensure unchanged files are linted when the rules have changed since the baseline was written
+    """
+    baseline_file = tmp_path / "baseline.json"
+    baseline = Baseline(tmp_path, rules[:1])
+    baseline.record(tmp_path / "a.py", b"print(1)\n")
+    baseline.dump(baseline_file)
+
+    loaded = Baseline(tmp_path, rules)
+    loaded.load(baseline_file)
+    assert not loaded.unchanged(tmp_path / "a.py", b"print(1)\n")
+
+
+@pytest.mark.parametrize(
+    "content",
+    (
+        "not json",
+        json.dumps({"version": BASELINE_VERSION + 1, "files": {}}),
+        json.dumps({"version": BASELINE_VERSION, "files": {"a.py": {"violations": {}}}}),
+        json.dumps({"version": BASELINE_VERSION, "files": {"a.py": {"hash": None, "violations": []}}}),
+    ),
+)
+def test_invalid_baseline(rules, tmp_path: pathlib.Path, content: str):
+    """
+    Ensure invalid baselines are refused
+    """
+    baseline_file = tmp_path / "baseline.json"
+    baseline_file.write_text(content)
+    with pytest.raises(BaselineError):
+        Baseline(tmp_path, rules).load(baseline_file)
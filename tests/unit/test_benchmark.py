@@ -0,0 +1,64 @@
+import io
+import pathlib
+
+import pytest
+
+from navel.benchmark import RULE_SETS, compare_results, generate_corpus, run_benchmarks
+from navel.constants import BENCHMARK_RULE_SETS
+from navel.parsing import load_config
+
+
+@pytest.mark.parametrize("rule_set", sorted(RULE_SETS))
+def test_rule_sets_are_valid(rule_set: str):
+    """
+    Ensure all benchmark rule sets can be loaded
+    """
+    assert load_config(io.StringIO(RULE_SETS[rule_set]))
+    assert rule_set in BENCHMARK_RULE_SETS
+
+
+def test_generate_corpus_is_deterministic(tmp_path: pathlib.Path):
+    """
+    Ensure the same seed generates the same corpus
+    """
+    generate_corpus(tmp_path / "a", 25, 40, seed=1)
+    generate_corpus(tmp_path / "b", 25, 40, seed=1)
+
+    files_a = sorted(path.relative_to(tmp_path / "a") for path in (tmp_path / "a").rglob("*.py"))
+    files_b = sorted(path.relative_to(tmp_path / "b") for path in (tmp_path / "b").rglob("*.py"))
+    assert len(files_a) == 25
+    assert files_a == files_b
+    assert all((tmp_path / "a" / path).read_bytes() == (tmp_path / "b" / path).read_bytes() for path in files_a)
+
+
+def test_run_benchmarks(tmp_path: pathlib.Path):
+    """
+    Ensure all stages of all rule sets are measured
+    """
+    corpus = generate_corpus(tmp_path, 5, 30)
+
+    results = run_benchmarks(corpus, sorted(RULE_SETS), 1)
+
+    assert results["corpus"] == {"files": 5, "lines_per_file": 30, "seed": 0}
+    assert set(results["rule_sets"]) == set(RULE_SETS)
+    for rule_set_results in results["rule_sets"].values():
+        assert rule_set_results["files"] == 5
+        assert rule_set_results["violations"] > 0
+        assert {"config_load", "discovery", "file_construction", "reporting"} < set(rule_set_results["stages"])
+        assert any(stage.startswith("evaluation.") for stage in rule_set_results["stages"])
+
+
+def test_compare_results():
+    """
+    Ensure only stages slower than the baseline by more than the tolerance are reported
+    """
+    baseline = {"rule_sets": {"xpath": {"stages": {"discovery": {"best": 1.0}, "reporting": {"best": 1.0}}}}}
+    results = {
+        "rule_sets": {
+            "xpath": {"stages": {"discovery": {"best": 1.05}, "reporting": {"best": 1.2}, "parsing": {"best": 9.0}}},
+            "regex": {"stages": {"discovery": {"best": 9.0}}},
+        }
+    }
+
+    assert compare_results(baseline, results, 0.1) == ["xpath/reporting: 1200.00 ms, baseline 1000.00 ms"]
+    assert compare_results(baseline, results, 0.25) == []
@@ -0,0 +1,137 @@
+import functools
+import io
+import pathlib
+import re
+import signal
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from navel.budget import TimeBudget, deadline
+from navel.caching.file_manager import File, FileManager
+from navel.cli import cli
+from navel.errors import EvaluationTimeoutError
+from navel.linter import Linter
+from navel.parsing import load_config
+
+CONFIG = """
+default_settings: !settings
+  included:
+    - "*"
+  excluded: []
+  allow_ignore: yes
+
+rules:
+  Backtracking:
+    description: "Backtracking"
+    expr: !regex (a+)+$
+  Print:
+    description: "Print"
+    expr: //Call[func/Name/@id='print']
+"""
+
+# Contents on which the backtracking rule takes much longer than any budget of the tests
+CONTENT = f"print('{'a' * 40}b')\n"
+
+
+@pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="Evaluations are interrupted by SIGALRM")
+def test_deadline_interrupts_regex():
+    """
+    Ensure a catastrophically backtracking regex is interrupted once its budget runs out
+    """
+    start = time.perf_counter()
+    with pytest.raises(EvaluationTimeoutError):
+        with deadline(0.1):
+            re.search(r"(a+)+$", "a" * 40 + "b")
+    assert time.perf_counter() - start < 5
+    assert signal.getsignal(signal.SIGALRM) is signal.SIG_DFL
+
+
+def test_deadline_outside_main_thread():
+    """
+    Ensure blocks which can not be interrupted are found to be over budget once they finish
+    """
+    errors = []
+
+    def run():
+        try:
+            with deadline(0.01):
+                time.sleep(0.05)
+        except EvaluationTimeoutError as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1
+
+    with deadline(None):
+        time.sleep(0.01)
+
+
+def test_linter_disables_rules_timing_out(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Ensure evaluations over budget are dropped and reported, and rules timing out too often are disabled
+    """
+    monkeypatch.chdir(tmp_path)
+    pathlib.Path("a.py").write_text(CONTENT)
+    pathlib.Path("b.py").write_text(CONTENT)
+
+    file_manager = FileManager()
+    linter = Linter(file_manager, load_config(io.StringIO(CONFIG)), budget=TimeBudget(rule_seconds=0.1, max_timeouts=1))
+    assert [rule.name for rule, _ in linter.lint_file(pathlib.Path("a.py"))] == ["Print"]
+    assert [rule.name for rule, _ in linter.lint_file(pathlib.Path("b.py"))] == ["Print"]
+
+    (timeout,) = file_manager.stats.timeouts
+    assert (timeout.path, timeout.rule, timeout.seconds) == (pathlib.Path("a.py"), "Backtracking", 0.1)
+    assert timeout.disabled and not timeout.file_budget
+
+
+def test_linter_file_budget(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Ensure rules left when the budget of a file runs out are not evaluated on the file
+    """
+    monkeypatch.chdir(tmp_path)
+    pathlib.Path("a.py").write_text(CONTENT)
+
+    file_manager = FileManager()
+    linter = Linter(file_manager, load_config(io.StringIO(CONFIG)), budget=TimeBudget(file_seconds=0.1))
+    assert list(linter.lint_file(pathlib.Path("a.py"))) == []
+
+    (timeout,) = file_manager.stats.timeouts
+    assert (timeout.rule, timeout.seconds, timeout.file_budget, timeout.disabled) == ("Backtracking", 0.1, True, False)
+
+
+def test_linter_does_not_charge_rules_for_parsing(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Ensure building representations of a file is not counted against the budget of the first rule using them
+    """
+    monkeypatch.chdir(tmp_path)
+    pathlib.Path("a.py").write_text("print(1)\n")
+    build_xml = File.xml.func
+
+    def slow_xml(file: File):
+        time.sleep(0.2)
+        return build_xml(file)
+
+    monkeypatch.setattr(File, "xml", functools.cached_property(slow_xml))
+    File.xml.__set_name__(File, "xml")
+
+    file_manager = FileManager()
+    # A path which is not evaluated by the index of candidates, which would build the tree before the evaluation
+    config = CONFIG.replace("//Call", "/Module//Call")
+    linter = Linter(file_manager, load_config(io.StringIO(config)), budget=TimeBudget(rule_seconds=0.1))
+    assert [rule.name for rule, _ in linter.lint_file(pathlib.Path("a.py"))] == ["Print"]
+    assert file_manager.stats.timeouts == []
+
+
+def test_max_rule_timeouts_requires_budget(tmp_path: pathlib.Path):
+    """
+    Ensure the number of timeouts is rejected when no budget it would count against is set
+    """
+    result = CliRunner().invoke(cli, ["lint", "--project-directory", str(tmp_path), "--max-rule-timeouts", "1"])
+
+    assert result.exit_code == 2
+    assert "--max-rule-timeouts" in result.output
@@ -0,0 +1,209 @@
+import io
+import os
+import pathlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+
+from navel.cli import cli
+from navel.constants import CONFIG_FILE_NAVEL
+from navel.daemon import LintDaemon
+from navel.daemon_client import COMMAND_STATUS, COMMAND_STOP, request_lint, send_request, socket_path
+from navel.errors import DaemonError
+from navel.parsing import load_config
+
+CONFIG = """
+default_settings: !settings
+  included:
+    - "*"
+  excluded: []
+  allow_ignore: yes
+
+rules:
+  NoPrint:
+    description: "No print"
+    expr: //Call[func/Name/@id='print']
+"""
+
+CONFIG_TODO = (
+    CONFIG
+    + """
+  NoTodo:
+    description: "No TODO"
+    expr: !regex TODO
+"""
+)
+
+
+def write(path: pathlib.Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    # Ensure the modification time changes even on file systems with coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def violations(result):
+    return sorted((v.path.name, v.lineno, v.rule.name) for v in result.violations)
+
+
+@pytest.fixture
+def project(tmp_path: pathlib.Path):
+    write(tmp_path / CONFIG_FILE_NAVEL, CONFIG)
+    write(tmp_path / "a.py", "print(1)  # TODO\n")
+    write(tmp_path / "b.py", "x = 1\n")
+    return tmp_path
+
+
+@pytest.fixture
+def daemon(project: pathlib.Path):
+    config_path = project / CONFIG_FILE_NAVEL
+    lint_daemon = LintDaemon(project, lambda: load_config(io.StringIO(config_path.read_text())), idle_timeout=30)
+    ready = threading.Event()
+    thread = threading.Thread(target=lint_daemon.serve, args=(lambda _: ready.set(),))
+    thread.start()
+    assert ready.wait(5)
+    yield lint_daemon
+
+    if thread.is_alive():
+        send_request(socket_path(project), {"command": COMMAND_STOP})
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_request_lint_without_daemon(project: pathlib.Path):
+    """
+    Ensure linting by the daemon is skipped when no daemon is running
+    """
+    assert request_lint(project, None, True) is None
+
+
+def test_request_lint(daemon: LintDaemon, project: pathlib.Path):
+    """
+    Ensure the daemon lints all files of the project or only the requested files
+    """
+    result = request_lint(project, None, True)
+    assert result is not None
+    assert violations(result) == [("a.py", 1, "NoPrint")]
+    assert result.violations[0].line == "print(1)  # TODO"
+    assert result.violations[0].rule.description == "No print"
+    assert result.files == 2
+    assert result.rules == 1
+
+    result = request_lint(project, [project / "b.py"], True)
+    assert result is not None
+    assert violations(result) == []
+    assert result.files == 1
+
+
+def test_request_lint_plans_paths(daemon: LintDaemon, project: pathlib.Path):
+    """
+    Ensure the daemon skips files no rule applies to and counts files as an in-process run does
+    """
+    write(project / CONFIG_FILE_NAVEL, CONFIG.replace('"*"', '"*/sub/*"'))
+    write(project / "sub" / "c.py", "print(2)\n")
+
+    result = request_lint(project, None, True)
+    assert result is not None
+    assert violations(result) == [("c.py", 1, "NoPrint")]
+    assert result.files == 1
+
+    in_process = CliRunner().invoke(cli, ["lint", "--project-directory", str(project), "--no-daemon", "--no-cache"])
+    assert "(1 rule, 1 file, 1 violation)" in in_process.output
+
+
+def test_daemon_detects_changes(daemon: LintDaemon, project: pathlib.Path):
+    """
+    Ensure changed files are read again and rules are reloaded when the config changes
+    """
+    request_lint(project, None, True)
+
+    write(project / "b.py", "print(2)\n")
+    result = request_lint(project, None, True)
+    assert result is not None
+    assert violations(result) == [("a.py", 1, "NoPrint"), ("b.py", 1, "NoPrint")]
+
+    write(project / CONFIG_FILE_NAVEL, CONFIG_TODO)
+    result = request_lint(project, None, True)
+    assert result is not None
+    assert violations(result) == [("a.py", 1, "NoPrint"), ("a.py", 1, "NoTodo"), ("b.py", 1, "NoPrint")]
+
+
+def test_daemon_keeps_rules_of_invalid_config(daemon: LintDaemon, project: pathlib.Path):
+    """
+    Ensure an invalid config is reported and the daemon keeps serving once the config is fixed
+    """
+    write(project / CONFIG_FILE_NAVEL, "rules: !invalid\n")
+    with pytest.raises(DaemonError, match="ParsingError: Invalid YAML"):
+        send_request(socket_path(project), {"command": "lint", "files": None})
+    assert request_lint(project, None, True) is None
+
+    write(project / CONFIG_FILE_NAVEL, "rules: [\n")
+    with pytest.raises(DaemonError, match="ParsingError: Invalid YAML"):
+        send_request(socket_path(project), {"command": "lint", "files": None})
+
+    write(project / CONFIG_FILE_NAVEL, CONFIG_TODO)
+    result = request_lint(project, None, True)
+    assert result is not None
+    assert result.rules == 2
+
+
+def test_concurrent_requests(daemon: LintDaemon, project: pathlib.Path):
+    """
+    Ensure concurrent requests are all answered
+    """
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: request_lint(project, None, True), range(32)))
+
+    assert all(result is not None and violations(result) == [("a.py", 1, "NoPrint")] for result in results)
+
+
+def test_invalid_requests(daemon: LintDaemon, project: pathlib.Path):
+    """
+    Ensure invalid requests are refused
+    """
+    with pytest.raises(DaemonError, match="Unknown command"):
+        send_request(socket_path(project), {"command": "unknown"})
+    with pytest.raises(DaemonError, match="Files must be"):
+        send_request(socket_path(project), {"command": "lint", "files": "a.py"})
+    with pytest.raises(DaemonError, match="Unsupported protocol version"):
+        send_request(socket_path(project), {"command": COMMAND_STATUS, "version": -1})
+
+
+def test_daemon_is_single(daemon: LintDaemon, project: pathlib.Path):
+    """
+    Ensure a second daemon of the same project refuses to start
+    """
+    config_path = project / CONFIG_FILE_NAVEL
+    second = LintDaemon(project, lambda: load_config(io.StringIO(config_path.read_text())))
+    with pytest.raises(DaemonError, match="already running"):
+        second.serve()
+
+
+def test_stop(daemon: LintDaemon, project: pathlib.Path):
+    """
+    Ensure the daemon stops on request and removes its socket
+    """
+    response = send_request(socket_path(project), {"command": COMMAND_STATUS})
+    assert response["pid"] == os.getpid()
+
+    send_request(socket_path(project), {"command": COMMAND_STOP})
+    for _ in range(50):
+        if not socket_path(project).exists():
+            break
+        threading.Event().wait(0.1)
+    assert not socket_path(project).exists()
+    assert request_lint(project, None, True) is None
+
+
+def test_idle_timeout(project: pathlib.Path):
+    """
+    Ensure the daemon shuts down when idle and removes its socket
+    """
+    config_path = project / CONFIG_FILE_NAVEL
+    lint_daemon = LintDaemon(project, lambda: load_config(io.StringIO(config_path.read_text())), idle_timeout=0.3)
+    lint_daemon.serve()
+
+    assert not socket_path(project).exists()
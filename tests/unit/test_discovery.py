@@ -0,0 +1,82 @@
+import io
+import os
+import pathlib
+
+import pytest
+
+from navel.discovery import FileDiscovery, PathStream
+from navel.parsing import load_config
+
+CONFIG = """
+rules:
+  NoPrint:
+    description: "No print"
+    expr: //Call[func/Name/@id='print']
+    settings: !settings
+      included:
+        - "*"
+      excluded:
+        - "*/generated/*"
+        - "*/vendored/*"
+      allow_ignore: yes
+  NoTodo:
+    description: "No TODO"
+    expr: !regex TODO
+    settings: !settings
+      included:
+        - "*"
+      excluded:
+        - "*/generated/*"
+      allow_ignore: yes
+"""
+
+
+@pytest.fixture
+def project(tmp_path: pathlib.Path):
+    for path in (
+        "b.py",
+        "a.py",
+        "notes.txt",
+        "package/module.py",
+        "package/sub/module.py",
+        "generated/module.py",
+        "vendored/module.py",
+        "ignored/module.py",
+        "package/ignored.py",
+        ".git/hooks/hook.py",
+        "node_modules/module.py",
+        "env/lib/module.py",
+    ):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("x = 1\n")
+    (tmp_path / "env" / "pyvenv.cfg").write_text("")
+    (tmp_path / ".gitignore").write_text("ignored/\n")
+    (tmp_path / "package" / ".gitignore").write_text("ignored.py\n")
+    return tmp_path
+
+
+def test_walk(project: pathlib.Path):
+    """
+    Ensure excluded, ignored and tool directories are pruned and files are yielded in a deterministic order
+    """
+    rules = load_config(io.StringIO(CONFIG))
+    paths = [os.path.relpath(path, project) for path in FileDiscovery(rules).walk(project)]
+    assert paths == ["a.py", "b.py", "package/module.py", "package/sub/module.py", "vendored/module.py"]
+
+
+def test_walk_without_gitignore(project: pathlib.Path):
+    """
+    Ensure .gitignore files are not respected when disabled
+    """
+    rules = load_config(io.StringIO(CONFIG))
+    paths = {os.path.relpath(path, project) for path in FileDiscovery(rules, respect_gitignore=False).walk(project)}
+    assert {"ignored/module.py", "package/ignored.py"} <= paths
+
+
+def test_path_stream_counts():
+    """
+    Ensure PathStream counts yielded paths
+    """
+    stream = PathStream(iter([pathlib.Path("a.py"), pathlib.Path("b.py")]))
+    assert list(stream) == [pathlib.Path("a.py"), pathlib.Path("b.py")]
+    assert stream.count == 2
@@ -0,0 +1,132 @@
+import mmap
+import pathlib
+
+from navel.caching.file_manager import File, FileManager, FileManagerStats, read_file
+
+
+def test_file_is_lazy():
+    """
+    Ensure File does not parse, convert or tokenize its contents until requested
+    """
+    file = File(b"x = 1\n", "module.py")
+
+    assert file.content_str == "x = 1\n"
+    assert "ast" not in vars(file)
+    assert "_xml_with_mapping" not in vars(file)
+    assert "tokens" not in vars(file)
+
+    assert file.xml.tag == "Module"
+    assert "ast" in vars(file)
+
+
+def test_file_ignore_comment_markers():
+    """
+    Ensure files without ignore comment markers are recognized without tokenizing them
+    """
+    assert not File(b"x = 1  # a comment\n", "module.py").may_contain_ignore_comments
+    assert File(b"x = 1  # navel: ignore\n", "module.py").may_contain_ignore_comments
+    assert File(b"x = 1  # bb: ignore\n", "module.py").may_contain_ignore_comments
+
+
+def test_file_line_number():
+    """
+    Ensure offsets are mapped to line numbers starting at 1
+    """
+    file = File(b"a = 1\n\nb = 2", "module.py")
+
+    assert file.line_starts == [0, 6, 7]
+    assert [file.line_number(offset) for offset in (0, 5, 6, 7, 12)] == [1, 1, 2, 3, 3]
+
+
+def test_file_line():
+    """
+    Ensure lines are looked up by their numbers, numbers past the end get the last line
+    """
+    file = File(b"a = 1\r\n\nb = 2\n", "module.py")
+
+    assert [file.line(lineno) for lineno in (1, 2, 3, 4)] == ["a = 1", "", "b = 2", "b = 2"]
+    assert File(b"", "module.py").line(1) == ""
+
+
+def test_file_lines_split_like_parser():
+    """
+    Ensure lines are split only on line breaks the parser counts, so line numbers agree with those of the AST
+    """
+    file = File("a = 1\x0c  # \x0b\x1c\u2028\x85\r\nprint(3)\n".encode("utf-8"), "module.py")
+
+    assert file.lines == ["a = 1\x0c  # \x0b\x1c\u2028\x85", "print(3)"]
+    assert file.line_starts == [0, 16]
+    assert file.line(2) == "print(3)"
+    assert file.xml.xpath("//Call")[0].get("lineno") == "2"
+
+
+def test_mapped_file(tmp_path: pathlib.Path):
+    """
+    Ensure large files are memory-mapped and their plain ASCII lines are looked up without decoding them
+    """
+    path = tmp_path / "module.py"
+    path.write_bytes(b"a = 1\r\n\nb = 2\rc = 3\x0c\nd = 4\n")
+    file = FileManager(mmap_min_size=1).get(path)
+    in_memory = File(path.read_bytes(), "module.py")
+
+    assert isinstance(file.content_buffer, mmap.mmap)
+    assert file.ascii_mapping is file.content_buffer
+    assert file.line_starts == in_memory.line_starts
+    assert [file.line(lineno) for lineno in range(1, 7)] == [in_memory.line(lineno) for lineno in range(1, 7)]
+    assert "content_str" not in vars(file)
+    assert file.content_bytes == in_memory.content_bytes
+
+    path.write_bytes("a = 'á'\n".encode("utf-8"))
+    assert read_file(path, 1).find(b"a") == 0
+    assert File(read_file(path, 1), "module.py").ascii_mapping is None
+    assert isinstance(read_file(path, 1024), bytes)
+
+
+def test_file_guardrails():
+    """
+    Ensure sizes, line counts and markers of generated files are read from the undecoded contents
+    """
+    file = File(b"# @generated by a tool\nx = 1\ny = 2", "module.py")
+    assert (file.size, file.line_count, file.generated) == (34, 3, True)
+    assert File(b"# DO NOT EDIT\n", "module.py").generated
+    assert File(b"x = 1\n", "module.py").line_count == 1
+    assert not File(b"x = 1\n" + b" " * 2048 + b"# @generated\n", "module.py").generated
+
+
+def test_file_manager_evicts_least_recently_used(tmp_path: pathlib.Path):
+    """
+    Ensure FileManager keeps at most the configured number of files and evicts the least recently used ones
+    """
+    paths = [tmp_path / f"module_{i}.py" for i in range(3)]
+    for path in paths:
+        path.write_text("x = 1\n")
+
+    file_manager = FileManager(max_entries=2)
+    first = file_manager.get(paths[0])
+    file_manager.get(paths[1])
+    assert file_manager.get(paths[0]) is first
+    file_manager.get(paths[2])
+
+    assert file_manager.get(paths[0]) is first
+    assert file_manager.stats == FileManagerStats(hits=2, misses=3, evictions=1)
+
+    file_manager.release(paths[0])
+    assert file_manager.get(paths[0]) is not first
+
+
+def test_code_lines():
+    """
+    Ensure lines with only comments and whitespace are not code lines, multi-line tokens span all their lines
+    """
+    file = File(b'x = 1\n\n# comment\ns = """\nline\n"""  # comment\n    \n', "<test>")
+    assert file.code_lines == frozenset((1, 4, 5, 6))
+    assert File(b"x = (\n", "<test>").code_lines == frozenset((1,))
+
+
+def test_node_types():
+    """
+    Ensure types of all AST nodes are collected when the AST is created
+    """
+    file = File(b"async def f():\n    return lambda: g(x)\n", "<test>")
+    assert file.node_types == {"Module", "AsyncFunctionDef", "arguments", "Return", "Lambda", "Call", "Name", "Load"}
+    assert "ast" in vars(file)
@@ -0,0 +1,129 @@
+import io
+import json
+import pathlib
+import xml.etree.ElementTree
+
+import pytest
+from click.testing import CliRunner
+
+from navel.cli import cli
+from navel.constants import CONFIG_FILE_NAVEL, OUTPUT_FORMATS
+from navel.daemon_client import RemoteRule, RemoteViolation
+from navel.formatters import FORMATTERS, CheckstyleFormatter, JsonLinesFormatter, SarifFormatter, TextFormatter
+
+PROJECT = pathlib.Path("/project")
+
+RULE = RemoteRule(name="NoPrint", description='No "print" & <co>', example="print(1)\n", instead=None)
+OTHER_RULE = RemoteRule(name="NoTodo", description="No TODO", example=None, instead=None)
+
+VIOLATIONS = [
+    RemoteViolation(path=PROJECT / "a.py", lineno=1, line="print(1)  # TODO", rule=RULE),
+    RemoteViolation(path=PROJECT / "a.py", lineno=1, line="print(1)  # TODO", rule=OTHER_RULE),
+    RemoteViolation(path=PROJECT / "sub" / "b.py", lineno=3, line="    print('<b>')", rule=RULE),
+]
+
+
+def format_violations(formatter_class, violations, verbose: bool = False):
+    stream = io.StringIO()
+    formatter = formatter_class(stream, PROJECT, verbose)
+    formatter.start()
+    for violation in violations:
+        formatter.write(violation)
+    formatter.finish()
+    return stream.getvalue()
+
+
+def test_formatters():
+    """
+    Ensure every output format has a formatter
+    """
+    assert sorted(FORMATTERS) == sorted(OUTPUT_FORMATS)
+
+
+def test_text():
+    """
+    Ensure violations are formatted as text, styles are stripped when not writing to a terminal
+    """
+    assert format_violations(TextFormatter, VIOLATIONS[:1]) == 'a.py:1\tNoPrint: No "print" & <co>\n'
+    assert format_violations(TextFormatter, VIOLATIONS[:1], verbose=True) == (
+        'a.py:1\tNoPrint\nDescription: No "print" & <co>\nLine:\nprint(1)  # TODO\nExample:\nprint(1)\n\n'
+    )
+
+
+def test_jsonl():
+    """
+    Ensure every violation is written as a JSON object on its own line
+    """
+    lines = format_violations(JsonLinesFormatter, VIOLATIONS).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {
+            "path": "a.py",
+            "line": 1,
+            "rule": "NoPrint",
+            "description": 'No "print" & <co>',
+            "source": "print(1)  # TODO",
+        },
+        {"path": "a.py", "line": 1, "rule": "NoTodo", "description": "No TODO", "source": "print(1)  # TODO"},
+        {
+            "path": "sub/b.py",
+            "line": 3,
+            "rule": "NoPrint",
+            "description": 'No "print" & <co>',
+            "source": "    print('<b>')",
+        },
+    ]
+
+
+@pytest.mark.parametrize("violations", (VIOLATIONS, []))
+def test_sarif(violations):
+    """
+    Ensure the SARIF log holds all results and the rules they refer to
+    """
+    log = json.loads(format_violations(SarifFormatter, violations))
+    assert log["version"] == "2.1.0"
+    (run,) = log["runs"]
+    assert [
+        (
+            result["ruleId"],
+            result["locations"][0]["physicalLocation"]["artifactLocation"]["uri"],
+            result["locations"][0]["physicalLocation"]["region"]["startLine"],
+        )
+        for result in run["results"]
+    ] == [(v.rule.name, v.path.relative_to(PROJECT).as_posix(), v.lineno) for v in violations]
+    assert [rule["id"] for rule in run["tool"]["driver"]["rules"]] == sorted({v.rule.name for v in violations})
+
+
+@pytest.mark.parametrize("violations", (VIOLATIONS, []))
+def test_checkstyle(violations):
+    """
+    Ensure the checkstyle report groups violations by files and escapes attributes
+    """
+    root = xml.etree.ElementTree.fromstring(format_violations(CheckstyleFormatter, violations))
+    assert root.tag == "checkstyle"
+    assert [
+        (file.get("name"), error.get("line"), error.get("source"), error.get("message"))
+        for file in root
+        for error in file
+    ] == [
+        (v.path.relative_to(PROJECT).as_posix(), str(v.lineno), f"navel.{v.rule.name}", v.rule.description)
+        for v in violations
+    ]
+
+
+@pytest.mark.parametrize("args", (["--jobs", "0"], []))
+def test_nothing_written_on_invalid_run(tmp_path: pathlib.Path, args):
+    """
+    Ensure the output is neither started nor truncated when an option or the config is invalid
+    """
+    (tmp_path / CONFIG_FILE_NAVEL).write_text("rules: {NoPrint: {description: No print}}\n")
+    output = tmp_path / "report.sarif"
+    output.write_text("previous report")
+    command = ["lint", "--project-directory", str(tmp_path), "--no-daemon", "--format", "sarif", *args]
+
+    result = CliRunner().invoke(cli, command)
+    assert result.exit_code != 0
+    assert "$schema" not in result.output
+
+    result = CliRunner().invoke(cli, [*command, "--output", str(output)])
+    assert result.exit_code != 0
+    assert output.read_text() == "previous report"
@@ -0,0 +1,219 @@
+import pathlib
+import pickle
+import subprocess
+
+import pytest
+from click.testing import CliRunner
+
+from navel.caching.file_manager import FileManager
+from navel.cli import cli
+from navel.errors import GitError
+from navel.git import (
+    CatFile,
+    ChangedLines,
+    RevisionSource,
+    changed_lines,
+    commit_range_head,
+    diff_base,
+    parse_diff,
+    tree_blobs,
+)
+
+DIFF = """diff --git a/a.py b/a.py
+index 1111111..2222222 100644
+--- a/a.py
++++ b/a.py
+@@ -1 +1 @@
+-x = 1
++x = 2
+@@ -3,0 +4,2 @@ def f():
++    y = 1
++    z = 2
+@@ -9,2 +10,0 @@ def g():
+-    a = 1
+-    b = 2
+diff --git a/new.py b/new.py
+new file mode 100644
+--- /dev/null
++++ b/new.py
+@@ -0,0 +1,3 @@
++a = 1
++b = 2
++c = 3
+diff --git "a/sp\\303\\241ce \\"q\\".py" "b/sp\\303\\241ce \\"q\\".py"
+--- "a/sp\\303\\241ce \\"q\\".py"
++++ "b/sp\\303\\241ce \\"q\\".py"
+@@ -2,0 +3 @@
++d = 4
+"""
+
+
+def git(repository: pathlib.Path, *args: str):
+    subprocess.run(["git", "-C", str(repository), *args], check=True, stdout=subprocess.PIPE)
+
+
+@pytest.fixture
+def repository(tmp_path: pathlib.Path):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "navel@example.com")
+    git(tmp_path, "config", "user.name", "Navel")
+    (tmp_path / "a.py").write_text("x = 1\n\ndef f():\n    return 1\n")
+    (tmp_path / "b.py").write_text("y = 1\n")
+    (tmp_path / "notes.txt").write_text("notes\n")
+    git(tmp_path, "add", "-A")
+    git(tmp_path, "commit", "-q", "-m", "first")
+    return tmp_path
+
+
+def test_parse_diff():
+    """
+    Ensure added and modified lines are parsed from hunks and deletions are ignored
+    """
+    assert parse_diff(DIFF) == {
+        "a.py": [(1, 1), (4, 5)],
+        "new.py": [(1, 3)],
+        'spáce "q".py': [(3, 3)],
+    }
+
+
+def test_changed_lines():
+    """
+    Ensure lines are looked up in the changed ranges
+    """
+    changed = ChangedLines({pathlib.Path("/a.py"): [(1, 1), (4, 5)], pathlib.Path("/b.py"): []})
+
+    assert changed.paths == [pathlib.Path("/a.py")]
+    assert changed.changed(pathlib.Path("/a.py"))
+    assert not changed.changed(pathlib.Path("/b.py"))
+    assert [lineno for lineno in range(7) if changed.contains(pathlib.Path("/a.py"), lineno)] == [1, 4, 5]
+    assert not changed.contains(pathlib.Path("/c.py"), 1)
+    assert changed.any_of(pathlib.Path("/a.py"), {3, 5})
+    assert not changed.any_of(pathlib.Path("/a.py"), {2, 3, 6})
+
+
+def test_changed_lines_of_working_tree(repository: pathlib.Path):
+    """
+    Ensure only changed lines of Python files in the directory are reported
+    """
+    (repository / "a.py").write_text("x = 2\n\ndef f():\n    # comment\n    return 1\n")
+    (repository / "notes.txt").write_text("changed\n")
+    (repository / "b.py").unlink()
+    (repository / "c.py").write_text("z = 1\n")
+    git(repository, "add", "c.py")
+
+    assert diff_base(repository) == "HEAD"
+    assert changed_lines(repository, ["HEAD"]) == {
+        repository / "a.py": [(1, 1), (4, 4)],
+        repository / "c.py": [(1, 1)],
+    }
+
+
+def test_changed_lines_relative(repository: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Ensure paths are relative to a relative directory, with files outside of the directory left out
+    """
+    (repository / "sub").mkdir()
+    (repository / "sub" / "c.py").write_text("z = 1\n")
+    (repository / "a.py").write_text("x = 2\n")
+    git(repository, "add", "-A")
+    monkeypatch.chdir(repository)
+
+    assert changed_lines(pathlib.Path("."), ["HEAD"]) == {
+        pathlib.Path("a.py"): [(1, 1)],
+        pathlib.Path("sub", "c.py"): [(1, 1)],
+    }
+    assert changed_lines(pathlib.Path("sub"), ["HEAD"]) == {pathlib.Path("sub", "c.py"): [(1, 1)]}
+
+
+def test_lint_diff_lines(repository: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Ensure changed lines are linted from the default relative project directory, whose rules have relative globs
+    """
+    (repository / ".navel.yml").write_text(
+        "default_settings: !settings\n  included:\n    - sub/*\n  excluded: []\n  allow_ignore: yes\n"
+        "rules:\n  NoPrint:\n    description: No print\n    expr: //Call[func/Name/@id='print']\n"
+    )
+    git(repository, "add", "-A")
+    git(repository, "commit", "-q", "-m", "config")
+    (repository / "sub").mkdir()
+    (repository / "sub" / "c.py").write_text("x = 1\nprint(1)\n")
+    git(repository, "add", "-A")
+    monkeypatch.chdir(repository)
+
+    result = CliRunner().invoke(cli, ["lint", "--diff-lines", "--no-cache", "--no-daemon"])
+    assert result.exit_code == 1
+    assert "sub/c.py:2" in result.output
+    assert "(1 rule, 1 file, 1 violation)" in result.output
+
+
+def test_revision_source(repository: pathlib.Path):
+    """
+    Ensure files are read as they are in a revision without touching the working tree
+    """
+    (repository / "a.py").write_text("x = 2\n")
+    git(repository, "commit", "-q", "-a", "-m", "second")
+    (repository / "a.py").write_text("x = 3\n")
+
+    assert changed_lines(repository, ["HEAD~1..HEAD"]) == {repository / "a.py": [(1, 1)]}
+
+    source = RevisionSource(repository, commit_range_head("HEAD~1.."))
+    file_manager = FileManager(source=source)
+    assert file_manager.get(repository / "a.py").content_bytes == b"x = 2\n"
+    with pytest.raises(FileNotFoundError):
+        source(repository / "missing.py")
+
+    # The process is not sent to worker processes, a new one is started on the first read
+    unpickled = pickle.loads(pickle.dumps(source))
+    assert unpickled(repository / "b.py") == b"y = 1\n"
+    unpickled.close()
+    source.close()
+
+
+def test_cat_file(repository: pathlib.Path):
+    """
+    Ensure objects are read one after another by a single process
+    """
+    with CatFile(repository) as cat_file:
+        assert cat_file.read("HEAD:a.py") == b"x = 1\n\ndef f():\n    return 1\n"
+        assert cat_file.read("HEAD:missing.py") is None
+        assert cat_file.read("HEAD:b.py") == b"y = 1\n"
+        with pytest.raises(GitError):
+            cat_file.read("HEAD:a.py\nHEAD:b.py")
+
+
+def test_tree_blobs(repository: pathlib.Path):
+    """
+    Ensure Python files of a directory are listed as they are in a revision
+    """
+    (repository / "sub").mkdir()
+    (repository / "sub" / "c.py").write_text("z = 1\n")
+    (repository / "sub" / "link.py").symlink_to("c.py")
+    git(repository, "add", "-A")
+    git(repository, "commit", "-q", "-m", "second")
+    (repository / "a.py").unlink()
+
+    blobs = tree_blobs(repository, "HEAD")
+    assert sorted(blobs) == [repository / "a.py", repository / "b.py", repository / "sub" / "c.py"]
+    assert tree_blobs(repository / "sub", "HEAD") == {repository / "sub" / "c.py": blobs[repository / "sub" / "c.py"]}
+    with CatFile(repository) as cat_file:
+        assert cat_file.read(blobs[repository / "b.py"]) == b"y = 1\n"
+
+
+@pytest.mark.parametrize(
+    "commit_range,head",
+    (("main..feature", "feature"), ("main...feature", "feature"), ("HEAD~3..", "HEAD")),
+)
+def test_commit_range_head(commit_range: str, head: str):
+    """
+    Ensure the head revision is taken from commit ranges
+    """
+    assert commit_range_head(commit_range) == head
+
+
+@pytest.mark.parametrize("commit_range", ("HEAD", "..HEAD"))
+def test_invalid_commit_range(commit_range: str):
+    """
+    Ensure ranges without a base revision are refused
+    """
+    with pytest.raises(GitError):
+        commit_range_head(commit_range)
@@ -0,0 +1,102 @@
+import io
+import pathlib
+import pickle
+import threading
+
+import pytest
+
+from navel.cli import rules_violations
+from navel.errors import LinterError
+from navel.parallel import MIN_FILES_PER_JOB, effective_jobs, parallel_rules_violations, resolve_jobs
+from navel.parsing import load_config
+
+CONFIG = """
+default_settings: !settings
+  included:
+    - "*"
+  excluded: []
+  allow_ignore: yes
+
+rules:
+  NoPrint:
+    description: "No print"
+    expr: //Call[func/Name/@id='print']
+    example: print(1)
+  NoTodo:
+    description: "No TODO"
+    expr: !regex TODO
+"""
+
+
+@pytest.fixture
+def rules():
+    return load_config(io.StringIO(CONFIG))
+
+
+@pytest.fixture
+def filepaths(tmp_path: pathlib.Path):
+    paths = []
+    for i in range(MIN_FILES_PER_JOB * 3):
+        path = tmp_path / f"module_{i}.py"
+        path.write_text(f"x = {i}\nprint(x)  # TODO\n" + "print(x)  # navel: ignore\n" * (i % 3))
+        paths.append(path)
+    return paths
+
+
+def test_rules_picklable(rules):
+    """
+    Ensure rules survive pickling needed to send them to worker processes
+    """
+    unpickled = pickle.loads(pickle.dumps(rules))
+    assert [rule.name for rule in unpickled] == [rule.name for rule in rules]
+    assert [repr(rule.expr) for rule in unpickled] == [repr(rule.expr) for rule in rules]
+
+
+def test_parallel_matches_serial(rules, filepaths):
+    """
+    Ensure parallel linting yields the same violations in the same order as serial linting
+    """
+    serial = [(v.path, v.lineno, v.line, v.rule.name) for v in rules_violations(filepaths, rules)]
+    parallel = [(v.path, v.lineno, v.line, v.rule.name) for v in parallel_rules_violations(filepaths, rules, 2)]
+    assert serial
+    assert parallel == serial
+
+
+def test_parallel_consumes_paths_in_calling_thread(rules, filepaths):
+    """
+    Ensure paths are taken lazily by the thread iterating the violations, which may share state with the producer
+    """
+    threads = set()
+
+    def produce():
+        for path in filepaths:
+            threads.add(threading.current_thread())
+            yield path
+
+    assert list(parallel_rules_violations(produce(), rules, 2))
+    assert threads == {threading.current_thread()}
+
+
+@pytest.mark.parametrize(
+    "jobs,files_count,expected",
+    (
+        (1, 1000, 1),
+        (8, 1, 1),
+        (8, MIN_FILES_PER_JOB * 2, 2),
+        (2, MIN_FILES_PER_JOB * 100, 2),
+    ),
+)
+def test_effective_jobs(jobs, files_count, expected):
+    """
+    Ensure small amounts of files fall back to serial linting
+    """
+    assert effective_jobs(jobs, files_count) == expected
+
+
+@pytest.mark.parametrize("jobs", ("0", "-1", "many"))
+def test_resolve_jobs_invalid(jobs):
+    """
+    Ensure invalid number of jobs is rejected
+    """
+    with pytest.raises(LinterError):
+        resolve_jobs(jobs)
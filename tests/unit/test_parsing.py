@@ -40,6 +40,17 @@ def get_mocked_xpath(xpath: str):
         pytest.param('!regex "*"', RegExExpr, marks=pytest.mark.xfail(raises=ExprError)),
         ("!settings {included: [], excluded: [], allow_ignore: yes}", SettingExpr),
         pytest.param("!settings {}", SettingExpr, marks=pytest.mark.xfail(raises=ExprError)),
+        ("!settings {included: [], excluded: [], allow_ignore: yes, max_lines: 10, generated: regex}", SettingExpr),
+        pytest.param(
+            "!settings {included: [], excluded: [], allow_ignore: yes, max_file_size: 0}",
+            SettingExpr,
+            marks=pytest.mark.xfail(raises=ExprError),
+        ),
+        pytest.param(
+            "!settings {included: [], excluded: [], allow_ignore: yes, generated: maybe}",
+            SettingExpr,
+            marks=pytest.mark.xfail(raises=ExprError),
+        ),
     ),
 )
 def test_constructors(expression, expected_type):
@@ -49,6 +60,21 @@ def test_constructors(expression, expected_type):
     assert isinstance(yaml.load(expression, Loader=yaml.FullLoader), expected_type)
 
 
+@pytest.mark.parametrize(
+    "expression,message",
+    (
+        ("!settings {included: [], excluded: [], allow_ignore: yes, max_line: 5}", "unknown field `max_line`"),
+        ("!settings {included: [], allow_ignore: yes, max_lines: 5}", "missing required field `excluded`"),
+    ),
+)
+def test_settings_fields(expression, message):
+    """
+    Ensure unknown and missing required fields of settings are reported by their names
+    """
+    with pytest.raises(ExprError, match=message):
+        yaml.load(expression, Loader=yaml.FullLoader)
+
+
 def test_parse_rule():
     """
     Ensure parse_rule returns expected output
@@ -0,0 +1,68 @@
+import pathlib
+import time
+
+import pytest
+
+from navel.caching.file_manager import FileManager
+from navel.caching.prefetch import Prefetcher
+
+
+@pytest.fixture
+def paths(tmp_path: pathlib.Path):
+    paths = []
+    for index in range(10):
+        path = tmp_path / f"module_{index}.py"
+        path.write_bytes(b"x = 1\n" * 20)
+        paths.append(path)
+    return paths
+
+
+def test_prefetch(paths):
+    """
+    Ensure paths are yielded in order with their files already read, unreadable files are read by the consumer
+    """
+    missing = paths[0].parent / "missing.py"
+    prefetcher = Prefetcher([*paths, missing], 1024)
+    file_manager = FileManager(source=prefetcher)
+
+    linted = []
+    for path in prefetcher:
+        if path == missing:
+            with pytest.raises(FileNotFoundError):
+                file_manager.get(path)
+            continue
+        path.unlink()
+        linted.append(path)
+        assert file_manager.get(path).content_bytes == b"x = 1\n" * 20
+    assert linted == paths
+
+
+def test_prefetch_budget(paths):
+    """
+    Ensure contents read in advance do not exceed the budget while the consumer is slow
+    """
+    prefetcher = Prefetcher(paths, 300)
+    for path in prefetcher:
+        time.sleep(0.01)
+        assert prefetcher(path) == b"x = 1\n" * 20
+    assert 0 < prefetcher.peak_bytes <= 300
+
+
+def test_prefetch_large_file(paths):
+    """
+    Ensure files larger than the budget are read once they are the next to be consumed
+    """
+    prefetcher = Prefetcher(paths, 10)
+    assert [prefetcher(path) for path in prefetcher] == [b"x = 1\n" * 20] * len(paths)
+
+
+def test_prefetch_stopped(paths):
+    """
+    Ensure files waiting for the budget stop being read ahead once the prefetcher is closed
+    """
+    prefetcher = Prefetcher(paths, 300, threads=2, max_files=4)
+    iterator = iter(prefetcher)
+    assert next(iterator) == paths[0]
+    prefetcher.close()
+    assert list(iterator) == paths[1:]
+    assert prefetcher(paths[-1]) == b"x = 1\n" * 20
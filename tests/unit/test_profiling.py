@@ -0,0 +1,100 @@
+import io
+import json
+import pathlib
+import time
+
+import pytest
+
+from navel.caching.file_manager import FileManager
+from navel.linter import Linter
+from navel.parallel import parallel_rules_violations
+from navel.parsing import load_config
+from navel.profiling import KIND_EXPR, KIND_FILE, KIND_RULE, KIND_STAGE, Profiler
+
+CONFIG = """
+default_settings: !settings
+  included:
+    - "*"
+  excluded: []
+  allow_ignore: yes
+
+rules:
+  NoPrint:
+    description: "No print"
+    expr: //Call[func/Name/@id='print']
+  NoTodo:
+    description: "No TODO"
+    expr: !regex TODO
+"""
+
+
+@pytest.fixture
+def filepaths(tmp_path: pathlib.Path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"module_{i}.py"
+        path.write_text(f"x = {i}\nprint(x)  # TODO\nprint(x)  # navel: ignore\n")
+        paths.append(path)
+    return paths
+
+
+def test_nested_time_is_exclusive():
+    """
+    Ensure time of nested stages is not attributed to the enclosing stage
+    """
+    profiler = Profiler()
+
+    with profiler.file("module.py"):
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                time.sleep(0.02)
+
+    timings = profiler.timings
+    assert timings[(KIND_STAGE, "inner")].seconds >= 0.02
+    assert timings[(KIND_STAGE, "outer")].seconds < 0.01
+    assert timings[(KIND_FILE, "module.py")].seconds >= 0.02
+    assert profiler.events is None
+
+
+def test_linter_profile(filepaths):
+    """
+    Ensure linting measures all stages, rules, expression types and files
+    """
+    rules = load_config(io.StringIO(CONFIG))
+    profiler = Profiler(trace=True)
+    linter = Linter(FileManager(profiler=profiler), rules)
+
+    for path in filepaths:
+        assert len(list(linter.file_violations(path))) == 2
+
+    assert {name for name, _ in profiler.top(KIND_STAGE)} == {
+        "read",
+        "parse",
+        "ast_to_xml",
+        "tokenize",
+        "match",
+        "report",
+    }
+    assert {name for name, _ in profiler.top(KIND_RULE)} == {"NoPrint", "NoTodo"}
+    assert {name for name, _ in profiler.top(KIND_EXPR)} == {"XPathExpr", "RegExExpr"}
+    assert [timing.calls for _, timing in profiler.top(KIND_FILE)] == [1] * len(filepaths)
+    assert len(profiler.top(KIND_FILE, 2)) == 2
+
+    trace = json.loads(profiler.dumps(chrome_trace=True))
+    assert trace["traceEvents"] and all(event["ph"] == "X" for event in trace["traceEvents"])
+    assert set(json.loads(profiler.dumps(chrome_trace=False))) == {KIND_STAGE, KIND_EXPR, KIND_RULE, KIND_FILE}
+
+
+def test_parallel_profile_is_merged(filepaths):
+    """
+    Ensure measurements of worker processes are collected
+    """
+    rules = load_config(io.StringIO(CONFIG))
+    file_manager = FileManager(profiler=Profiler())
+
+    assert len(list(parallel_rules_violations(filepaths, rules, 2, file_manager=file_manager))) == 2 * len(filepaths)
+
+    profiler = file_manager.profiler
+    assert profiler is not None
+    assert profiler.timings[(KIND_RULE, "NoTodo")].calls == len(filepaths)
+    assert {name for name, _ in profiler.top(KIND_FILE)} == {str(path) for path in filepaths}
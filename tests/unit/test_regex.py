@@ -0,0 +1,53 @@
+import pathlib
+import textwrap
+import unittest.mock
+
+import yaml
+
+from navel.caching.file_manager import File, read_file
+from navel.yaml_expr.regex import RegExExpr
+
+CODE = textwrap.dedent(
+    """\
+    # TODO: remove
+    import os
+
+    def f(a, b=print):  # TODO fix
+        print(a)
+        return "aaaa" + 'bb'
+    """
+)
+
+
+def get_mocked_regex(pattern: str):
+    loader = unittest.mock.MagicMock()
+    loader.construct_scalar = lambda _: pattern
+    return RegExExpr(loader, yaml.ScalarNode(tag="!regex", value=pattern))
+
+
+def test_line_numbers():
+    """
+    Test line numbers of matches start at 1
+    """
+    file = File(CODE.encode("utf-8"), "test.py")
+
+    assert get_mocked_regex("TODO").match_line_numbers(file) == [1, 4]
+    assert get_mocked_regex("$").match_line_numbers(file) == [1, 2, 3, 4, 5, 6, 6]
+    assert get_mocked_regex(r"print\(a\)\n\s*return").match_line_numbers(file) == [5]
+
+
+def test_mapped_line_numbers(tmp_path: pathlib.Path):
+    """
+    Test memory-mapped files get the same line numbers as files read into memory
+    """
+    path = tmp_path / "test.py"
+    path.write_text(CODE)
+    file = File(read_file(path, 1), "test.py")
+
+    assert file.ascii_mapping is not None
+    assert get_mocked_regex("TODO").match_line_numbers(file) == [1, 4]
+    assert get_mocked_regex("$").match_line_numbers(file) == [1, 2, 3, 4, 5, 6, 6]
+    assert get_mocked_regex(r"print\(a\)\n\s*return").match_line_numbers(file) == [5]
+    assert "content_str" not in vars(file)
+    # Escapes of bytes patterns differ, such patterns scan the decoded contents
+    assert get_mocked_regex(r"\u0054ODO fix").match_line_numbers(file) == [4]
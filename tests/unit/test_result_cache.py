@@ -0,0 +1,102 @@
+import io
+import os
+import pathlib
+
+import pytest
+
+from navel.caching.file_manager import FileManager
+from navel.caching.result_cache import ResultCache, clear_cache, rules_fingerprint
+from navel.linter import Linter
+from navel.parsing import load_config
+
+CONFIG = """
+default_settings: !settings
+  included:
+    - "*"
+  excluded: []
+  allow_ignore: yes
+
+rules:
+  NoPrint:
+    description: "No print"
+    expr: //Call[func/Name/@id='{name}']
+"""
+
+
+@pytest.fixture
+def rules():
+    return load_config(io.StringIO(CONFIG.format(name="print")))
+
+
+def test_fingerprint_changes_with_rules(rules):
+    """
+    Ensure changing a rule expression invalidates the cached results
+    """
+    other_rules = load_config(io.StringIO(CONFIG.format(name="pprint")))
+    assert rules_fingerprint(rules) == rules_fingerprint(load_config(io.StringIO(CONFIG.format(name="print"))))
+    assert rules_fingerprint(rules) != rules_fingerprint(other_rules)
+
+
+def test_put_get(tmp_path: pathlib.Path, rules):
+    """
+    Ensure stored violations are returned for the same key only
+    """
+    result_cache = ResultCache(tmp_path, rules)
+    key = result_cache.key(b"print(1)\n", rules)
+
+    assert result_cache.get(key) is None
+    result_cache.put(key, [("NoPrint", 1, "print(1)")])
+    assert result_cache.get(key) == [("NoPrint", 1, "print(1)")]
+    assert result_cache.get(result_cache.key(b"print(2)\n", rules)) is None
+
+    clear_cache(tmp_path)
+    assert result_cache.get(key) is None
+
+
+def test_prune_evicts_least_recently_used(tmp_path: pathlib.Path, rules):
+    """
+    Ensure pruning evicts the least recently used entries first
+    """
+    result_cache = ResultCache(tmp_path, rules, max_size=300)
+    keys = [result_cache.key(str(i).encode("utf-8"), rules) for i in range(10)]
+    for age, key in enumerate(keys):
+        result_cache.put(key, [("NoPrint", 1, "print(1)" * 3)])
+        entry = next(tmp_path.rglob(f"{key}.json"))
+        os.utime(entry, (age, age))
+
+    result_cache.prune()
+    cached = [key for key in keys if result_cache.get(key) is not None]
+    assert cached
+    assert cached == keys[-len(cached) :]
+
+
+def test_prune_checks_size_once_per_interval(tmp_path: pathlib.Path, rules):
+    """
+    Ensure the size of the cache is not checked again until the interval since the last check passes
+    """
+    result_cache = ResultCache(tmp_path, rules, max_size=300)
+    result_cache.put(result_cache.key(b"", rules), [])
+    result_cache.prune()
+
+    keys = [result_cache.key(str(i).encode("utf-8"), rules) for i in range(10)]
+    for key in keys:
+        result_cache.put(key, [("NoPrint", 1, "print(1)" * 3)])
+    result_cache.prune()
+    assert all(result_cache.get(key) is not None for key in keys)
+
+    result_cache.prune(interval=0)
+    assert not all(result_cache.get(key) is not None for key in keys)
+
+
+def test_linter_uses_cache(tmp_path: pathlib.Path, rules):
+    """
+    Ensure cached results are the same as freshly linted ones
+    """
+    path = tmp_path / "module.py"
+    path.write_text("x = 1\nprint(x)\n")
+    result_cache = ResultCache(tmp_path / "cache", rules)
+
+    fresh = list(Linter(FileManager(), rules, result_cache).file_violations(path))
+    cached = list(Linter(FileManager(), rules, result_cache).file_violations(path))
+    assert [(v.lineno, v.line, v.rule.name) for v in fresh] == [(2, "print(x)", "NoPrint")]
+    assert cached == fresh
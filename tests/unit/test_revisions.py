@@ -0,0 +1,111 @@
+import io
+import pathlib
+import subprocess
+
+import pytest
+
+from navel.cli import rules_violations
+from navel.errors import GitError
+from navel.parsing import load_config
+from navel.revisions import RevisionLinter
+
+CONFIG = """
+default_settings: !settings
+  included:
+    - "*"
+  excluded: []
+  allow_ignore: yes
+
+rules:
+  NoPrint:
+    description: "No print"
+    expr: //Call[func/Name/@id='print']
+"""
+
+
+def git(repository: pathlib.Path, *args: str):
+    subprocess.run(["git", "-C", str(repository), *args], check=True, stdout=subprocess.PIPE)
+
+
+def commit(repository: pathlib.Path, files):
+    for name, content in files.items():
+        (repository / name).parent.mkdir(parents=True, exist_ok=True)
+        (repository / name).write_text(content)
+    git(repository, "add", "-A")
+    git(repository, "commit", "-q", "-m", "commit")
+
+
+@pytest.fixture
+def repository(tmp_path: pathlib.Path):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "navel@example.com")
+    git(tmp_path, "config", "user.name", "Navel")
+    commit(tmp_path, {"a.py": "print(1)\nx = 1\n", "b.py": "print(2)\n", "copy/b.py": "print(2)\n"})
+    return tmp_path
+
+
+@pytest.fixture
+def linted():
+    return []
+
+
+@pytest.fixture
+def revision_linter(repository: pathlib.Path, linted):
+    rules = load_config(io.StringIO(CONFIG))
+
+    def lint(paths, file_manager):
+        linted.extend(path.relative_to(repository).as_posix() for path in paths)
+        return rules_violations(paths, rules, file_manager=file_manager)
+
+    return RevisionLinter(repository, rules, lint)
+
+
+def violations(results, repository: pathlib.Path):
+    return [(v.path.relative_to(repository).as_posix(), v.lineno, v.line) for v in results]
+
+
+def test_violations(revision_linter: RevisionLinter, repository: pathlib.Path, linted):
+    """
+    Ensure files are linted as they are in the revision and identical blobs are linted once
+    """
+    (repository / "a.py").write_text("x = 1\n")
+
+    assert violations(revision_linter.violations("HEAD"), repository) == [
+        ("a.py", 1, "print(1)"),
+        ("b.py", 1, "print(2)"),
+        ("copy/b.py", 1, "print(2)"),
+    ]
+    assert revision_linter.files_count == 3
+    assert sorted(linted) == ["a.py", "b.py"]
+
+
+def test_new_violations(revision_linter: RevisionLinter, repository: pathlib.Path, linted):
+    """
+    Ensure only violations missing in the baseline are reported and unchanged or moved files are not linted
+    """
+    git(repository, "mv", "b.py", "moved.py")
+    commit(repository, {"a.py": "y = 0\nprint(1)\nx = 1\nprint(3)\n", "c.py": "print(4)\n"})
+
+    assert violations(revision_linter.new_violations("HEAD", "HEAD~1"), repository) == [
+        ("a.py", 4, "print(3)"),
+        ("c.py", 1, "print(4)"),
+    ]
+    assert revision_linter.files_count == 2
+    assert sorted(linted) == ["a.py", "a.py", "c.py"]
+
+
+def test_repeated_violations(revision_linter: RevisionLinter, repository: pathlib.Path):
+    """
+    Ensure a repeated violation is new when the line is violated more times than in the baseline
+    """
+    commit(repository, {"a.py": "print(1)\nprint(1)\nx = 1\n"})
+
+    assert violations(revision_linter.new_violations("HEAD", "HEAD~1"), repository) == [("a.py", 2, "print(1)")]
+
+
+def test_invalid_revision(revision_linter: RevisionLinter):
+    """
+    Ensure an unknown revision is reported
+    """
+    with pytest.raises(GitError):
+        list(revision_linter.violations("unknown"))
@@ -0,0 +1,146 @@
+import os
+import pathlib
+import pickle
+import unittest.mock
+
+import pytest
+
+from navel.caching.rule_cache import (
+    RULES_DIRECTORY,
+    SECRET_KEY_FILE,
+    RuleCache,
+    clear_rule_cache,
+    config_key,
+    user_cache_directory,
+)
+from navel.constants import CONFIG_FILE_NAVEL
+from navel.errors import ParsingError
+from navel.parsing import load_config_file
+
+CONFIG = """
+default_settings: !settings
+  included:
+    - ~+/src/*
+  excluded: []
+  allow_ignore: yes
+
+rules:
+  NoPrint:
+    description: "No print"
+    expr: //Call[func/Name/@id='{name}']
+    example: "{name}(1)"
+    instead: "x = 1"
+"""
+
+
+@pytest.fixture(autouse=True)
+def user_cache(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "user"))
+
+
+@pytest.fixture
+def config_file(tmp_path: pathlib.Path):
+    path = tmp_path / CONFIG_FILE_NAVEL
+    path.write_text(CONFIG.format(name="print"))
+    return path
+
+
+def test_config_loader_resolves_globs(config_file: pathlib.Path):
+    """
+    Ensure globs are relative to the config file with both the cached and the uncached loading
+    """
+    expected = [config_file.parent / "src" / "*"]
+    assert [glob.glob for glob in load_config_file(config_file)[0].settings.included] == expected
+    for _ in range(2):
+        rules = load_config_file(config_file, config_file.parent / "cache")
+        assert [glob.glob for glob in rules[0].settings.included] == expected
+
+
+def test_yaml_errors_name_config_file(config_file: pathlib.Path):
+    """
+    Ensure YAML errors point to the config file with both the cached and the uncached loading
+    """
+    config_file.write_text("rules: [\n")
+    for cache_directory in (None, config_file.parent / "cache"):
+        with pytest.raises(ParsingError, match=f'in "{config_file}", line 2'):
+            load_config_file(config_file, cache_directory)
+
+
+def test_cached_rules_skip_validation(config_file: pathlib.Path):
+    """
+    Ensure rules of an unchanged config are loaded from the cache without being parsed and validated again
+    """
+    cache_directory = config_file.parent / "cache"
+    rules = load_config_file(config_file, cache_directory)
+
+    with unittest.mock.patch("navel.parsing.parse_rule") as parse_rule:
+        cached = load_config_file(config_file, cache_directory)
+    parse_rule.assert_not_called()
+    assert [(rule.name, repr(rule.expr), rule.example, rule.instead) for rule in cached] == [
+        (rule.name, repr(rule.expr), rule.example, rule.instead) for rule in rules
+    ]
+    assert repr(cached[0].settings) == repr(rules[0].settings)
+
+
+def test_changed_config_is_loaded_again(config_file: pathlib.Path):
+    """
+    Ensure a changed config misses the cache
+    """
+    cache_directory = config_file.parent / "cache"
+    load_config_file(config_file, cache_directory)
+
+    config_file.write_text(CONFIG.format(name="pprint"))
+    assert "pprint" in repr(load_config_file(config_file, cache_directory)[0].expr)
+
+
+def test_corrupted_entry_is_ignored(config_file: pathlib.Path):
+    """
+    Ensure unreadable cache entries are treated as missing
+    """
+    cache_directory = config_file.parent / "cache"
+    load_config_file(config_file, cache_directory)
+    for entry in (cache_directory / RULES_DIRECTORY).iterdir():
+        entry.write_bytes(b"corrupted")
+
+    assert RuleCache(cache_directory).get(config_key(config_file.read_bytes(), config_file)) is None
+    assert len(load_config_file(config_file, cache_directory)) == 1
+
+
+def test_prune_and_clear(config_file: pathlib.Path):
+    """
+    Ensure only the most recently used rule sets are kept and clearing removes all of them
+    """
+    cache_directory = config_file.parent / "cache"
+    rule_cache = RuleCache(cache_directory, max_rule_sets=2)
+    rules = load_config_file(config_file)
+    for age in range(4):
+        rule_cache.put(str(age), rules)
+        os.utime(cache_directory / RULES_DIRECTORY / f"{age}.pickle", (age, age))
+
+    rule_cache.prune()
+    assert [key for key in map(str, range(4)) if rule_cache.get(key) is not None] == ["2", "3"]
+
+    clear_rule_cache(cache_directory)
+    assert rule_cache.get("3") is None
+
+
+class Planted:
+    def __reduce__(self):
+        return pytest.fail, ("Planted cache entry has been unpickled",)
+
+
+def test_unsigned_entry_is_not_unpickled(config_file: pathlib.Path):
+    """
+    Ensure entries not signed by the secret key of the user are never unpickled
+    """
+    cache_directory = config_file.parent / "cache"
+    load_config_file(config_file, cache_directory)
+    key_file = user_cache_directory() / SECRET_KEY_FILE
+    assert key_file.stat().st_mode & 0o077 == 0
+
+    (entry,) = (cache_directory / RULES_DIRECTORY).iterdir()
+    entry.write_bytes(bytes(32) + pickle.dumps(Planted()))
+    assert len(load_config_file(config_file, cache_directory)) == 1
+
+    key_file.write_bytes(bytes(32))
+    assert RuleCache(cache_directory).get(config_key(config_file.read_bytes(), config_file)) is None
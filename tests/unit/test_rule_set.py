@@ -0,0 +1,147 @@
+import io
+import pathlib
+
+import pytest
+
+from navel.caching.file_manager import FileManager
+from navel.linter import Linter
+from navel.parsing import load_config
+from navel.rule_set import PathMatcher
+
+CONFIG = """
+settings:
+  all_files: &all_files !settings
+    included:
+      - "*"
+    excluded:
+      - "*/.tox/*"
+    allow_ignore: yes
+  tests_only: &tests_only !settings
+    included:
+      - tests/*
+      - "*/conftest.py"
+    excluded: []
+    allow_ignore: yes
+  excluding_tests: &excluding_tests !settings
+    included:
+      - "*.py"
+    excluded:
+      - tests/*
+      - "*/cli.py"
+    allow_ignore: yes
+
+rules:
+  A:
+    description: "A"
+    expr: //A
+    settings: *excluding_tests
+  B:
+    description: "B"
+    expr: //B
+    settings: *tests_only
+  C:
+    description: "C"
+    expr: //C
+    settings: *all_files
+  D:
+    description: "D"
+    expr: //D
+    settings: *excluding_tests
+"""
+
+
+@pytest.mark.parametrize(
+    "path",
+    (
+        "module.py",
+        "package/module.py",
+        "package/cli.py",
+        "tests/test_module.py",
+        "tests/unit/conftest.py",
+        "package/conftest.py",
+        "package/.tox/module.py",
+        "package/module.pyi",
+    ),
+)
+def test_path_matcher_matches_rules(path: str):
+    """
+    Ensure PathMatcher matches the same rules as matching every rule separately, sorted by rule names
+    """
+    rules = load_config(io.StringIO(CONFIG))
+    path_matcher = PathMatcher(rules)
+
+    expected = sorted((rule for rule in rules if rule.match_path(pathlib.Path(path))), key=lambda x: x.name)
+    assert path_matcher.match(pathlib.Path(path)) == expected
+    assert path_matcher.match(pathlib.Path(path)) == expected
+
+
+def test_path_matcher_shares_plans():
+    """
+    Ensure paths matched by the same rules share one precomputed list of rules
+    """
+    path_matcher = PathMatcher(load_config(io.StringIO(CONFIG)))
+
+    assert path_matcher.match(pathlib.Path("module.py")) is path_matcher.match(pathlib.Path("package/module.py"))
+    assert path_matcher.match(pathlib.Path("module.py")) is not path_matcher.match(pathlib.Path("package/cli.py"))
+
+
+def test_path_matcher_plan():
+    """
+    Ensure paths no rule applies to are dropped without the files being read
+    """
+    rules = load_config(io.StringIO(CONFIG))
+    path_matcher = PathMatcher([rule for rule in rules if rule.name == "B"])
+
+    paths = [pathlib.Path(path) for path in ("missing.py", "tests/missing.py", "package/conftest.py")]
+    assert list(path_matcher.plan(paths)) == [pathlib.Path("tests/missing.py"), pathlib.Path("package/conftest.py")]
+
+
+def test_linter_applies_matching_rules(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Ensure the Linter reports violations of rules applying to the linted file only
+    """
+    rules = load_config(io.StringIO(CONFIG.replace("//A", "//Name").replace("//B", "//Name")))
+    monkeypatch.chdir(tmp_path)
+    pathlib.Path("tests").mkdir()
+    pathlib.Path("tests", "test_module.py").write_text("x\n")
+    pathlib.Path("module.py").write_text("x\n")
+
+    linter = Linter(FileManager(), rules)
+    assert [rule.name for rule, _ in linter.lint_file(pathlib.Path("module.py"))] == ["A"]
+    assert [rule.name for rule, _ in linter.lint_file(pathlib.Path("tests", "test_module.py"))] == ["B"]
+
+
+GUARDED_CONFIG = """
+default_settings: !settings
+  included:
+    - "*"
+  excluded: []
+  allow_ignore: yes
+  max_lines: 2
+  generated: skip
+
+rules:
+  Regex:
+    description: "Regex"
+    expr: !regex x
+  XPath:
+    description: "XPath"
+    expr: //Name
+"""
+
+
+def test_linter_guards_generated_and_large_files(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Ensure large files are linted by regex rules only and generated files are skipped
+    """
+    monkeypatch.chdir(tmp_path)
+    pathlib.Path("small.py").write_text("x\n")
+    pathlib.Path("large.py").write_text("x\ny\nz\n")
+    pathlib.Path("generated.py").write_text("# @generated\nx\n")
+
+    file_manager = FileManager()
+    linter = Linter(file_manager, load_config(io.StringIO(GUARDED_CONFIG)))
+    assert sorted(rule.name for rule, _ in linter.lint_file(pathlib.Path("small.py"))) == ["Regex", "XPath"]
+    assert [rule.name for rule, _ in linter.lint_file(pathlib.Path("large.py"))] == ["Regex"]
+    assert list(linter.lint_file(pathlib.Path("generated.py"))) == []
+    assert (file_manager.stats.regex_only_files, file_manager.stats.skipped_files) == (1, 1)
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Maximal cumulative time of importing the CLI module in microseconds, best of several runs
+IMPORT_TIME_THRESHOLD = int(os.environ.get("NAVEL_IMPORT_TIME_THRESHOLD", 150_000))
+
+# Dependencies only commands linting files may import, and modules with long imports which no command needs
+HEAVY_MODULES = ("lxml.etree", "pyastgrep", "yaml", "pathspec", "navel.linter", "navel.parsing", "urllib.request")
+
+
+def import_times(module: str):
+    """
+    Import a module in a fresh interpreter and get cumulative import times of all imported modules
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", HEAVY_MODULES)
+def test_cli_does_not_import_heavy_modules(module: str):
+    """
+    Ensure importing the CLI does not import dependencies needed only for linting
+    """
+    assert module not in import_times("navel.cli")
+
+
+def test_cli_import_time():
+    """
+    Ensure the cold start of the CLI does not regress beyond the threshold
+    """
+    best = min(import_times("navel.cli")["navel.cli"] for _ in range(3))
+    assert best < IMPORT_TIME_THRESHOLD, f"Importing navel.cli took {best / 1000:.1f} ms"
@@ -0,0 +1,167 @@
+import os
+import pathlib
+import sys
+import time
+
+import pytest
+
+from navel.cli import project_rules_loader
+from navel.constants import CONFIG_FILE_NAVEL
+from navel.watch import InotifyWatcher, PollingWatcher, WatchSession
+
+CONFIG = """
+default_settings: !settings
+  included:
+    - "*"
+  excluded: []
+  allow_ignore: yes
+
+rules:
+  NoPrint:
+    description: "No print"
+    expr: //Call[func/Name/@id='print']
+  NoTodo:
+    description: "No TODO"
+    expr: !regex TODO
+    settings: !settings
+      included:
+        - "*/package/*"
+      excluded: []
+      allow_ignore: yes
+"""
+
+
+def write(path: pathlib.Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    # Ensure the modification time changes even on file systems with coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def violations(delta):
+    return (
+        sorted((v.path.name, v.lineno, v.rule.name) for v in delta.new),
+        sorted((v.path.name, v.lineno, v.rule.name) for v in delta.fixed),
+    )
+
+
+@pytest.fixture
+def project(tmp_path: pathlib.Path):
+    write(tmp_path / CONFIG_FILE_NAVEL, CONFIG)
+    write(tmp_path / "a.py", "print(1)\n")
+    write(tmp_path / "package" / "b.py", "x = 1  # TODO\ny = 2\n")
+    return tmp_path
+
+
+@pytest.fixture
+def session(project: pathlib.Path):
+    return WatchSession(project, project_rules_loader(project), PollingWatcher())
+
+
+def test_start_reports_all_violations(session: WatchSession):
+    """
+    Ensure all violations are reported as new on start
+    """
+    delta = session.start()
+
+    assert violations(delta) == ([("a.py", 1, "NoPrint"), ("b.py", 1, "NoTodo")], [])
+    assert delta.linted_files == 2
+    assert session.violations_count == 2
+
+
+def test_update_relints_only_changed_files(session: WatchSession, project: pathlib.Path):
+    """
+    Ensure only changed, added and removed files are linted again and only the delta is reported
+    """
+    session.start()
+
+    write(project / "a.py", "x = 1\n")
+    write(project / "package" / "c.py", "print(2)  # TODO\n")
+    delta = session.update({str(project), str(project / "package")})
+    assert violations(delta) == ([("c.py", 1, "NoPrint"), ("c.py", 1, "NoTodo")], [("a.py", 1, "NoPrint")])
+    assert delta.linted_files == 2
+
+    # Touching a file without changing its contents does not lint it again
+    write(project / "a.py", "x = 1\n")
+    assert session.update(None).linted_files == 0
+
+    (project / "package" / "b.py").unlink()
+    write(project / "new" / "sub" / "d.py", "print(3)\n")
+    delta = session.update({str(project), str(project / "package")})
+    assert violations(delta) == ([("d.py", 1, "NoPrint")], [("b.py", 1, "NoTodo")])
+    assert session.files_count == 3
+
+
+def test_moved_violations_are_not_reported(session: WatchSession, project: pathlib.Path):
+    """
+    Ensure violations only shifted by changes of lines above them are neither new nor fixed
+    """
+    session.start()
+
+    write(project / "a.py", "import sys\n\nprint(1)\n")
+    delta = session.update({str(project)})
+    assert violations(delta) == ([], [])
+    assert delta.linted_files == 1
+
+    # Identical violations are matched by their counts
+    write(project / "a.py", "print(1)\nif x:\n    print(1)\n")
+    assert violations(session.update({str(project)})) == ([("a.py", 3, "NoPrint")], [])
+    write(project / "a.py", "x = 1\nprint(1)\n")
+    assert violations(session.update({str(project)})) == ([], [("a.py", 3, "NoPrint")])
+    assert session.violations_count == 2
+
+
+def test_config_change_relints_affected_files(session: WatchSession, project: pathlib.Path):
+    """
+    Ensure changed rules are applied only to files matched by them
+    """
+    session.start()
+
+    write(project / CONFIG_FILE_NAVEL, CONFIG.replace("!regex TODO", "!regex y"))
+    delta = session.update(set())
+
+    assert delta.rules_reloaded
+    assert violations(delta) == ([("b.py", 2, "NoTodo")], [("b.py", 1, "NoTodo")])
+    assert delta.linted_files == 1
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        CONFIG.replace('description: "No print"', ""),
+        CONFIG.replace("expr: //Call[func/Name/@id='print']", ""),
+        CONFIG.replace("rules:", "rules: ["),
+    ],
+)
+def test_invalid_config_keeps_rules(session: WatchSession, project: pathlib.Path, config: str):
+    """
+    Ensure an invalid config is reported once, the previous rules are kept until the config is fixed
+    """
+    session.start()
+
+    write(project / CONFIG_FILE_NAVEL, config)
+    assert session.update(set()).errors
+    assert [rule.name for rule in session.rules] == ["NoPrint", "NoTodo"]
+    assert not session.update(set()).errors
+
+    write(project / CONFIG_FILE_NAVEL, CONFIG.replace("No print", "No print at all"))
+    delta = session.update(set())
+    assert not delta.errors
+    assert [rule.description for rule in session.rules] == ["No print at all", "No TODO"]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is available only on Linux")
+def test_inotify_watcher(tmp_path: pathlib.Path):
+    """
+    Ensure the inotify watcher reports directories with changed Python files only
+    """
+    with InotifyWatcher() as watcher:
+        watcher.watch(str(tmp_path))
+        (tmp_path / "notes.txt").write_text("x")
+        assert watcher.wait(0.1) == set()
+
+        (tmp_path / "module.py").write_text("x = 1\n")
+        start = time.monotonic()
+        assert watcher.wait(1) == {str(tmp_path)}
+        assert time.monotonic() - start < 0.5
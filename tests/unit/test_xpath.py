@@ -0,0 +1,174 @@
+import textwrap
+import unittest.mock
+
+import pytest
+import yaml
+
+from navel.caching.ast_xml import XmlOmissions
+from navel.caching.file_manager import File
+from navel.rule_set import XPathIndex
+from navel.yaml_expr.xpath import XPathExpr, index_path, required_node_types, xml_omissions
+
+CODE = textwrap.dedent(
+    """
+    import os
+
+    def f(a, b=print):
+        print(a)
+        print(os.path.join(a, b), sep=",")
+        return [print(x) for x in a if x]
+
+    class C:
+        def g(self):
+            pprint(self)
+            global y
+            y = lambda: print("//Call[1] | //Name")
+    """
+)
+
+
+def get_mocked_xpath(xpath: str):
+    loader = unittest.mock.MagicMock()
+    loader.construct_scalar = lambda _: xpath
+    return XPathExpr(loader, yaml.ScalarNode(tag="!xpath", value=xpath))
+
+
+def get_mocked_rule(expr):
+    rule = unittest.mock.MagicMock()
+    rule.expr = expr
+    return rule
+
+
+@pytest.mark.parametrize(
+    "path",
+    (
+        "//Call",
+        "//Call[1]",
+        "//Call[last()]",
+        "//Name[@id='print']",
+        "//Call[func/Name/@id='print']",
+        "//Print | //Call[func/Name[@id='print' or @id='pprint']]",
+        "//Call//Name",
+        "//Call/args/Name/..",
+        "//Call[count(args/*) > 1]/func/Attribute",
+        "//Global | //Lambda/body/Call",
+        "//FunctionDef[1]/body/*[2]",
+        "//Constant[contains(@value, '//Call[1] | //Name')]",
+        "//Module",
+    ),
+)
+def test_indexed_matches_full_evaluation(path: str):
+    """
+    Ensure XPath evaluated on candidate elements matches the same lines as the full evaluation
+    """
+    expr = get_mocked_xpath(path)
+    assert expr.indexed_tags is not None
+
+    file = File(CODE.encode("utf-8"), "module.py")
+    candidate_parents = XPathIndex([get_mocked_rule(expr)]).candidate_parents(file)
+    assert expr.match_line_numbers_indexed(file, candidate_parents) == expr.match_line_numbers(file)
+
+
+@pytest.mark.parametrize(
+    "path",
+    (
+        "//*",
+        "/Module/body",
+        "//Call[1] = //Name",
+        "(//Call)[1]",
+        "//ancestor::Call",
+        "//Call | /Module",
+        "//node()",
+        "//Call[$x]",
+    ),
+)
+def test_index_path_unsupported(path: str):
+    """
+    Ensure XPath expressions which can not be evaluated on candidate elements are recognized
+    """
+    assert index_path(path) is None
+
+
+@pytest.mark.parametrize(
+    "path,required",
+    (
+        ("//Call", (frozenset(("Call",)),)),
+        ("//Call/func/Name/@id", (frozenset(("Call", "Name")),)),
+        ("//Print | //Global", (frozenset(), frozenset(("Global",)))),
+        ("//FunctionDef//Lambda[not(ancestor::AsyncFunctionDef)]", (frozenset(("FunctionDef", "Lambda")),)),
+        ("/Module/body/child::Expr", (frozenset(("Module", "Expr")),)),
+        ("//*[self::Global]", (frozenset(),)),
+        ("//Subscript/slice/Name", (frozenset(("Subscript", "Name")),)),
+        ("(//Call)[1]", None),
+        ("//Call[1] = //Name", None),
+        ("//Call[$x]", None),
+    ),
+)
+def test_required_node_types(path: str, required):
+    """
+    Ensure node types named by steps of location paths are required, but not those in predicates or field names
+    """
+    assert required_node_types(path) == required
+
+
+@pytest.mark.parametrize(
+    "path",
+    (
+        "//Call",
+        "//Global | //AsyncFunctionDef",
+        "//FunctionDef//Global",
+        "//Lambda/body/Call",
+        "//AsyncFunctionDef",
+        "//Await | //YieldFrom",
+        "//ClassDef//Lambda",
+        "//Module/body/Try",
+    ),
+)
+def test_may_match_is_conservative(path: str):
+    """
+    Ensure expressions are never skipped on files they match
+    """
+    expr = get_mocked_xpath(path)
+    file = File(CODE.encode("utf-8"), "module.py")
+    assert expr.may_match(file.node_types) == bool(expr.match_line_numbers(file))
+
+
+@pytest.mark.parametrize(
+    "paths, omissions",
+    (
+        (["//Call", "//Global"], XmlOmissions(frozenset(("ctx",)), frozenset(("col_offset",)))),
+        (["//Call", "//Name[ctx/Store]"], XmlOmissions(frozenset(), frozenset(("col_offset",)))),
+        (["//Call[@col_offset = 0]"], XmlOmissions(frozenset(("ctx",)), frozenset())),
+        (["//Constant[@value = 'Load']"], XmlOmissions(frozenset(), frozenset(("col_offset",)))),
+        (["//Call", "//Call/args/*[1]"], XmlOmissions()),
+        (["//Name[@*]"], XmlOmissions()),
+        (["//Name[count(node()) = 1]"], XmlOmissions()),
+    ),
+)
+def test_xml_omissions(paths, omissions: XmlOmissions):
+    """
+    Ensure only fields and attributes no expression may refer to are omitted
+    """
+    assert xml_omissions(paths) == omissions
+
+
+@pytest.mark.parametrize(
+    "path",
+    (
+        "//Call",
+        "//Call[func/Name/@id='print']",
+        "//Call/args/Name/..",
+        "//Lambda/body/Call",
+        "//Name[ctx/Store]",
+        "//FunctionDef[1]/body/*[2]",
+        "//Call[@col_offset > 4]",
+        "//Name[following-sibling::*]",
+    ),
+)
+def test_omissions_keep_matches(path: str):
+    """
+    Ensure expressions match the same lines in trees with the parts they do not refer to omitted
+    """
+    expr = get_mocked_xpath(path)
+    file = File(CODE.encode("utf-8"), "module.py", xml_omissions=xml_omissions([path]))
+    assert expr.match_line_numbers(file) == expr.match_line_numbers(File(CODE.encode("utf-8"), "module.py"))